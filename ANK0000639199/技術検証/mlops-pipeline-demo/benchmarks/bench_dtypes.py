@@ -0,0 +1,110 @@
+"""
+Raw Data Dtype Benchmark
+
+Compares the in-memory preprocessing with pandas' default CSV dtypes
+(int64/float64 numbers, one string per row) against the compact schema
+dtypes of load_data() (category, float32, int8/int16). The default run
+uses the schema without storage dtypes, so clean_data() keeps the columns
+as loaded; the encoded output (small integer codes, float32) is the same
+for both. For every step the size of its output DataFrame and its time
+are reported, plus the time of a full copy of the loaded data.
+
+Usage:
+    python benchmarks/bench_dtypes.py --rows 1000000
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'pipeline'))
+
+from bench_pipeline import generate_raw_data  # noqa: E402
+from preprocess import (  # noqa: E402
+    clean_data, encode_features, load_data, memory_mb, split_data, validate_data
+)
+from validation import CHURN_SCHEMA  # noqa: E402
+
+# The schema without compact storage dtypes (pandas' defaults throughout)
+DEFAULT_SCHEMA = {col: {key: value for key, value in spec.items() if key != 'storage'}
+                  for col, spec in CHURN_SCHEMA.items()}
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Benchmark compact raw data dtypes')
+    parser.add_argument('--rows', type=int, default=1000000,
+                       help='Rows of the synthetic raw CSV')
+    parser.add_argument('--data-path', type=str, default=None,
+                       help='Existing raw CSV to use instead of synthetic data')
+    parser.add_argument('--output', type=str, default=None,
+                       help='Optional JSON file for the results')
+    return parser.parse_args()
+
+
+def timed(func, *args, **kwargs):
+    """Call func and return (result, seconds)."""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def run_steps(data_path, compact):
+    """
+    Run load, copy, clean, encode and split with one dtype setting.
+
+    Returns:
+        dict: Step name to {'mb': output size, 'seconds': time}
+    """
+    schema = CHURN_SCHEMA if compact else DEFAULT_SCHEMA
+    results = {}
+    df, seconds = timed(load_data, data_path, compact=compact, schema=schema)
+    results['load'] = {'mb': memory_mb(df), 'seconds': seconds}
+    copy, seconds = timed(df.copy)
+    results['copy'] = {'mb': memory_mb(copy), 'seconds': seconds}
+    del copy
+
+    report = validate_data(df, verbose=False, schema=schema)
+    df_clean, seconds = timed(clean_data, df, verbose=False, report=report, schema=schema)
+    results['clean'] = {'mb': memory_mb(df_clean), 'seconds': seconds}
+    (df_encoded, _, _), seconds = timed(encode_features, df_clean)
+    results['encode'] = {'mb': memory_mb(df_encoded), 'seconds': seconds}
+    (X_train, X_test, _, _), seconds = timed(split_data, df_encoded)
+    results['split'] = {'mb': memory_mb(X_train) + memory_mb(X_test), 'seconds': seconds}
+    return results
+
+
+def main():
+    """Run the benchmark and print a comparison table."""
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as work_dir:
+        data_path = args.data_path
+        if data_path is None:
+            data_path = os.path.join(work_dir, 'raw.csv')
+            print(f"Generating {args.rows} raw rows...")
+            generate_raw_data(data_path, args.rows)
+
+        default = run_steps(data_path, compact=False)
+        compact = run_steps(data_path, compact=True)
+
+    print("\n" + "=" * 78)
+    print(f"{'Step':<10}{'Default (MB)':>14}{'Compact (MB)':>14}{'Ratio':>8}"
+          f"{'Default (s)':>13}{'Compact (s)':>13}{'Speedup':>9}")
+    print("=" * 78)
+    for step in default:
+        d, c = default[step], compact[step]
+        print(f"{step:<10}{d['mb']:>14.1f}{c['mb']:>14.1f}{d['mb'] / c['mb']:>7.1f}x"
+              f"{d['seconds']:>13.3f}{c['seconds']:>13.3f}"
+              f"{d['seconds'] / c['seconds']:>8.1f}x")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'default': default, 'compact': compact}, f, indent=2)
+        print(f"Results saved to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
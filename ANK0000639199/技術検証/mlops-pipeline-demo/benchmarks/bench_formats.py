@@ -0,0 +1,135 @@
+"""
+Processed Data Format Benchmark
+
+Compares load time and file size of the processed dataset across the
+supported on-disk formats (CSV, Parquet, Feather, .npy).
+
+Usage:
+    python benchmarks/bench_formats.py --rows 1000000
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import pandas as pd
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'pipeline'))
+
+from storage import FORMATS, DATASET_NAMES, dataset_path, save_dataset, load_dataset  # noqa: E402
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Benchmark processed data formats')
+    parser.add_argument('--rows', type=int, default=1000000,
+                       help='Number of rows in the synthetic processed dataset')
+    parser.add_argument('--repeat', type=int, default=3,
+                       help='Number of timed loads per format (best is reported)')
+    parser.add_argument('--formats', type=str, default=','.join(FORMATS),
+                       help='Comma-separated list of formats to compare')
+    return parser.parse_args()
+
+
+def make_processed_dataset(n_rows, random_state=42):
+    """
+    Build a synthetic dataset shaped like preprocess_data() output.
+
+    Args:
+        n_rows: Total number of rows (80/20 train/test split)
+        random_state: Random seed
+
+    Returns:
+        dict: Mapping of dataset name to DataFrame/Series
+    """
+    rng = np.random.default_rng(random_state)
+    n_train = int(n_rows * 0.8)
+
+    def features(n):
+        return pd.DataFrame({
+            'Age': rng.standard_normal(n),
+            'Tenure': rng.standard_normal(n),
+            'MonthlyCharges': rng.standard_normal(n),
+            'TotalCharges': rng.standard_normal(n),
+            'Contract': rng.integers(0, 3, n),
+            'PaymentMethod': rng.integers(0, 3, n),
+        })
+
+    def labels(n):
+        return pd.Series(rng.integers(0, 2, n), name='Churn')
+
+    return {
+        'X_train': features(n_train),
+        'X_test': features(n_rows - n_train),
+        'y_train': labels(n_train),
+        'y_test': labels(n_rows - n_train),
+    }
+
+
+def benchmark_format(datasets, data_format, work_dir, repeat):
+    """
+    Write the dataset in one format and time loading it back.
+
+    Args:
+        datasets: Output of make_processed_dataset()
+        data_format: One of FORMATS
+        work_dir: Scratch directory
+        repeat: Number of timed loads
+
+    Returns:
+        dict: Write time, best load time and total size for the format
+    """
+    output_dir = os.path.join(work_dir, data_format)
+
+    start = time.perf_counter()
+    save_dataset(datasets, output_dir, data_format)
+    write_time = time.perf_counter() - start
+
+    size_bytes = sum(os.path.getsize(dataset_path(output_dir, name, data_format))
+                     for name in DATASET_NAMES)
+
+    load_times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        loaded = load_dataset(output_dir)
+        # Touch every value so memory-mapped formats are charged for the read
+        float(np.asarray(loaded['X_train']).sum())
+        load_times.append(time.perf_counter() - start)
+
+    return {
+        'format': data_format,
+        'write_seconds': write_time,
+        'load_seconds': min(load_times),
+        'size_mb': size_bytes / (1024 * 1024),
+    }
+
+
+def main():
+    """Run the format benchmark and print a comparison table."""
+    args = parse_args()
+    formats = [fmt.strip() for fmt in args.formats.split(',') if fmt.strip()]
+
+    print(f"Generating synthetic processed dataset with {args.rows} rows...")
+    datasets = make_processed_dataset(args.rows)
+
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        for data_format in formats:
+            print(f"Benchmarking {data_format}...")
+            results.append(benchmark_format(datasets, data_format, work_dir, args.repeat))
+
+    baseline = next((r for r in results if r['format'] == 'csv'), results[0])
+    print("\n" + "=" * 72)
+    print(f"{'Format':<10}{'Write (s)':>12}{'Load (s)':>12}{'Size (MB)':>12}"
+          f"{'Load speedup':>14}{'Size ratio':>12}")
+    print("=" * 72)
+    for r in results:
+        print(f"{r['format']:<10}{r['write_seconds']:>12.3f}{r['load_seconds']:>12.3f}"
+              f"{r['size_mb']:>12.2f}{baseline['load_seconds'] / r['load_seconds']:>13.1f}x"
+              f"{r['size_mb'] / baseline['size_mb']:>12.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,188 @@
+"""
+Model Artifact Format Benchmark
+
+Compares the file size and load time of a random forest stored as a joblib
+pickle (uncompressed and compressed) and as a flat .forest file (see
+pipeline/forest.py), loaded memory-mapped or read into memory.
+
+Two load times are reported:
+    warm load   load() in this process, best of --repeat
+    cold start  a fresh interpreter importing what it needs, loading the
+                model and scoring one row (what a serving worker pays)
+
+The .forest predictions are checked against the original model.
+
+Usage:
+    python benchmarks/bench_model_format.py --rows 100000 --n-estimators 100
+    python benchmarks/bench_model_format.py --model-path models/churn_model.pkl
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+import tempfile
+import numpy as np
+import joblib
+
+PIPELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'pipeline')
+sys.path.insert(0, PIPELINE_DIR)
+
+from bench_formats import make_processed_dataset  # noqa: E402
+from forest import FlatForest  # noqa: E402
+
+
+# Cold-start script: time imports + load + one prediction in a fresh interpreter
+COLD_START = """
+import time
+start = time.perf_counter()
+import sys
+sys.path.insert(0, {pipeline_dir!r})
+import numpy as np
+if {forest!r}:
+    from forest import FlatForest
+    model = FlatForest.load({path!r}, mmap={mmap!r})
+else:
+    import joblib
+    model = joblib.load({path!r})
+model.predict_proba(np.zeros((1, model.n_features_in_)))
+print(time.perf_counter() - start)
+"""
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Benchmark model artifact formats')
+    parser.add_argument('--model-path', type=str, default=None,
+                       help='Existing joblib model to compare (default: train one '
+                            'on synthetic data)')
+    parser.add_argument('--rows', type=int, default=100000,
+                       help='Training rows of the synthetic model')
+    parser.add_argument('--n-estimators', type=int, default=100,
+                       help='Trees of the synthetic model')
+    parser.add_argument('--max-depth', type=int, default=None,
+                       help='Depth limit of the synthetic model (default: fully grown)')
+    parser.add_argument('--compress', type=int, default=3,
+                       help='joblib compression level of the compressed pickle')
+    parser.add_argument('--repeat', type=int, default=5,
+                       help='Timed loads per format')
+    parser.add_argument('--output', type=str, default=None,
+                       help='Optional JSON file for the results')
+    return parser.parse_args()
+
+
+def build_model(args):
+    """
+    Load the model to compare, or train a deep forest on synthetic data.
+
+    Returns:
+        tuple: (model, X_test)
+    """
+    datasets = make_processed_dataset(args.rows)
+    if args.model_path:
+        print(f"Loading {args.model_path}...")
+        return joblib.load(args.model_path), datasets['X_test']
+
+    from sklearn.ensemble import RandomForestClassifier
+
+    print(f"Training {args.n_estimators} trees on {args.rows} synthetic rows...")
+    model = RandomForestClassifier(n_estimators=args.n_estimators, max_depth=args.max_depth,
+                                   random_state=42, n_jobs=-1)
+    model.fit(datasets['X_train'], datasets['y_train'])
+    return model, datasets['X_test']
+
+
+def cold_start(path, forest, mmap, repeat):
+    """Median seconds for a fresh interpreter to load the model and score one row."""
+    script = COLD_START.format(pipeline_dir=PIPELINE_DIR, path=path, forest=forest, mmap=mmap)
+    times = []
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, '-c', script], capture_output=True,
+                                text=True, check=True)
+        times.append(float(result.stdout.strip().splitlines()[-1]))
+    return statistics.median(times)
+
+
+def benchmark(name, path, save, load, forest, mmap, repeat):
+    """
+    Save the model in one format and time loading it back.
+
+    Returns:
+        dict: Size, save time, warm load and cold start of the format
+    """
+    start = time.perf_counter()
+    save(path)
+    save_seconds = time.perf_counter() - start
+
+    load_times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        load(path)
+        load_times.append(time.perf_counter() - start)
+
+    return {
+        'format': name,
+        'size_mb': os.path.getsize(path) / (1024 * 1024),
+        'save_seconds': save_seconds,
+        'load_seconds': min(load_times),
+        'cold_start_seconds': cold_start(path, forest, mmap, repeat),
+    }
+
+
+def main():
+    """Run the benchmark and print a comparison table."""
+    args = parse_args()
+    model, X_test = build_model(args)
+    flat = FlatForest.from_model(model)
+    print(f"{flat.n_estimators} trees, {flat.node_count} nodes, depth {flat.max_depth}")
+
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        pickle_path = os.path.join(work_dir, 'model.pkl')
+        compressed_path = os.path.join(work_dir, 'model.z.pkl')
+        forest_path = os.path.join(work_dir, 'model.forest')
+        formats = [
+            ('joblib', pickle_path, lambda path: joblib.dump(model, path),
+             joblib.load, False, False),
+            (f'joblib z{args.compress}', compressed_path,
+             lambda path: joblib.dump(model, path, compress=args.compress),
+             joblib.load, False, False),
+            ('forest mmap', forest_path, flat.save, FlatForest.load, True, True),
+            ('forest read', forest_path, flat.save,
+             lambda path: FlatForest.load(path, mmap=False), True, False),
+        ]
+        for name, path, save, load, forest, mmap in formats:
+            print(f"Benchmarking {name}...")
+            results.append(benchmark(name, path, save, load, forest, mmap, args.repeat))
+
+        loaded = FlatForest.load(forest_path)
+        difference = float(np.abs(loaded.predict_proba(X_test)
+                                  - model.predict_proba(X_test)).max())
+        labels_match = bool((loaded.predict(X_test) == model.predict(X_test)).all())
+
+    baseline = results[0]
+    print("\n" + "=" * 86)
+    print(f"{'Format':<14}{'Size (MB)':>11}{'Size ratio':>12}{'Save (s)':>10}"
+          f"{'Load (s)':>10}{'Load speedup':>14}{'Cold start (s)':>15}")
+    print("=" * 86)
+    for r in results:
+        print(f"{r['format']:<14}{r['size_mb']:>11.2f}{r['size_mb'] / baseline['size_mb']:>12.2f}"
+              f"{r['save_seconds']:>10.3f}{r['load_seconds']:>10.4f}"
+              f"{baseline['load_seconds'] / r['load_seconds']:>13.1f}x"
+              f"{r['cold_start_seconds']:>15.3f}")
+    print(f"\nMax predict_proba difference on {len(X_test)} rows: {difference:.3g} "
+          f"(labels {'match' if labels_match else 'DIFFER'})")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'n_estimators': flat.n_estimators, 'node_count': flat.node_count,
+                       'max_depth': flat.max_depth, 'max_difference': difference,
+                       'labels_match': labels_match, 'results': results}, f, indent=2)
+        print(f"Results saved to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,383 @@
+"""
+Pipeline Stage Benchmark
+
+Times the pipeline hot paths on synthetic churn data with the same schema as
+data/sample_data.csv, at several dataset sizes:
+
+    preprocess  preprocess.preprocess_data (streaming above --chunksize rows)
+    train       train.train_model
+    evaluate    train.evaluate_model
+    report      evaluate.py predictions, plots, classification report,
+                business metrics and threshold table
+
+Every stage runs in a fresh process so its peak RSS is its own. Results
+(wall time, peak RSS, rows/s) are written to a JSON file; pass a previous
+result file with --compare to flag stages that got slower.
+
+Usage:
+    python benchmarks/bench_pipeline.py --sizes 1e4,1e5,1e6
+    python benchmarks/bench_pipeline.py --sizes 1e4,1e5,1e6 \\
+        --compare benchmarks/results/pipeline-<old commit>.json
+
+Sizes up to 1e8 are supported; above --max-model-rows the model stages use
+the first --max-model-rows processed rows, since a random forest on the
+full set would not fit in memory. The raw CSV at 1e8 rows is about 5 GB.
+"""
+
+import os
+import sys
+import io
+import json
+import time
+import platform
+import argparse
+import tempfile
+import contextlib
+import subprocess
+import multiprocessing
+import numpy as np
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'pipeline'))
+
+STAGES = ['preprocess', 'train', 'evaluate', 'report']
+CONTRACTS = ['Month-to-month', 'One year', 'Two year']
+PAYMENT_METHODS = ['Bank transfer', 'Credit card', 'Electronic check', 'Mailed check']
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Benchmark the pipeline stages')
+    parser.add_argument('--sizes', type=str, default='1e4,1e5,1e6',
+                       help='Comma-separated raw dataset sizes in rows (e.g. 1e4,1e6,1e8)')
+    parser.add_argument('--stages', type=str, default=','.join(STAGES),
+                       help='Comma-separated stages to run')
+    parser.add_argument('--chunksize', type=int, default=1000000,
+                       help='Preprocess larger datasets in streaming chunks of this size')
+    parser.add_argument('--format', type=str, default='npy', dest='data_format',
+                       help='Processed data format')
+    parser.add_argument('--max-model-rows', type=int, default=1000000,
+                       help='Cap on the rows used by the train/evaluate/report stages')
+    parser.add_argument('--n-estimators', type=int, default=50,
+                       help='Trees in the benchmarked forest')
+    parser.add_argument('--max-depth', type=int, default=10,
+                       help='Maximum depth of the benchmarked trees')
+    parser.add_argument('--n-jobs', type=int, default=-1,
+                       help='n_jobs for training')
+    parser.add_argument('--work-dir', type=str, default=None,
+                       help='Directory for generated data (reused between runs); '
+                            'defaults to a temporary directory')
+    parser.add_argument('--output', type=str, default=None,
+                       help='Result JSON path (default: benchmarks/results/pipeline-<commit>.json)')
+    parser.add_argument('--compare', type=str, default=None,
+                       help='Previous result JSON to compare against')
+    parser.add_argument('--max-regression', type=float, default=0.2,
+                       help='Allowed relative wall time increase before --compare fails')
+    parser.add_argument('--verbose', action='store_true',
+                       help='Show the output of the pipeline functions')
+    return parser.parse_args()
+
+
+def git_commit():
+    """Short hash of the checked-out commit, or 'unknown'."""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def peak_rss_mb():
+    """Peak resident set size of the current process in MB."""
+    if resource is None:
+        return float('nan')
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def generate_raw_data(path, n_rows, chunk_rows=1000000, random_state=42):
+    """
+    Write a synthetic raw churn CSV with the sample data's schema.
+
+    Values follow the validation schema, with about 1% missing Age and
+    TotalCharges and 0.5% out-of-range Age so validation and cleaning do
+    real work. Churn depends on tenure, charges and contract, so the
+    model has signal to fit. Rows are written in chunks to bound memory.
+
+    Args:
+        path: Output CSV path
+        n_rows: Number of rows
+        chunk_rows: Rows generated per chunk
+        random_state: Random seed
+    """
+    rng = np.random.default_rng(random_state)
+    tmp_path = f'{path}.tmp'
+    for start in range(0, n_rows, chunk_rows):
+        n = min(chunk_rows, n_rows - start)
+        age = rng.integers(18, 81, n).astype(np.float64)
+        tenure = rng.integers(0, 73, n)
+        monthly = np.round(rng.uniform(20, 120, n), 2)
+        total = np.round(monthly * np.maximum(tenure, 1), 1)
+        contract = rng.integers(0, len(CONTRACTS), n)
+        logit = 0.8 - 0.05 * tenure + 0.01 * (monthly - 70) - 1.2 * contract
+        churn = (rng.random(n) < 1 / (1 + np.exp(-logit))).astype(np.int64)
+
+        age[rng.random(n) < 0.005] = 150
+        age[rng.random(n) < 0.01] = np.nan
+        total[rng.random(n) < 0.01] = np.nan
+
+        chunk = pd.DataFrame({
+            'CustomerID': np.arange(start + 1, start + n + 1),
+            'Age': age,
+            'Tenure': tenure,
+            'MonthlyCharges': monthly,
+            'TotalCharges': total,
+            'Contract': np.asarray(CONTRACTS)[contract],
+            'PaymentMethod': np.asarray(PAYMENT_METHODS)[rng.integers(0, 4, n)],
+            'Churn': churn,
+        })
+        chunk.to_csv(tmp_path, mode='w' if start == 0 else 'a', header=start == 0, index=False)
+    os.replace(tmp_path, path)
+
+
+def _model_data(processed_dir, max_rows, names):
+    """Load processed datasets, keeping at most max_rows rows of each."""
+    from storage import load_dataset
+    datasets = load_dataset(processed_dir, names=names)
+    return [datasets[name][:max_rows] for name in names]
+
+
+def _stage_preprocess(paths, config):
+    from preprocess import preprocess_data
+    chunksize = config['chunksize'] if config['rows'] > config['chunksize'] else None
+    start = time.perf_counter()
+    preprocess_data(paths['raw'], paths['processed'], chunksize=chunksize,
+                    data_format=config['data_format'], use_cache=False)
+    return time.perf_counter() - start, config['rows']
+
+
+def _stage_train(paths, config):
+    import joblib
+    from train import train_model
+    X_train, y_train = _model_data(paths['processed'], config['max_model_rows'],
+                                   ['X_train', 'y_train'])
+    params = {'n_estimators': config['n_estimators'], 'max_depth': config['max_depth'],
+              'min_samples_split': 2, 'min_samples_leaf': 1, 'random_state': 42,
+              'n_jobs': config['n_jobs']}
+    start = time.perf_counter()
+    model, _ = train_model(X_train, y_train, params)
+    elapsed = time.perf_counter() - start
+    joblib.dump(model, paths['model'])
+    return elapsed, len(X_train)
+
+
+def _stage_evaluate(paths, config):
+    import joblib
+    from train import evaluate_model
+    model = joblib.load(paths['model'])
+    X_train, X_test, y_train, y_test = _model_data(
+        paths['processed'], config['max_model_rows'], ['X_train', 'X_test', 'y_train', 'y_test'])
+    start = time.perf_counter()
+    evaluate_model(model, X_train, y_train, X_test, y_test)
+    return time.perf_counter() - start, len(X_train) + len(X_test)
+
+
+def _stage_report(paths, config):
+    import joblib
+    import evaluate
+    model = joblib.load(paths['model'])
+    X_test, y_test = _model_data(paths['processed'], config['max_model_rows'],
+                                 ['X_test', 'y_test'])
+    output_dir = paths['metrics']
+    os.makedirs(output_dir, exist_ok=True)
+    start = time.perf_counter()
+    y_pred_proba = model.predict_proba(X_test)[:, 1]
+    y_pred = (y_pred_proba > 0.5).astype(np.int64)
+    curve = evaluate.ThresholdCurve(y_test, y_pred_proba)
+    evaluate.generate_confusion_matrix(y_test, y_pred, output_dir, curve)
+    evaluate.generate_roc_curve(y_test, y_pred_proba, output_dir, curve)
+    evaluate.generate_precision_recall_curve(y_test, y_pred_proba, output_dir, curve)
+    evaluate.generate_classification_report(y_test, y_pred, output_dir, curve)
+    evaluate.calculate_business_metrics(y_test, y_pred, y_pred_proba, curve)
+    evaluate.generate_threshold_table(curve, output_dir)
+    return time.perf_counter() - start, len(X_test)
+
+
+STAGE_FUNCTIONS = {
+    'preprocess': _stage_preprocess,
+    'train': _stage_train,
+    'evaluate': _stage_evaluate,
+    'report': _stage_report,
+}
+
+
+def _stage_worker(stage, paths, config, results):
+    """Run one stage in a child process and report its measurements."""
+    try:
+        output = None if config['verbose'] else io.StringIO()
+        with contextlib.redirect_stdout(output) if output else contextlib.nullcontext():
+            wall_seconds, rows = STAGE_FUNCTIONS[stage](paths, config)
+        results.put({'wall_seconds': wall_seconds, 'rows_processed': int(rows),
+                     'peak_rss_mb': peak_rss_mb()})
+    except Exception as exc:
+        results.put({'error': f'{type(exc).__name__}: {exc}'})
+
+
+def run_stage(stage, paths, config):
+    """
+    Run one stage in a fresh process.
+
+    Args:
+        stage: Stage name (one of STAGES)
+        paths: Dict of file locations shared by the stages
+        config: Benchmark settings for this dataset size
+
+    Returns:
+        dict: Stage measurements
+    """
+    ctx = multiprocessing.get_context('spawn')
+    results = ctx.Queue()
+    process = ctx.Process(target=_stage_worker, args=(stage, paths, config, results))
+    process.start()
+    result = results.get()
+    process.join()
+    if 'error' in result:
+        raise RuntimeError(f"Stage {stage} failed at {config['rows']} rows: {result['error']}")
+
+    result['rows_per_second'] = result['rows_processed'] / result['wall_seconds']
+    return dict({'rows': config['rows'], 'stage': stage}, **result)
+
+
+def benchmark_size(n_rows, stages, work_dir, args):
+    """
+    Generate data of one size and benchmark every stage on it.
+
+    Args:
+        n_rows: Raw dataset size
+        stages: Stage names to run, in pipeline order
+        work_dir: Directory for generated data and stage outputs
+        args: Parsed command line arguments
+
+    Returns:
+        list: One result dict per stage
+    """
+    size_dir = os.path.join(work_dir, f'rows-{n_rows}')
+    os.makedirs(size_dir, exist_ok=True)
+    paths = {
+        'raw': os.path.join(size_dir, 'raw.csv'),
+        'processed': os.path.join(size_dir, 'processed'),
+        'model': os.path.join(size_dir, 'model.pkl'),
+        'metrics': os.path.join(size_dir, 'metrics'),
+    }
+    config = {'rows': n_rows, 'chunksize': args.chunksize, 'data_format': args.data_format,
+              'max_model_rows': args.max_model_rows, 'n_estimators': args.n_estimators,
+              'max_depth': args.max_depth, 'n_jobs': args.n_jobs, 'verbose': args.verbose}
+
+    if not os.path.exists(paths['raw']):
+        print(f"Generating {n_rows} rows of synthetic churn data...")
+        generate_raw_data(paths['raw'], n_rows)
+
+    results = []
+    for stage in stages:
+        result = run_stage(stage, paths, config)
+        print(f"  {stage:<11}{result['wall_seconds']:>10.3f} s{result['peak_rss_mb']:>10.0f} MB"
+              f"{result['rows_per_second']:>14,.0f} rows/s")
+        results.append(result)
+    return results
+
+
+def compare_results(current, baseline, max_regression):
+    """
+    Print per-stage wall time ratios against a baseline result file.
+
+    Args:
+        current: Result dict of this run
+        baseline: Result dict of an earlier run
+        max_regression: Allowed relative wall time increase
+
+    Returns:
+        list: (rows, stage, ratio) for stages that regressed
+    """
+    previous = {(r['rows'], r['stage']): r for r in baseline['results']}
+    regressions = []
+    print("\n" + "=" * 72)
+    print(f"Comparison with {baseline.get('commit', 'baseline')} "
+          f"(fails above {1 + max_regression:.2f}x)")
+    print("=" * 72)
+    print(f"{'Rows':>12}  {'Stage':<11}{'Before (s)':>12}{'After (s)':>12}{'Ratio':>8}"
+          f"{'RSS ratio':>11}")
+    for result in current['results']:
+        before = previous.get((result['rows'], result['stage']))
+        if before is None:
+            continue
+        ratio = result['wall_seconds'] / before['wall_seconds']
+        rss_ratio = result['peak_rss_mb'] / before['peak_rss_mb']
+        flag = '  REGRESSION' if ratio > 1 + max_regression else ''
+        print(f"{result['rows']:>12}  {result['stage']:<11}{before['wall_seconds']:>12.3f}"
+              f"{result['wall_seconds']:>12.3f}{ratio:>7.2f}x{rss_ratio:>10.2f}x{flag}")
+        if flag:
+            regressions.append((result['rows'], result['stage'], ratio))
+    return regressions
+
+
+def main():
+    """Run the stage benchmark, write the JSON results and optionally compare."""
+    args = parse_args()
+    sizes = [int(float(size)) for size in args.sizes.split(',') if size.strip()]
+    stages = [stage.strip() for stage in args.stages.split(',') if stage.strip()]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        raise ValueError(f"Unknown stages: {unknown}; expected some of {STAGES}")
+    # Later stages consume earlier outputs; keep pipeline order
+    stages = [stage for stage in STAGES if stage in stages]
+
+    commit = git_commit()
+    output = {
+        'benchmark': 'pipeline',
+        'commit': commit,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+        },
+        'config': {'sizes': sizes, 'stages': stages, 'chunksize': args.chunksize,
+                   'data_format': args.data_format, 'max_model_rows': args.max_model_rows,
+                   'n_estimators': args.n_estimators, 'max_depth': args.max_depth,
+                   'n_jobs': args.n_jobs},
+        'results': [],
+    }
+
+    with contextlib.ExitStack() as stack:
+        work_dir = args.work_dir or stack.enter_context(
+            tempfile.TemporaryDirectory(prefix='bench-pipeline-'))
+        for n_rows in sizes:
+            print(f"\nBenchmarking {n_rows} rows")
+            output['results'] += benchmark_size(n_rows, stages, work_dir, args)
+
+    output_path = args.output or os.path.join(RESULTS_DIR, f'pipeline-{commit}.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    with open(output_path, 'w') as f:
+        json.dump(output, f, indent=2)
+    print(f"\nResults saved to {output_path}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare_results(output, baseline, args.max_regression)
+        if regressions:
+            print(f"\n{len(regressions)} stage(s) slower than allowed")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+"""
+Import-Time Check
+
+Imports each pipeline entry point in a fresh interpreter with
+`python -X importtime` and fails when an import takes longer than its budget
+or pulls in a heavy dependency that should only load when a stage runs.
+This keeps `--help` and short `docker-compose run` invocations fast.
+
+    module      budget   must not import
+    train       250 ms   mlflow, matplotlib, seaborn, sklearn, pandas
+    evaluate    300 ms   mlflow, matplotlib, seaborn, sklearn, pandas
+    tune        300 ms   mlflow, matplotlib, seaborn, sklearn, pandas
+    tracking    150 ms   mlflow, matplotlib, seaborn, sklearn, pandas
+    preprocess  800 ms   mlflow, matplotlib, seaborn, sklearn
+
+The time is the median cumulative import time of the module over --repeat
+runs. Budgets leave headroom for slower CI machines; scale them with
+--budget-scale. The forbidden-module check does not depend on timing.
+
+Usage:
+    python benchmarks/check_import_time.py
+    python benchmarks/check_import_time.py --repeat 9 --budget-scale 2 --output importtime.json
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+
+PIPELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'pipeline')
+HEAVY_MODULES = ('mlflow', 'matplotlib', 'seaborn', 'sklearn', 'pandas')
+
+# module -> (budget in ms, top-level packages it must not import)
+ENTRY_POINTS = {
+    'train': (250, HEAVY_MODULES),
+    'evaluate': (300, HEAVY_MODULES),
+    'tune': (300, HEAVY_MODULES),
+    'tracking': (150, HEAVY_MODULES),
+    'preprocess': (800, ('mlflow', 'matplotlib', 'seaborn', 'sklearn')),
+}
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Check import time of the pipeline entry points')
+    parser.add_argument('--modules', type=str, default=','.join(ENTRY_POINTS),
+                       help='Comma-separated entry point modules to check')
+    parser.add_argument('--repeat', type=int, default=5,
+                       help='Fresh interpreters per module; the median is compared')
+    parser.add_argument('--budget-scale', type=float, default=1.0,
+                       help='Multiply every budget (e.g. 2 on slow CI runners)')
+    parser.add_argument('--top', type=int, default=5,
+                       help='Slowest direct imports to list per module')
+    parser.add_argument('--output', type=str, default=None,
+                       help='Optional JSON file for the measurements')
+    return parser.parse_args()
+
+
+def parse_importtime(stderr):
+    """
+    Parse `-X importtime` output.
+
+    Returns:
+        list: (depth, module, self_us, cumulative_us) in output order, where
+        nested imports come before the module that imported them
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # header line
+        name = fields[2].rstrip()
+        depth = (len(name) - len(name.lstrip(' ')) - 1) // 2
+        entries.append((depth, name.strip(), int(fields[0]), int(fields[1])))
+    return entries
+
+
+def measure_import(module):
+    """
+    Import a module in a fresh interpreter.
+
+    Returns:
+        tuple: (cumulative seconds, set of imported top-level packages,
+        [(child module, seconds), ...] direct imports of the module)
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=PIPELINE_DIR, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    entries = parse_importtime(result.stderr)
+    index = next(i for i, entry in reversed(list(enumerate(entries)))
+                 if entry[0] == 0 and entry[1] == module)
+    # Everything between the previous top-level import and the module is its subtree
+    start = index
+    while start > 0 and entries[start - 1][0] > 0:
+        start -= 1
+    subtree = entries[start:index]
+    packages = {name.split('.')[0] for _, name, _, _ in entries}
+    children = [(name, cumulative / 1e6) for depth, name, _, cumulative in subtree if depth == 1]
+    return entries[index][3] / 1e6, packages, children
+
+
+def check_module(module, repeat, budget_scale):
+    """
+    Measure one entry point against its budget.
+
+    Returns:
+        dict: Measurement with 'ok' and the reasons it failed
+    """
+    budget_ms, forbidden = ENTRY_POINTS[module]
+    budget_ms *= budget_scale
+    runs = [measure_import(module) for _ in range(repeat)]
+    median_ms = statistics.median(seconds for seconds, _, _ in runs) * 1000
+    heavy = sorted(set(forbidden) & runs[0][1])
+    children = sorted(runs[0][2], key=lambda child: child[1], reverse=True)
+
+    failures = []
+    if median_ms > budget_ms:
+        failures.append(f'{median_ms:.0f} ms over the {budget_ms:.0f} ms budget')
+    if heavy:
+        failures.append(f"imports {', '.join(heavy)}")
+    return {'module': module, 'median_ms': median_ms, 'budget_ms': budget_ms,
+            'runs_ms': [seconds * 1000 for seconds, _, _ in runs],
+            'heavy_imports': heavy, 'slowest_imports': children,
+            'ok': not failures, 'failures': failures}
+
+
+def main():
+    """Check every entry point and exit non-zero on a violation."""
+    args = parse_args()
+    modules = [module.strip() for module in args.modules.split(',') if module.strip()]
+    unknown = set(modules) - set(ENTRY_POINTS)
+    if unknown:
+        raise ValueError(f"Unknown modules: {unknown}; expected some of {list(ENTRY_POINTS)}")
+
+    results = []
+    print(f"{'Module':<12}{'Median (ms)':>12}{'Budget (ms)':>12}  Status")
+    for module in modules:
+        result = check_module(module, args.repeat, args.budget_scale)
+        results.append(result)
+        status = 'ok' if result['ok'] else 'FAIL: ' + '; '.join(result['failures'])
+        print(f"{module:<12}{result['median_ms']:>12.0f}{result['budget_ms']:>12.0f}  {status}")
+        for name, seconds in result['slowest_imports'][:args.top]:
+            print(f"{'':<14}{name:<40}{seconds * 1000:>8.1f} ms")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'python': sys.version.split()[0], 'results': results}, f, indent=2)
+        print(f"\nResults saved to {args.output}")
+
+    failed = [result['module'] for result in results if not result['ok']]
+    if failed:
+        print(f"\nImport-time check failed for: {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,223 @@
+"""
+Stage Cache Module
+
+This module provides a content-addressed cache for pipeline stage outputs.
+Entries are keyed by a hash of the stage inputs, parameters and source code,
+so a cached result is only reused when none of them changed.
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+
+
+DEFAULT_CACHE_DIR = 'data/cache'
+DEFAULT_MAX_BYTES = 5 * 1024 ** 3
+DEFAULT_MAX_AGE_DAYS = 30
+ENTRY_META_FILE = 'entry.json'
+FILE_DIGESTS_FILE = 'file_digests.json'
+
+
+def _sha256_file(path, block_size=1024 * 1024):
+    """Hash a file's content in fixed-size blocks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _dir_size(path):
+    """Total size in bytes of all files below path."""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+class StageCache:
+    """
+    Directory-backed cache of stage outputs addressed by content hash.
+
+    Each entry is a directory named after its key, holding copies of the
+    stage's output files and an entry.json with metadata. Entries are
+    written to a temporary directory and renamed into place, so readers
+    never see a half-written entry.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES,
+                 max_age_days=DEFAULT_MAX_AGE_DAYS):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+
+    def file_digest(self, path):
+        """
+        Return the SHA-256 of a file's content.
+
+        Digests are memoized by (path, size, mtime) so large, unchanged
+        input files are not re-read on every run.
+        """
+        stat = os.stat(path)
+        memo_key = f'{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}'
+        memo_path = os.path.join(self.cache_dir, FILE_DIGESTS_FILE)
+
+        memo = {}
+        if os.path.exists(memo_path):
+            try:
+                with open(memo_path) as f:
+                    memo = json.load(f)
+            except ValueError:
+                memo = {}
+        if memo_key in memo:
+            return memo[memo_key]
+
+        digest = _sha256_file(path)
+        memo = {k: v for k, v in memo.items()
+                if not k.startswith(os.path.abspath(path) + ':')}
+        memo[memo_key] = digest
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f'{memo_path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(memo, f)
+        os.replace(tmp_path, memo_path)
+        return digest
+
+    def key(self, stage, input_paths=(), params=None, source_paths=()):
+        """
+        Compute the cache key of one stage invocation.
+
+        Args:
+            stage: Stage name
+            input_paths: Data files the stage reads
+            params: JSON-serializable parameters that affect the output
+            source_paths: Source files whose code affects the output
+
+        Returns:
+            str: Hex digest identifying the stage output
+        """
+        digest = hashlib.sha256()
+        digest.update(stage.encode())
+        for path in input_paths:
+            digest.update(self.file_digest(path).encode())
+        digest.update(json.dumps(params or {}, sort_keys=True, default=str).encode())
+        for path in source_paths:
+            digest.update(_sha256_file(path).encode())
+        return digest.hexdigest()
+
+    def entry_dir(self, key):
+        """Directory holding the entry for key."""
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def has(self, key):
+        """Check whether a complete entry exists for key."""
+        return os.path.exists(os.path.join(self.entry_dir(key), ENTRY_META_FILE))
+
+    def store(self, key, source_dir, files, meta=None):
+        """
+        Copy stage output files into the cache under key.
+
+        Args:
+            key: Cache key from key()
+            source_dir: Directory containing the output files
+            files: File names (relative to source_dir) to cache
+            meta: Optional JSON-serializable metadata stored with the entry
+        """
+        entry_dir = self.entry_dir(key)
+        if self.has(key):
+            return entry_dir
+
+        tmp_dir = f'{entry_dir}.{os.getpid()}.tmp'
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        for name in files:
+            shutil.copy2(os.path.join(source_dir, name), os.path.join(tmp_dir, name))
+        with open(os.path.join(tmp_dir, ENTRY_META_FILE), 'w') as f:
+            json.dump({'key': key, 'files': list(files), 'created': time.time(),
+                       'meta': meta or {}}, f, indent=2)
+
+        try:
+            os.rename(tmp_dir, entry_dir)
+        except OSError:
+            # Another process stored the same key first; its copy is identical.
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        return entry_dir
+
+    def restore(self, key, output_dir):
+        """
+        Copy a cached entry's files into output_dir.
+
+        Args:
+            key: Cache key from key()
+            output_dir: Directory to restore the files into
+
+        Returns:
+            dict: The metadata stored with the entry, or None on a miss
+        """
+        if not self.has(key):
+            return None
+
+        entry_dir = self.entry_dir(key)
+        with open(os.path.join(entry_dir, ENTRY_META_FILE)) as f:
+            entry = json.load(f)
+
+        os.makedirs(output_dir, exist_ok=True)
+        for name in entry['files']:
+            shutil.copy2(os.path.join(entry_dir, name), os.path.join(output_dir, name))
+
+        # The entry directory's mtime records the last use for LRU eviction.
+        os.utime(entry_dir)
+        return entry['meta']
+
+    def entries(self):
+        """List (entry_dir, last_used, size_bytes) for all complete entries."""
+        result = []
+        if not os.path.isdir(self.cache_dir):
+            return result
+        for prefix in os.listdir(self.cache_dir):
+            prefix_dir = os.path.join(self.cache_dir, prefix)
+            if not os.path.isdir(prefix_dir):
+                continue
+            for name in os.listdir(prefix_dir):
+                entry_dir = os.path.join(prefix_dir, name)
+                if name.endswith('.tmp') or not os.path.exists(
+                        os.path.join(entry_dir, ENTRY_META_FILE)):
+                    continue
+                result.append((entry_dir, os.path.getmtime(entry_dir), _dir_size(entry_dir)))
+        return result
+
+    def evict(self):
+        """
+        Remove entries unused for more than max_age_days, then least
+        recently used entries until the cache fits in max_bytes. Either
+        limit can be None to disable it.
+
+        Returns:
+            int: Number of entries removed
+        """
+        max_bytes, max_age_days = self.max_bytes, self.max_age_days
+        entries = sorted(self.entries(), key=lambda entry: entry[1])
+        removed = 0
+        now = time.time()
+
+        if max_age_days is not None:
+            cutoff = now - max_age_days * 24 * 3600
+            for entry in [e for e in entries if e[1] < cutoff]:
+                shutil.rmtree(entry[0], ignore_errors=True)
+                entries.remove(entry)
+                removed += 1
+
+        if max_bytes is not None:
+            total = sum(entry[2] for entry in entries)
+            while entries and total > max_bytes:
+                entry_dir, _, size = entries.pop(0)
+                shutil.rmtree(entry_dir, ignore_errors=True)
+                total -= size
+                removed += 1
+
+        if removed:
+            print(f"Evicted {removed} cache entries from {self.cache_dir}")
+        return removed
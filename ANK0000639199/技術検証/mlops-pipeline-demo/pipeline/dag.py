@@ -0,0 +1,424 @@
+"""
+DAG Executor Module
+
+This module runs pipeline steps declared as a graph of nodes. Each node is a
+function with named inputs and outputs; a node starts as soon as all of its
+inputs exist, so independent branches (e.g. several candidate models) run
+side by side:
+
+    dag = Dag()
+    dag.add('split', split_data, inputs=['encoded'],
+            outputs=['X_train', 'X_test', 'y_train', 'y_test'], cache=True)
+    dag.add('train', train_model, inputs=['X_train', 'y_train', 'params'])
+    values = dag.run({'encoded': df, 'params': {...}}, cache=StageCache())
+
+Nodes run in a thread pool by default. NumPy, pandas and scikit-learn
+release the GIL in their heavy loops, so threads share the data without
+copying it. Nodes that are not thread-safe (matplotlib) run in worker
+processes with executor='process'; their inputs and outputs are pickled.
+Trivial nodes can run inline in the scheduling thread.
+
+Caching: every node gets a key from its function's source file, its bound
+parameters and the keys of the nodes that produced its inputs (initial
+values are hashed by value, file inputs by content). Keys are known before
+anything runs, so when a cached node's outputs can be restored, the nodes
+that only feed it are skipped as well. Outputs of nodes with cache=True are
+pickled into the StageCache (see cache.py). Nodes with side effects, such
+as writing reports, should not be cached.
+
+Each node is timed; with an active recording (see instrumentation.py) the
+nodes also appear as spans.
+"""
+
+import os
+import json
+import time
+import pickle
+import hashlib
+import inspect
+import tempfile
+import functools
+from concurrent.futures import (
+    FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+)
+
+from instrumentation import add_span, span
+
+
+EXECUTORS = ('thread', 'process', 'inline')
+OUTPUTS_FILE = 'outputs.pkl'
+
+
+class Node:
+    """
+    One step of a Dag.
+
+    Args:
+        name: Unique node name
+        func: Function called with the input values, in order
+        inputs: Names of the values passed to func
+        outputs: Names for the return value; with several names the
+            return value is unpacked
+        executor: 'thread', 'process' (func and values must pickle) or
+            'inline'
+        cache: Store the outputs in the stage cache
+        file_inputs: Input names whose values are file paths; the file
+            content instead of the path goes into the cache key
+        sources: Source files whose code determines the output (defaults
+            to the file defining func)
+    """
+
+    def __init__(self, name, func, inputs=(), outputs=None, executor='thread', cache=False,
+                 file_inputs=(), sources=None):
+        if executor not in EXECUTORS:
+            raise ValueError(f"Unknown executor {executor!r}; expected one of {EXECUTORS}")
+        unknown = set(file_inputs) - set(inputs)
+        if unknown:
+            raise ValueError(f"Node {name}: file inputs {sorted(unknown)} are not inputs")
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.outputs = list(outputs) if outputs is not None else [name]
+        self.executor = executor
+        self.cache = cache
+        self.file_inputs = set(file_inputs)
+        self.sources = list(sources) if sources is not None else _source_files(func)
+
+    def unpack(self, result):
+        """Map the return value of func to the output names."""
+        if len(self.outputs) == 1:
+            return {self.outputs[0]: result}
+        result = tuple(result)
+        if len(result) != len(self.outputs):
+            raise ValueError(f"Node {self.name} returned {len(result)} values "
+                             f"for outputs {self.outputs}")
+        return dict(zip(self.outputs, result))
+
+    def __repr__(self):
+        return f'Node({self.name!r}, inputs={self.inputs}, outputs={self.outputs})'
+
+
+class NodeResult:
+    """Timing of one node in a Dag run ('ran' or 'cached')."""
+
+    def __init__(self, name, executor, status, seconds, cpu_seconds=0.0):
+        self.name = name
+        self.executor = executor
+        self.status = status
+        self.seconds = seconds
+        self.cpu_seconds = cpu_seconds
+
+    def to_dict(self):
+        return {'name': self.name, 'executor': self.executor, 'status': self.status,
+                'seconds': self.seconds, 'cpu_seconds': self.cpu_seconds}
+
+
+def _source_files(func):
+    """Source file defining func (looking through functools.partial)."""
+    while isinstance(func, functools.partial):
+        func = func.func
+    try:
+        path = inspect.getsourcefile(func)
+    except TypeError:
+        return []  # builtins and C functions
+    return [path] if path else []
+
+
+def _bound_params(func):
+    """Arguments bound with functools.partial, for the cache key."""
+    params = []
+    while isinstance(func, functools.partial):
+        params.append([list(func.args), func.keywords])
+        func = func.func
+    return params
+
+
+def _value_digest(value):
+    """Hash an initial value: its JSON form, or its pickle for other objects."""
+    try:
+        return json.dumps(value, sort_keys=True)
+    except TypeError:
+        return hashlib.sha256(pickle.dumps(value, protocol=4)).hexdigest()
+
+
+def _timed_call(func, args):
+    """
+    Call func(*args) and measure it where it runs.
+
+    Module level so process pools can pickle it.
+
+    Returns:
+        tuple: (return value, wall seconds, CPU seconds of this thread/process)
+    """
+    start_time = time.perf_counter()
+    start_cpu = time.thread_time()
+    result = func(*args)
+    return result, time.perf_counter() - start_time, time.thread_time() - start_cpu
+
+
+class Dag:
+    """
+    A graph of Nodes, connected by the names of the values they exchange.
+
+    Values that no node produces must be passed to run() as initial values.
+    After run(), results holds the NodeResult of every node that ran or
+    was restored, in completion order.
+    """
+
+    def __init__(self):
+        self.nodes = {}
+        self.producers = {}
+        self.results = []
+
+    def add(self, name, func, inputs=(), outputs=None, **options):
+        """
+        Add a node (see Node for the arguments).
+
+        Returns:
+            Node
+        """
+        if name in self.nodes:
+            raise ValueError(f"Duplicate node name: {name}")
+        node = Node(name, func, inputs, outputs, **options)
+        for output in node.outputs:
+            if output in self.producers:
+                raise ValueError(f"Value {output!r} is produced by both "
+                                 f"{self.producers[output]} and {name}")
+        for output in node.outputs:
+            self.producers[output] = name
+        self.nodes[name] = node
+        return node
+
+    def order(self, initial=()):
+        """
+        Nodes in a dependency-respecting order.
+
+        Args:
+            initial: Names of the values given to run()
+
+        Returns:
+            list: Node names
+
+        Raises:
+            ValueError: If an input is neither produced nor given, or the
+                graph has a cycle
+        """
+        for node in self.nodes.values():
+            missing = [name for name in node.inputs
+                       if name not in self.producers and name not in initial]
+            if missing:
+                raise ValueError(f"Node {node.name}: no value or producer for {missing}")
+
+        order, state = [], {}
+
+        def visit(name, path):
+            if state.get(name) == 'done':
+                return
+            if state.get(name) == 'visiting':
+                cycle = path[path.index(name):] + [name]
+                raise ValueError(f"Cycle in DAG: {' -> '.join(cycle)}")
+            state[name] = 'visiting'
+            for value in self.nodes[name].inputs:
+                if value in self.producers:
+                    visit(self.producers[value], path + [name])
+            state[name] = 'done'
+            order.append(name)
+
+        for name in self.nodes:
+            visit(name, [])
+        return order
+
+    def _dependencies(self, name):
+        """Names of the nodes producing a node's inputs."""
+        return {self.producers[value] for value in self.nodes[name].inputs
+                if value in self.producers}
+
+    def keys(self, values, cache):
+        """
+        Cache keys of all nodes, chained through the values they exchange.
+
+        Args:
+            values: Initial values
+            cache: StageCache used to hash file inputs and sources
+
+        Returns:
+            dict: Node name to key
+        """
+        keys, value_keys, source_digests = {}, {}, {}
+        for name in self.order(values):
+            node = self.nodes[name]
+            inputs = []
+            for value in node.inputs:
+                if value in self.producers:
+                    inputs.append(value_keys[value])
+                elif value in node.file_inputs:
+                    inputs.append(cache.file_digest(values[value]))
+                else:
+                    inputs.append(_value_digest(values[value]))
+            for path in node.sources:
+                if path not in source_digests:
+                    source_digests[path] = cache.file_digest(path)
+            keys[name] = cache.key(f'dag.{name}', params={
+                'inputs': inputs,
+                'outputs': node.outputs,
+                'bound': json.dumps(_bound_params(node.func), sort_keys=True, default=repr),
+                'sources': [source_digests[path] for path in node.sources],
+            })
+            for output in node.outputs:
+                value_keys[output] = f'{keys[name]}:{output}'
+        return keys
+
+    def _needed(self, targets, hits):
+        """Nodes to run or restore for targets; cache hits cut off their inputs."""
+        needed, pending = set(), list(targets)
+        while pending:
+            name = pending.pop()
+            if name in needed:
+                continue
+            needed.add(name)
+            if name not in hits:
+                pending.extend(self._dependencies(name))
+        return needed
+
+    def _store(self, cache, key, node, outputs):
+        """Pickle a node's outputs into the cache."""
+        import joblib
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            joblib.dump(outputs, os.path.join(tmp_dir, OUTPUTS_FILE))
+            cache.store(key, tmp_dir, [OUTPUTS_FILE], meta={'node': node.name})
+
+    def _restore(self, cache, key):
+        """Load a node's outputs from the cache (None on a miss)."""
+        import joblib
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            if cache.restore(key, tmp_dir) is None:
+                return None
+            return joblib.load(os.path.join(tmp_dir, OUTPUTS_FILE))
+
+    def _run_node(self, node, args, cache, key):
+        """Run a node in the calling thread, inside its span, and cache the outputs."""
+        with span(node.name):
+            result, seconds, cpu_seconds = _timed_call(node.func, args)
+            outputs = node.unpack(result)
+            if cache is not None and node.cache:
+                self._store(cache, key, node, outputs)
+        return outputs, seconds, cpu_seconds
+
+    def run(self, values, targets=None, max_workers=None, process_workers=None, cache=None):
+        """
+        Run the graph.
+
+        Args:
+            values: Dict of initial values
+            targets: Node names to compute (default: the nodes whose outputs
+                no other node consumes)
+            max_workers: Threads running nodes (default: CPU count)
+            process_workers: Processes for executor='process' nodes
+                (default: max_workers)
+            cache: Optional StageCache; without it nothing is cached or
+                skipped
+
+        Returns:
+            dict: The initial values plus every value computed or restored
+        """
+        values = dict(values)
+        order = self.order(values)
+        if targets is None:
+            consumed = {value for node in self.nodes.values() for value in node.inputs}
+            targets = [name for name in order
+                       if not set(self.nodes[name].outputs) & consumed]
+        unknown = set(targets) - set(self.nodes)
+        if unknown:
+            raise ValueError(f"Unknown target nodes: {sorted(unknown)}")
+
+        keys, hits = {}, set()
+        if cache is not None:
+            keys = self.keys(values, cache)
+            hits = {name for name in order if self.nodes[name].cache and cache.has(keys[name])}
+        self.results = []
+        done = set()
+
+        # Restore cached nodes first; one evicted since has() is run instead
+        restored = False
+        while not restored:
+            restored = True
+            needed = self._needed(targets, hits)
+            for name in [name for name in order if name in needed and name in hits]:
+                if name in done:
+                    continue
+                start_time = time.perf_counter()
+                outputs = self._restore(cache, keys[name])
+                if outputs is None:
+                    hits.discard(name)
+                    restored = False
+                    break
+                values.update(outputs)
+                done.add(name)
+                self.results.append(NodeResult(name, self.nodes[name].executor, 'cached',
+                                               time.perf_counter() - start_time))
+        remaining = [name for name in order if name in needed and name not in done]
+
+        max_workers = max_workers or os.cpu_count() or 1
+        threads = ThreadPoolExecutor(max_workers, thread_name_prefix='dag')
+        processes = None
+        if any(self.nodes[name].executor == 'process' for name in remaining):
+            processes = ProcessPoolExecutor(process_workers or max_workers)
+        running = {}
+
+        def finish(name, outputs, seconds, cpu_seconds):
+            values.update(outputs)
+            done.add(name)
+            self.results.append(NodeResult(name, self.nodes[name].executor, 'ran',
+                                           seconds, cpu_seconds))
+
+        try:
+            while remaining or running:
+                # Start every node whose inputs are complete
+                for name in [name for name in remaining if self._dependencies(name) <= done]:
+                    node = self.nodes[name]
+                    remaining.remove(name)
+                    args = [values[value] for value in node.inputs]
+                    if node.executor == 'inline':
+                        finish(name, *self._run_node(node, args, cache, keys.get(name)))
+                    elif node.executor == 'process':
+                        running[processes.submit(_timed_call, node.func, args)] = name
+                    else:
+                        running[threads.submit(self._run_node, node, args, cache,
+                                               keys.get(name))] = name
+
+                if not running:
+                    continue
+                completed, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in completed:
+                    name = running.pop(future)
+                    node = self.nodes[name]
+                    if node.executor == 'process':
+                        result, seconds, cpu_seconds = future.result()
+                        outputs = node.unpack(result)
+                        add_span(name, seconds, cpu_seconds)
+                        if cache is not None and node.cache:
+                            self._store(cache, keys[name], node, outputs)
+                    else:
+                        outputs, seconds, cpu_seconds = future.result()
+                    finish(name, outputs, seconds, cpu_seconds)
+        finally:
+            # On a failure, queued nodes are dropped and running ones finish
+            threads.shutdown(wait=True, cancel_futures=True)
+            if processes is not None:
+                processes.shutdown(wait=True, cancel_futures=True)
+
+        return values
+
+    def print_summary(self):
+        """Print the node timings of the last run in completion order."""
+        width = max([24] + [len(result.name) + 2 for result in self.results])
+        print(f"\n{'Node':<{width}}{'Executor':<10}{'Status':<8}{'Wall (s)':>10}{'CPU (s)':>10}")
+        for result in self.results:
+            print(f"{result.name:<{width}}{result.executor:<10}{result.status:<8}"
+                  f"{result.seconds:>10.3f}{result.cpu_seconds:>10.3f}")
+        ran = [result for result in self.results if result.status == 'ran']
+        cached = len(self.results) - len(ran)
+        print(f"{len(ran)} nodes ran ({sum(r.seconds for r in ran):.2f}s of node time), "
+              f"{cached} restored from cache")
@@ -2,52 +2,84 @@
 Model Evaluation Module
 
 This module handles detailed model evaluation and generates evaluation reports.
+All metrics and curves are derived from one ThresholdCurve (see scoring.py),
+which sorts the predicted probabilities once. The figures are rendered in
+worker processes (see plots.py) while the reports are computed.
+
+pandas, joblib and the preprocessing stage are imported by the functions
+that use them, so `--help` returns without paying for those imports.
 """
 
 import os
 import json
 import argparse
-import pandas as pd
+import contextlib
 import numpy as np
-import joblib
-import mlflow
-import matplotlib.pyplot as plt
-import seaborn as sns
-from sklearn.metrics import (
-    confusion_matrix, classification_report,
-    roc_curve, auc, precision_recall_curve
+from scoring import (
+    CLASS_NAMES, DEFAULT_CHURN_COST, DEFAULT_CONTACT_COST, ThresholdCurve,
+    confusion_counts, format_classification_report
+)
+from plots import (
+    DEFAULT_PLOT_WORKERS, PlotPool, curve_data, plot_jobs, render_confusion_matrix,
+    render_precision_recall_curve, render_roc_curve, write_curve_data
 )
+from forest import load_model
+from instrumentation import add_instrumentation_args, recording, span
+from tracking import Tracker, add_tracking_args
 
 
 def parse_args():
     """Parse command line arguments."""
     parser = argparse.ArgumentParser(description='Evaluate ML model')
     parser.add_argument('--model-path', type=str, default='models/churn_model.pkl',
-                       help='Path to trained model')
+                       help='Path to trained model (joblib pickle or .forest)')
     parser.add_argument('--data-dir', type=str, default='data/processed',
                        help='Directory containing processed data')
     parser.add_argument('--output-dir', type=str, default='metrics',
                        help='Directory to save evaluation results')
+    add_evaluation_args(parser)
+    add_instrumentation_args(parser)
+    add_tracking_args(parser)
     return parser.parse_args()
 
 
+def add_evaluation_args(parser):
+    """Add the threshold, cost and plot flags to an argument parser."""
+    parser.add_argument('--threshold', type=float, default=0.5,
+                       help='Churn probability above which a customer is predicted to churn')
+    parser.add_argument('--contact-cost', type=float, default=DEFAULT_CONTACT_COST,
+                       help='Cost of a retention contact for one flagged customer')
+    parser.add_argument('--churn-cost', type=float, default=DEFAULT_CHURN_COST,
+                       help='Cost of one churner that was not flagged')
+    parser.add_argument('--no-plots', action='store_true',
+                       help='Skip the PNG figures; only write the curve data (curves.json)')
+    parser.add_argument('--plot-workers', type=int, default=DEFAULT_PLOT_WORKERS,
+                       help='Processes rendering the figures, one per figure at most '
+                            '(1 renders in this process)')
+    return parser
+
+
 def load_model_and_data(model_path, data_dir):
     """
     Load trained model and test data.
 
     Args:
-        model_path: Path to trained model
+        model_path: Path to trained model (joblib or .forest)
         data_dir: Directory containing processed data
 
     Returns:
         tuple: (model, X_test, y_test)
     """
+    from preprocess import ensure_processed_data
+    from storage import load_dataset
+
     print(f"Loading model from {model_path}...")
-    model = joblib.load(model_path)
+    model = load_model(model_path)
 
     print(f"Loading test data from {data_dir}...")
-    X_test = pd.read_csv(f'{data_dir}/X_test.csv')
-    y_test = pd.read_csv(f'{data_dir}/y_test.csv').values.ravel()
+    ensure_processed_data(data_dir)
+    datasets = load_dataset(data_dir, names=['X_test', 'y_test'])
+    X_test, y_test = datasets['X_test'], datasets['y_test']
 
     print(f"Model loaded: {type(model).__name__}")
     print(f"Test set: {X_test.shape}")
@@ -55,7 +87,21 @@ def load_model_and_data(model_path, data_dir):
     return model, X_test, y_test
 
 
-def generate_confusion_matrix(y_true, y_pred, output_dir):
+def predict_churn(model, X_test, threshold=0.5):
+    """
+    Churn probabilities and labels from one pass over the model.
+
+    Labels follow from the probabilities, so the forest is only evaluated once.
+
+    Returns:
+        tuple: (predicted labels, predicted probabilities)
+    """
+    y_pred_proba = model.predict_proba(X_test)[:, 1]
+    y_pred = (y_pred_proba > threshold).astype(np.int64)
+    return y_pred, y_pred_proba
+
+
+def generate_confusion_matrix(y_true, y_pred, output_dir, curve=None, threshold=0.5):
     """
     Generate and save confusion matrix visualization.
 
@@ -63,31 +109,28 @@ def generate_confusion_matrix(y_true, y_pred, output_dir):
         y_true: True labels
         y_pred: Predicted labels
         output_dir: Directory to save plot
+        curve: Optional ThresholdCurve to read the counts from instead of
+            the labels
+        threshold: Threshold y_pred was predicted at (with curve)
 
     Returns:
         Path to saved plot
     """
     print("Generating confusion matrix...")
 
-    cm = confusion_matrix(y_true, y_pred)
-
-    plt.figure(figsize=(8, 6))
-    sns.heatmap(cm, annot=True, fmt='d', cmap='Blues',
-                xticklabels=['No Churn', 'Churn'],
-                yticklabels=['No Churn', 'Churn'])
-    plt.title('Confusion Matrix')
-    plt.ylabel('True Label')
-    plt.xlabel('Predicted Label')
+    if curve is not None:
+        tn, fp, fn, tp = curve.counts(threshold)
+    else:
+        tn, fp, fn, tp = confusion_counts(y_true, y_pred)
+    cm = np.array([[tn, fp], [fn, tp]])
 
-    output_path = f'{output_dir}/confusion_matrix.png'
-    plt.savefig(output_path, dpi=150, bbox_inches='tight')
-    plt.close()
+    output_path = render_confusion_matrix(cm, f'{output_dir}/confusion_matrix.png')
 
     print(f"Confusion matrix saved to {output_path}")
     return output_path
 
 
-def generate_roc_curve(y_true, y_pred_proba, output_dir):
+def generate_roc_curve(y_true, y_pred_proba, output_dir, curve=None):
     """
     Generate and save ROC curve.
 
@@ -95,31 +138,18 @@ def generate_roc_curve(y_true, y_pred_proba, output_dir):
         y_true: True labels
         y_pred_proba: Predicted probabilities
         output_dir: Directory to save plot
+        curve: Optional ThresholdCurve of the same predictions
 
     Returns:
         tuple: (Path to saved plot, AUC score)
     """
     print("Generating ROC curve...")
 
-    fpr, tpr, thresholds = roc_curve(y_true, y_pred_proba)
-    roc_auc = auc(fpr, tpr)
-
-    plt.figure(figsize=(8, 6))
-    plt.plot(fpr, tpr, color='darkorange', lw=2,
-             label=f'ROC curve (AUC = {roc_auc:.2f})')
-    plt.plot([0, 1], [0, 1], color='navy', lw=2, linestyle='--',
-             label='Random Classifier')
-    plt.xlim([0.0, 1.0])
-    plt.ylim([0.0, 1.05])
-    plt.xlabel('False Positive Rate')
-    plt.ylabel('True Positive Rate')
-    plt.title('Receiver Operating Characteristic (ROC) Curve')
-    plt.legend(loc="lower right")
-    plt.grid(alpha=0.3)
-
-    output_path = f'{output_dir}/roc_curve.png'
-    plt.savefig(output_path, dpi=150, bbox_inches='tight')
-    plt.close()
+    curve = curve or ThresholdCurve(y_true, y_pred_proba)
+    fpr, tpr, thresholds = curve.roc_curve()
+    roc_auc = curve.roc_auc()
+
+    output_path = render_roc_curve(fpr, tpr, roc_auc, f'{output_dir}/roc_curve.png')
 
     print(f"ROC curve saved to {output_path}")
     print(f"AUC Score: {roc_auc:.4f}")
@@ -127,7 +157,7 @@ def generate_roc_curve(y_true, y_pred_proba, output_dir):
     return output_path, roc_auc
 
 
-def generate_precision_recall_curve(y_true, y_pred_proba, output_dir):
+def generate_precision_recall_curve(y_true, y_pred_proba, output_dir, curve=None):
     """
     Generate and save precision-recall curve.
 
@@ -135,30 +165,25 @@ def generate_precision_recall_curve(y_true, y_pred_proba, output_dir):
         y_true: True labels
         y_pred_proba: Predicted probabilities
         output_dir: Directory to save plot
+        curve: Optional ThresholdCurve of the same predictions
 
     Returns:
         Path to saved plot
     """
     print("Generating precision-recall curve...")
 
-    precision, recall, thresholds = precision_recall_curve(y_true, y_pred_proba)
+    curve = curve or ThresholdCurve(y_true, y_pred_proba)
+    # Points inside vertical segments do not change the plot
+    precision, recall, thresholds = curve.precision_recall_curve(drop_intermediate=True)
 
-    plt.figure(figsize=(8, 6))
-    plt.plot(recall, precision, color='darkgreen', lw=2)
-    plt.xlabel('Recall')
-    plt.ylabel('Precision')
-    plt.title('Precision-Recall Curve')
-    plt.grid(alpha=0.3)
-
-    output_path = f'{output_dir}/precision_recall_curve.png'
-    plt.savefig(output_path, dpi=150, bbox_inches='tight')
-    plt.close()
+    output_path = render_precision_recall_curve(precision, recall,
+                                                f'{output_dir}/precision_recall_curve.png')
 
     print(f"Precision-recall curve saved to {output_path}")
     return output_path
 
 
-def generate_classification_report(y_true, y_pred, output_dir):
+def generate_classification_report(y_true, y_pred, output_dir, curve=None, threshold=0.5):
     """
     Generate and save detailed classification report.
 
@@ -166,22 +191,25 @@ def generate_classification_report(y_true, y_pred, output_dir):
         y_true: True labels
         y_pred: Predicted labels
         output_dir: Directory to save report
+        curve: Optional ThresholdCurve to read the counts from instead of
+            the labels
+        threshold: Threshold y_pred was predicted at (with curve)
 
     Returns:
         tuple: (Path to saved report, report dict)
     """
     print("Generating classification report...")
 
-    report = classification_report(y_true, y_pred,
-                                   target_names=['No Churn', 'Churn'],
-                                   output_dict=True)
+    if curve is None:
+        # Labels as scores: predicted positives are exactly those above 0.5
+        curve, threshold = ThresholdCurve(y_true, y_pred), 0.5
+    report = curve.classification_report(threshold, CLASS_NAMES)
 
     # Print report
     print("\n" + "=" * 60)
     print("CLASSIFICATION REPORT")
     print("=" * 60)
-    print(classification_report(y_true, y_pred,
-                               target_names=['No Churn', 'Churn']))
+    print(format_classification_report(report, CLASS_NAMES))
 
     # Save as JSON
     output_path = f'{output_dir}/classification_report.json'
@@ -192,27 +220,40 @@ def generate_classification_report(y_true, y_pred, output_dir):
     return output_path, report
 
 
-def calculate_business_metrics(y_true, y_pred, y_pred_proba):
+def calculate_business_metrics(y_true, y_pred, y_pred_proba, curve=None, threshold=0.5,
+                               contact_cost=DEFAULT_CONTACT_COST,
+                               churn_cost=DEFAULT_CHURN_COST):
     """
     Calculate business-relevant metrics.
 
+    Besides the outcome at the prediction threshold, this reports the
+    threshold that minimizes the retention cost (contact_cost per flagged
+    customer plus churn_cost per missed churner) and the cost at both.
+
     Args:
         y_true: True labels
         y_pred: Predicted labels
         y_pred_proba: Predicted probabilities
+        curve: Optional ThresholdCurve of the same predictions
+        threshold: Threshold y_pred was predicted at
+        contact_cost: Cost of contacting one flagged customer
+        churn_cost: Cost of one churner that was not flagged
 
     Returns:
         Dictionary of business metrics
     """
     print("Calculating business metrics...")
 
-    cm = confusion_matrix(y_true, y_pred)
-    tn, fp, fn, tp = cm.ravel()
+    if curve is None:
+        curve = ThresholdCurve(y_true, y_pred_proba)
+        tn, fp, fn, tp = confusion_counts(y_true, y_pred)
+    else:
+        tn, fp, fn, tp = curve.counts(threshold)
 
     # Calculate metrics
-    total_customers = len(y_true)
-    actual_churners = y_true.sum()
-    predicted_churners = y_pred.sum()
+    total_customers = tn + fp + fn + tp
+    actual_churners = tp + fn
+    predicted_churners = tp + fp
 
     # True positive rate (how many actual churners we caught)
     churn_detection_rate = tp / actual_churners if actual_churners > 0 else 0
@@ -232,8 +273,13 @@ def calculate_business_metrics(y_true, y_pred, y_pred_proba):
         'false_alarms': int(fp),
         'churn_detection_rate': float(churn_detection_rate),
         'false_alarm_rate': float(false_alarm_rate),
-        'precision': float(precision)
+        'precision': float(precision),
+        'threshold': float(threshold),
+        'cost': float(predicted_churners * contact_cost + fn * churn_cost),
     }
+    optimal_threshold, optimal_cost = curve.optimal_threshold(contact_cost, churn_cost)
+    metrics['optimal_threshold'] = optimal_threshold
+    metrics['optimal_cost'] = optimal_cost
 
     print("\nBusiness Metrics:")
     print(f"  Total Customers: {metrics['total_customers']}")
@@ -245,73 +291,175 @@ def calculate_business_metrics(y_true, y_pred, y_pred_proba):
     print(f"  Churn Detection Rate: {metrics['churn_detection_rate']:.2%}")
     print(f"  False Alarm Rate: {metrics['false_alarm_rate']:.2%}")
     print(f"  Precision: {metrics['precision']:.2%}")
+    print(f"  Cost at threshold {threshold:.2f}: {metrics['cost']:,.0f}")
+    print(f"  Cost-optimal threshold: {optimal_threshold:.4f} "
+          f"(cost {optimal_cost:,.0f})")
 
     return metrics
 
 
-def main():
-    """Main evaluation pipeline."""
-    args = parse_args()
+def generate_threshold_table(curve, output_dir, contact_cost=DEFAULT_CONTACT_COST,
+                             churn_cost=DEFAULT_CHURN_COST):
+    """
+    Generate and save the business outcome at a grid of thresholds.
 
-    print("=" * 60)
-    print("STARTING MODEL EVALUATION PIPELINE")
-    print("=" * 60)
+    Rows cover thresholds 0.05 to 0.95 plus the cost-optimal threshold,
+    all computed from the curve's cumulative counts.
 
-    # Create output directory
-    os.makedirs(args.output_dir, exist_ok=True)
+    Args:
+        curve: ThresholdCurve of the test predictions
+        output_dir: Directory to save the table
+        contact_cost: Cost of contacting one flagged customer
+        churn_cost: Cost of one churner that was not flagged
 
-    # Set MLflow tracking URI
-    mlflow_uri = os.getenv('MLFLOW_TRACKING_URI', 'http://mlflow:5000')
-    mlflow.set_tracking_uri(mlflow_uri)
+    Returns:
+        tuple: (Path to saved table, DataFrame)
+    """
+    import pandas as pd
 
-    # Load model and data
-    model, X_test, y_test = load_model_and_data(args.model_path, args.data_dir)
+    print("Generating threshold table...")
 
-    # Generate predictions
-    print("\nGenerating predictions...")
-    y_pred = model.predict(X_test)
-    y_pred_proba = model.predict_proba(X_test)[:, 1]
+    optimal_threshold, _ = curve.optimal_threshold(contact_cost, churn_cost)
+    thresholds = np.unique(np.r_[np.round(np.arange(0.05, 1.0, 0.05), 2), optimal_threshold])
+    table = pd.DataFrame(curve.threshold_table(contact_cost, churn_cost, thresholds))
+    table['optimal'] = table['threshold'] == optimal_threshold
 
-    # Start MLflow run for evaluation
-    with mlflow.start_run(run_name="evaluation"):
-        # Generate confusion matrix
-        cm_path = generate_confusion_matrix(y_test, y_pred, args.output_dir)
-        mlflow.log_artifact(cm_path)
+    output_path = f'{output_dir}/threshold_table.csv'
+    table.to_csv(output_path, index=False)
 
-        # Generate ROC curve
-        roc_path, roc_auc = generate_roc_curve(y_test, y_pred_proba, args.output_dir)
-        mlflow.log_artifact(roc_path)
-        mlflow.log_metric('roc_auc', roc_auc)
+    print(f"Threshold table saved to {output_path}")
+    return output_path, table
 
-        # Generate precision-recall curve
-        pr_path = generate_precision_recall_curve(y_test, y_pred_proba, args.output_dir)
-        mlflow.log_artifact(pr_path)
+
+def save_business_metrics(business_metrics, output_dir):
+    """
+    Save business metrics as JSON.
+
+    Returns:
+        str: Path to saved file
+    """
+    output_path = f'{output_dir}/business_metrics.json'
+    with open(output_path, 'w') as f:
+        json.dump(business_metrics, f, indent=2)
+    return output_path
+
+
+def run_evaluation(model, X_test, y_test, run, output_dir='metrics', threshold=0.5,
+                   contact_cost=DEFAULT_CONTACT_COST, churn_cost=DEFAULT_CHURN_COST,
+                   plots=True, plot_workers=DEFAULT_PLOT_WORKERS):
+    """
+    Evaluate an already loaded model and write and log every report.
+
+    Args:
+        model: Trained model
+        X_test, y_test: Test data
+        run: tracking.Run to log to
+        output_dir: Directory for the reports and plots
+        threshold: Churn probability above which a customer is predicted to churn
+        contact_cost: Cost of contacting one flagged customer
+        churn_cost: Cost of one churner that was not flagged
+        plots: Render the PNG figures (the curve data is always written)
+        plot_workers: Processes rendering the figures
+
+    Returns:
+        dict: Business metrics
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    with contextlib.ExitStack() as stack:
+        # Start the plot workers now so their imports overlap the predictions
+        if plots:
+            plot_pool = stack.enter_context(PlotPool(plot_workers))
+
+        # Generate predictions
+        print("\nGenerating predictions...")
+        with span('predict', rows=len(X_test)):
+            y_pred, y_pred_proba = predict_churn(model, X_test, threshold)
+
+        # Sort the scores once; every metric below reads from this curve
+        with span('threshold_curve', rows=len(X_test)):
+            curve = ThresholdCurve(y_test, y_pred_proba)
+
+        # Start rendering the figures in worker processes; the reports
+        # below are computed while they draw
+        with span('curve_data', rows=len(X_test)):
+            data = curve_data(curve, threshold)
+            run.log_artifact(write_curve_data(data, output_dir))
+        roc_auc = data['roc']['auc']
+        print(f"AUC Score: {roc_auc:.4f}")
+        run.log_metric('roc_auc', roc_auc)
+        if plots:
+            print("Rendering plots...")
+            plot_pool.submit(plot_jobs(data, output_dir))
 
         # Generate classification report
-        report_path, report_dict = generate_classification_report(
-            y_test, y_pred, args.output_dir
-        )
-        mlflow.log_artifact(report_path)
+        with span('classification_report', rows=len(X_test)):
+            report_path, report_dict = generate_classification_report(
+                y_test, y_pred, output_dir, curve, threshold
+            )
+        run.log_artifact(report_path)
 
         # Calculate business metrics
-        business_metrics = calculate_business_metrics(y_test, y_pred, y_pred_proba)
+        with span('business_metrics', rows=len(X_test)):
+            business_metrics = calculate_business_metrics(
+                y_test, y_pred, y_pred_proba, curve, threshold,
+                contact_cost, churn_cost
+            )
+            table_path, _ = generate_threshold_table(curve, output_dir,
+                                                     contact_cost, churn_cost)
+        run.log_artifact(table_path)
 
         # Save business metrics
-        business_metrics_path = f'{args.output_dir}/business_metrics.json'
-        with open(business_metrics_path, 'w') as f:
-            json.dump(business_metrics, f, indent=2)
-        mlflow.log_artifact(business_metrics_path)
+        run.log_artifact(save_business_metrics(business_metrics, output_dir))
+
+        # Collect the figures
+        if plots:
+            with span('plots'):
+                for plot_path in plot_pool.results().values():
+                    run.log_artifact(plot_path)
 
         # Log key metrics to MLflow
-        mlflow.log_metrics({
+        run.log_metrics({
             'churn_detection_rate': business_metrics['churn_detection_rate'],
-            'false_alarm_rate': business_metrics['false_alarm_rate']
+            'false_alarm_rate': business_metrics['false_alarm_rate'],
+            'optimal_threshold': business_metrics['optimal_threshold'],
+            'optimal_cost': business_metrics['optimal_cost']
         })
 
+    return business_metrics
+
+
+def main():
+    """Main evaluation pipeline."""
+    args = parse_args()
+
+    print("=" * 60)
+    print("STARTING MODEL EVALUATION PIPELINE")
+    print("=" * 60)
+
+    # Set MLflow tracking URI
+    mlflow_uri = os.getenv('MLFLOW_TRACKING_URI', 'http://mlflow:5000')
+    tracker = Tracker(tracking_uri=mlflow_uri, spool_dir=args.spool_dir,
+                      mode=args.tracking_mode)
+
+    # Start MLflow run for evaluation; the recording is inside it so its
+    # timings are logged to the run
+    with tracker, tracker.start_run(run_name="evaluation") as run, recording(
+            'evaluate', args.profile, args.trace_memory, args.prom_textfile_dir, run=run):
+        # Load model and data
+        with span('load') as load_span:
+            model, X_test, y_test = load_model_and_data(args.model_path, args.data_dir)
+            load_span.rows = len(X_test)
+
+        run_evaluation(model, X_test, y_test, run, args.output_dir, args.threshold,
+                       args.contact_cost, args.churn_cost, not args.no_plots,
+                       args.plot_workers)
+
     print("\n" + "=" * 60)
     print("EVALUATION PIPELINE COMPLETED SUCCESSFULLY")
     print("=" * 60)
-    print(f"\nView results at: {mlflow_uri}")
+    print(f"\nMLflow Run ID: {run.run_id or 'pending sync'}")
+    print(f"View results at: {mlflow_uri}")
     print(f"Evaluation artifacts saved to: {args.output_dir}")
 
 
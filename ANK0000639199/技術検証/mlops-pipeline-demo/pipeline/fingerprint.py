@@ -0,0 +1,204 @@
+"""
+Row Fingerprint Module
+
+This module computes a 64-bit hash per raw data row, so rows can be
+recognized across runs, files and chunks without keeping the rows
+themselves: duplicate removal in clean_data() and the seen-row sets of
+incremental training both work on these fingerprints.
+
+The hash covers a canonical form of the values: numbers are rounded to the
+schema's storage dtype where that is a float type (float32 for the charges)
+and hashed as float64, strings by their text whether pandas holds them as
+object, str or category columns. A row therefore hashes the same whether its
+columns were read as int64, float64 (a chunk containing a missing value),
+float32 or category, which matters when the same CSV is read whole or in
+chunks, or with the compact dtypes of preprocess.load_data().
+
+Not covered: a numeric column that some non-numeric value forces to object
+holds its numbers as text, and those rows only hash like rows read the same
+way.
+
+Among n distinct rows, some two share a 64-bit hash with probability
+about n**2 / 2**65 (3e-4 at 100 million rows); such a collision makes one
+of the rows count as a duplicate.
+"""
+
+import os
+import shutil
+import tempfile
+import numpy as np
+
+
+def row_hashes(df, columns=None, schema=None):
+    """
+    64-bit fingerprint of every row.
+
+    Args:
+        df: DataFrame of raw rows
+        columns: Columns to cover (default: all, in df order)
+        schema: Column specs; numbers are rounded to float 'storage' dtypes
+            (default: validation.CHURN_SCHEMA)
+
+    Returns:
+        ndarray: uint64 hash per row
+    """
+    import pandas as pd
+
+    if schema is None:
+        from validation import CHURN_SCHEMA as schema
+
+    frame = df[list(columns)] if columns is not None else df
+    canonical = {}
+    for col in frame.columns:
+        values = frame[col]
+        if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+            storage = schema.get(col, {}).get('storage')
+            if storage is None or np.dtype(storage).kind != 'f':
+                storage = np.float64
+            # 29.85 read as float64 and as float32 must hash alike
+            canonical[col] = values.to_numpy(dtype=storage, na_value=np.nan).astype(
+                np.float64, copy=False)
+        else:
+            # pandas hashes object, str and category columns by their text
+            canonical[col] = values
+    canonical = pd.DataFrame(canonical, copy=False)
+    return pd.util.hash_pandas_object(canonical, index=False).to_numpy(dtype=np.uint64)
+
+
+def csv_row_hashes(data_path, chunksize=100000, columns=None):
+    """
+    Fingerprints of all rows of a CSV, read in chunks.
+
+    Returns:
+        ndarray: uint64 hash per row, in file order
+    """
+    import pandas as pd
+
+    hashes = [row_hashes(chunk, columns)
+              for chunk in pd.read_csv(data_path, chunksize=chunksize)]
+    return np.concatenate(hashes) if hashes else np.empty(0, dtype=np.uint64)
+
+
+def seen_mask(hashes, seen):
+    """
+    Which hashes occur in a sorted array of known hashes.
+
+    Args:
+        hashes: uint64 hashes to look up
+        seen: Sorted, unique uint64 hashes (see merge_hashes)
+
+    Returns:
+        ndarray: Boolean mask over hashes
+    """
+    if not len(seen):
+        return np.zeros(len(hashes), dtype=bool)
+    positions = np.minimum(np.searchsorted(seen, hashes), len(seen) - 1)
+    return seen[positions] == hashes
+
+
+def merge_hashes(seen, hashes):
+    """Sorted, unique union of known hashes and new ones."""
+    return np.union1d(seen, np.asarray(hashes, dtype=np.uint64))
+
+
+def duplicate_mask(hashes):
+    """True for every hash that already occurred earlier in the array."""
+    import pandas as pd
+
+    return pd.Series(hashes, copy=False).duplicated().to_numpy()
+
+
+def _merge_runs(runs):
+    """Merge disjoint sorted runs (timsort merges the presorted pieces in linear time)."""
+    return np.sort(np.concatenate(runs), kind='stable')
+
+
+class RowDeduplicator:
+    """
+    Drop rows whose fingerprint was seen before, across any number of batches.
+
+    The fingerprints of kept rows are held as sorted runs. Small runs are
+    merged as they accumulate (like an LSM tree), so adding n rows costs
+    O(n log n) in total and a lookup binary-searches a few runs. Once the
+    runs in memory exceed max_bytes they are merged into one sorted .npy
+    file in spill_dir, which is memory-mapped for later lookups. Memory
+    use therefore stays around max_bytes however many rows pass through.
+
+    Args:
+        max_bytes: In-memory fingerprint budget before spilling to disk
+        spill_dir: Parent directory for spilled runs (default: the system
+            temporary directory); a private subdirectory is removed on close()
+    """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024, spill_dir=None):
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.rows = 0
+        self.duplicates = 0
+        self.spilled_runs = 0
+        self._runs = []
+        self._spilled = []
+        self._work_dir = None
+
+    def new_rows(self, df):
+        """
+        Mark the rows of df that were not seen before, and remember them.
+
+        Args:
+            df: DataFrame batch (same columns in every batch)
+
+        Returns:
+            ndarray: Boolean mask, True for the first occurrence of each row
+        """
+        return self.new_hashes(row_hashes(df))
+
+    def new_hashes(self, hashes):
+        """Like new_rows() for precomputed fingerprints."""
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        # Rows left after dropping repeats within the batch, in hash order:
+        # sorted keys make the binary searches below walk each run forward
+        candidates = np.flatnonzero(~duplicate_mask(hashes))
+        candidates = candidates[np.argsort(hashes[candidates])]
+        for run in self._runs + self._spilled:
+            candidates = candidates[~seen_mask(hashes[candidates], run)]
+        keep = np.zeros(len(hashes), dtype=bool)
+        keep[candidates] = True
+
+        self.rows += len(hashes)
+        self.duplicates += int(len(hashes) - len(candidates))
+        if len(candidates):
+            self._add(hashes[candidates])
+        return keep
+
+    def _add(self, run):
+        """Add a sorted run of new fingerprints, merging runs of similar size."""
+        self._runs.append(run)
+        while len(self._runs) > 1 and len(self._runs[-2]) <= 2 * len(self._runs[-1]):
+            newest = self._runs.pop()
+            self._runs[-1] = _merge_runs([self._runs[-1], newest])
+        if sum(run.nbytes for run in self._runs) > self.max_bytes:
+            self._spill()
+
+    def _spill(self):
+        """Write the in-memory runs to disk as one sorted run."""
+        if self._work_dir is None:
+            self._work_dir = tempfile.mkdtemp(prefix='dedup-', dir=self.spill_dir)
+        merged = _merge_runs(self._runs)
+        path = os.path.join(self._work_dir, f'run-{len(self._spilled):05d}.npy')
+        np.save(path, merged)
+        self._spilled.append(np.load(path, mmap_mode='r'))
+        self._runs = []
+        self.spilled_runs += 1
+
+    def close(self):
+        """Forget all fingerprints and delete spilled runs."""
+        self._runs, self._spilled = [], []
+        if self._work_dir is not None:
+            shutil.rmtree(self._work_dir, ignore_errors=True)
+            self._work_dir = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
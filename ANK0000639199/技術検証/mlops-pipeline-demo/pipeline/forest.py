@@ -0,0 +1,364 @@
+"""
+Flat Forest Module
+
+This module stores a fitted RandomForestClassifier as flat NumPy node arrays
+in a single .forest file, next to the joblib pickle. All trees are
+concatenated into one set of arrays:
+
+    feature     int32    split feature per node
+    threshold   float64  split threshold per node (go left if x <= threshold)
+    left/right  int32    child node indexes; a leaf stores -(row + 1) of its
+                         class distribution in left
+    value       float64  class probabilities, one row per leaf
+    roots       int32    root node of every tree
+
+Impurities, sample counts and the pickled estimator objects are dropped, so
+the file is a fraction of the pickle's size. The file is a JSON header
+followed by the raw arrays at aligned offsets; load() memory-maps it and
+returns views into the mapping, so loading reads no node data and needs
+neither scikit-learn nor joblib. predict_proba walks all trees for a batch
+at once and matches sklearn's probabilities.
+
+Usage:
+    python pipeline/forest.py models/churn_model.pkl
+    python pipeline/serve.py --model-path models/churn_model.forest
+"""
+
+import os
+import json
+import struct
+import argparse
+import numpy as np
+
+
+FOREST_SUFFIX = '.forest'
+MAGIC = b'CHFOREST'
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+DEFAULT_BATCH_SIZE = 8192
+
+
+def forest_path_for(model_path):
+    """The .forest path next to a joblib model (models/churn_model.pkl -> .forest)."""
+    return os.path.splitext(model_path)[0] + FOREST_SUFFIX
+
+
+def _flatten(model):
+    """
+    Concatenate the trees of a fitted forest into flat node arrays.
+
+    Returns:
+        dict: Array name to array
+    """
+    estimators = getattr(model, 'estimators_', None)
+    if not estimators or not all(hasattr(est, 'tree_') for est in estimators):
+        raise ValueError(f"{type(model).__name__} is not a fitted tree ensemble")
+    if getattr(model, 'n_outputs_', 1) != 1 or not hasattr(model, 'classes_'):
+        raise ValueError("Only single-output classifiers can be flattened")
+
+    features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+    node_offset = leaf_offset = 0
+    for est in estimators:
+        tree = est.tree_
+        left = tree.children_left.astype(np.int64)
+        right = tree.children_right.astype(np.int64)
+        is_leaf = left == -1
+
+        # Per-tree probabilities, normalized the way DecisionTreeClassifier does
+        value = tree.value[is_leaf, 0, :]
+        normalizer = value.sum(axis=1, keepdims=True)
+        normalizer[normalizer == 0.0] = 1.0
+        values.append(value / normalizer)
+
+        leaf_rows = leaf_offset + np.arange(is_leaf.sum())
+        left = np.where(is_leaf, 0, left + node_offset)
+        left[is_leaf] = -(leaf_rows + 1)
+        right = np.where(is_leaf, -1, right + node_offset)
+
+        features.append(np.where(is_leaf, 0, tree.feature))
+        thresholds.append(tree.threshold)
+        lefts.append(left)
+        rights.append(right)
+        roots.append(node_offset)
+        node_offset += tree.node_count
+        leaf_offset += len(leaf_rows)
+
+    if node_offset >= 2 ** 31:
+        raise ValueError(f"Forest has {node_offset} nodes; int32 indexes cannot address them")
+    return {
+        'feature': np.concatenate(features).astype(np.int32),
+        'threshold': np.concatenate(thresholds).astype(np.float64),
+        'left': np.concatenate(lefts).astype(np.int32),
+        'right': np.concatenate(rights).astype(np.int32),
+        'value': np.concatenate(values).astype(np.float64),
+        'roots': np.asarray(roots, dtype=np.int32),
+    }
+
+
+def _tree_depth(arrays, root):
+    """Depth of one tree (longest root-to-leaf path), iteratively."""
+    depth, level = 0, np.array([root])
+    left, right = arrays['left'], arrays['right']
+    while True:
+        level = level[left[level] >= 0]
+        if not len(level):
+            return depth
+        level = np.concatenate([left[level], right[level]])
+        depth += 1
+
+
+class FlatForest:
+    """
+    A random forest as flat node arrays (see the module docstring).
+
+    Provides predict_proba/predict like the sklearn model it came from, so
+    evaluation and serving can use either.
+
+    Args:
+        arrays: Dict with the feature, threshold, left, right, value and
+            roots arrays
+        classes: Class labels, in value column order
+        n_features: Number of input features
+        feature_names: Training column names, if the model was fitted on a
+            DataFrame
+        max_depth: Depth of the deepest tree (bounds the traversal)
+    """
+
+    def __init__(self, arrays, classes, n_features, feature_names=None, max_depth=None):
+        self.feature = arrays['feature']
+        self.threshold = arrays['threshold']
+        self.left = arrays['left']
+        self.right = arrays['right']
+        self.value = arrays['value']
+        self.roots = arrays['roots']
+        self.classes_ = np.asarray(classes)
+        self.n_features_in_ = n_features
+        if feature_names is not None:
+            self.feature_names_in_ = np.asarray(feature_names, dtype=object)
+        if max_depth is None:
+            max_depth = max(_tree_depth(arrays, root) for root in self.roots)
+        self.max_depth = max_depth
+
+    @classmethod
+    def from_model(cls, model):
+        """Flatten a fitted RandomForestClassifier (or another forest of trees)."""
+        arrays = _flatten(model)
+        feature_names = getattr(model, 'feature_names_in_', None)
+        return cls(arrays, model.classes_.tolist(), int(model.n_features_in_),
+                   None if feature_names is None else list(feature_names))
+
+    @property
+    def n_estimators(self):
+        return len(self.roots)
+
+    @property
+    def node_count(self):
+        return len(self.feature)
+
+    def _arrays(self):
+        return {'feature': self.feature, 'threshold': self.threshold, 'left': self.left,
+                'right': self.right, 'value': self.value, 'roots': self.roots}
+
+    def save(self, path):
+        """
+        Write the forest as a JSON header plus aligned raw arrays.
+
+        Returns:
+            str: path
+        """
+        arrays = self._arrays()
+        header = {
+            'version': FORMAT_VERSION,
+            'classes': self.classes_.tolist(),
+            'n_features': self.n_features_in_,
+            'feature_names': (self.feature_names_in_.tolist()
+                              if hasattr(self, 'feature_names_in_') else None),
+            'max_depth': self.max_depth,
+            'arrays': {},
+        }
+        # Offsets depend on the header length, which depends on the offsets;
+        # reserve room by measuring with placeholder offsets first
+        for name, array in arrays.items():
+            header['arrays'][name] = {'dtype': array.dtype.str, 'shape': list(array.shape),
+                                      'offset': 2 ** 40}
+        start = len(MAGIC) + 8 + len(json.dumps(header).encode())
+        offset = -(-start // ALIGNMENT) * ALIGNMENT
+        for name, array in arrays.items():
+            header['arrays'][name]['offset'] = offset
+            offset += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+        header_bytes = json.dumps(header).encode()
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(MAGIC + struct.pack('<Q', len(header_bytes)) + header_bytes)
+            for name, array in arrays.items():
+                f.seek(header['arrays'][name]['offset'])
+                f.write(np.ascontiguousarray(array).tobytes())
+            f.truncate(offset)
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """
+        Load a .forest file.
+
+        Args:
+            path: File written by save()
+            mmap: Map the file and return views into it (zero copy; pages
+                are read on first use); False reads it into memory
+
+        Returns:
+            FlatForest
+        """
+        with open(path, 'rb') as f:
+            magic = f.read(len(MAGIC))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a .forest file")
+            header_length, = struct.unpack('<Q', f.read(8))
+            header = json.loads(f.read(header_length))
+        if header['version'] != FORMAT_VERSION:
+            raise ValueError(f"{path}: unsupported .forest version {header['version']}")
+
+        if mmap:
+            # A plain ndarray view of the mapping: memmap subclass overhead on
+            # every indexing result would slow down predict
+            raw = np.memmap(path, dtype=np.uint8, mode='r').view(np.ndarray)
+        else:
+            raw = np.fromfile(path, dtype=np.uint8)
+        arrays = {}
+        for name, spec in header['arrays'].items():
+            dtype = np.dtype(spec['dtype'])
+            count = int(np.prod(spec['shape']))
+            start = spec['offset']
+            arrays[name] = (raw[start:start + count * dtype.itemsize]
+                            .view(dtype).reshape(spec['shape']))
+        return cls(arrays, header['classes'], header['n_features'],
+                   header['feature_names'], header['max_depth'])
+
+    def _as_array(self, X):
+        """Features as C-contiguous float32, the dtype sklearn's trees compare in."""
+        if hasattr(X, 'columns') and hasattr(self, 'feature_names_in_'):
+            X = X[list(self.feature_names_in_)]
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Expected {self.n_features_in_} features, got shape {X.shape}")
+        if np.isnan(X).any():
+            raise ValueError("Input contains NaN")
+        return X
+
+    def _predict_batch(self, X):
+        """Average leaf probabilities over all trees for one batch."""
+        n_samples, n_trees = len(X), len(self.roots)
+        # One traversal state per (tree, sample) pair; tree-major keeps the
+        # lookups of one step within one tree's nodes
+        nodes = np.repeat(self.roots, n_samples)
+        offsets = np.tile(np.arange(n_samples, dtype=np.int64) * X.shape[1], n_trees)
+        X = X.ravel()
+        active = np.flatnonzero(self.left[nodes] >= 0)
+        for _ in range(self.max_depth):
+            if not active.size:
+                break
+            idx = nodes[active]
+            go_left = X[offsets[active] + self.feature[idx]] <= self.threshold[idx]
+            step = np.where(go_left, self.left[idx], self.right[idx])
+            nodes[active] = step
+            active = active[self.left[step] >= 0]
+
+        leaves = (-1 - self.left[nodes]).reshape(n_trees, n_samples)
+        # Sum tree by tree like RandomForestClassifier, then divide once
+        proba = np.zeros((n_samples, self.value.shape[1]))
+        for tree in range(n_trees):
+            proba += self.value[leaves[tree]]
+        proba /= n_trees
+        return proba
+
+    def predict_proba(self, X, batch_size=DEFAULT_BATCH_SIZE):
+        """
+        Class probabilities, averaged over the trees.
+
+        Args:
+            X: Feature matrix or DataFrame with the training columns
+            batch_size: Rows traversed together (bounds temporary memory)
+
+        Returns:
+            ndarray: (n_samples, n_classes)
+        """
+        X = self._as_array(X)
+        proba = np.empty((len(X), self.value.shape[1]))
+        for start in range(0, len(X), batch_size):
+            proba[start:start + batch_size] = self._predict_batch(X[start:start + batch_size])
+        return proba
+
+    def predict(self, X):
+        """Class labels with the highest averaged probability."""
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def save_flat_forest(model, path):
+    """
+    Flatten a fitted forest and save it.
+
+    Returns:
+        str: path
+    """
+    path = FlatForest.from_model(model).save(path)
+    print(f"Flat forest saved to {path}")
+    return path
+
+
+def load_model(model_path, mmap=True):
+    """
+    Load a model from a .forest file or a joblib pickle.
+
+    Args:
+        model_path: Path to a .forest file or a joblib pickle
+        mmap: Memory-map .forest files
+
+    Returns:
+        FlatForest or the unpickled model
+    """
+    if model_path.endswith(FOREST_SUFFIX):
+        return FlatForest.load(model_path, mmap=mmap)
+    import joblib
+
+    return joblib.load(model_path)
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Export a joblib forest as a .forest file')
+    parser.add_argument('model_path', type=str, nargs='?', default='models/churn_model.pkl',
+                       help='joblib model to export')
+    parser.add_argument('--output', type=str, default=None,
+                       help='Output path (defaults to the model path with .forest)')
+    parser.add_argument('--data-dir', type=str, default='data/processed',
+                       help='Processed data whose test set is used to check the export')
+    return parser.parse_args()
+
+
+def main():
+    """Export a model and check that it predicts like the original."""
+    import joblib
+
+    args = parse_args()
+    model = joblib.load(args.model_path)
+    output = save_flat_forest(model, args.output or forest_path_for(args.model_path))
+    forest = FlatForest.load(output)
+    print(f"{forest.n_estimators} trees, {forest.node_count} nodes, depth {forest.max_depth}: "
+          f"{os.path.getsize(args.model_path) / 1024 ** 2:.2f} MB pickle -> "
+          f"{os.path.getsize(output) / 1024 ** 2:.2f} MB")
+
+    from storage import dataset_exists, load_dataset
+
+    if dataset_exists(args.data_dir):
+        X_test = load_dataset(args.data_dir, names=['X_test'])['X_test']
+        difference = np.abs(forest.predict_proba(X_test) - model.predict_proba(X_test)).max()
+        print(f"Max probability difference on {len(X_test)} test rows: {difference:.3g}")
+        if difference > 1e-9:
+            raise ValueError(f"Exported forest disagrees with {args.model_path}")
+
+
+if __name__ == '__main__':
+    main()
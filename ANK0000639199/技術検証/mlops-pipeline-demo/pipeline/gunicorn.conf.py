@@ -0,0 +1,42 @@
+"""
+Gunicorn configuration for the churn model server (production serving)
+
+    gunicorn -c pipeline/gunicorn.conf.py 'serve:app_from_env()'
+    WEB_CONCURRENCY=4 GUNICORN_THREADS=16 MODEL_PATH=models/churn_model.forest \
+        gunicorn -c pipeline/gunicorn.conf.py 'serve:app_from_env()'
+
+Every worker process loads the model and runs its own micro-batcher; the
+threads of a worker feed that batcher, so keep several per worker. A
+.forest model is memory-mapped, so its pages are shared between workers.
+Prometheus multiprocess mode makes /metrics report all workers.
+"""
+
+import multiprocessing
+import os
+import shutil
+
+# serve.py imports its sibling modules
+pythonpath = os.path.dirname(os.path.abspath(__file__))
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8080')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+threads = int(os.environ.get('GUNICORN_THREADS', '8'))
+worker_class = 'gthread'
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '30'))
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG')
+
+# Must be set before the workers import prometheus_client
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/churn-serving-metrics')
+
+
+def on_starting(server):
+    """Start from an empty metrics directory; old files would be summed in"""
+    path = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+
+def child_exit(server, worker):
+    """Drop the live gauges of a worker that exited"""
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,370 @@
+"""
+Instrumentation Module
+
+This module provides lightweight span timing for the pipeline stages. Code
+wraps its steps in span('clean', rows=n); while a recording is active each
+span captures wall and CPU time, row counts and peak memory, and optionally
+cProfile and tracemalloc data. The results are printed, logged as MLflow
+metrics and written as a Prometheus textfile for node_exporter.
+
+Without an active recording, span() only yields a throwaway Span, so library
+functions can be instrumented unconditionally. Spans opened in worker threads
+nest below the stage span; tracemalloc peaks are process-wide, so they are
+only indicative while spans overlap.
+"""
+
+import os
+import re
+import sys
+import time
+import threading
+import cProfile
+import pstats
+import tracemalloc
+import contextlib
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+DEFAULT_TEXTFILE_DIR = os.environ.get('PROM_TEXTFILE_DIR', 'metrics')
+
+# Recording that span() reports to, set by recording()
+_ACTIVE = None
+
+
+def add_instrumentation_args(parser):
+    """Add the shared instrumentation flags to a script's argument parser."""
+    parser.add_argument('--profile', action='store_true',
+                       help='Capture a cProfile profile of the whole stage')
+    parser.add_argument('--trace-memory', action='store_true',
+                       help='Track Python/NumPy allocations per span with tracemalloc '
+                            '(slows the stage down)')
+    parser.add_argument('--prom-textfile-dir', type=str, default=DEFAULT_TEXTFILE_DIR,
+                       help='Directory for the Prometheus textfile and profiles')
+    return parser
+
+
+def _peak_rss_bytes():
+    """High-water resident set size of this process."""
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class Span:
+    """
+    Measurements of one instrumented step.
+
+    Attributes:
+        name: Dotted path of the span, e.g. 'train.load.preprocess'
+        rows: Rows processed (may be set inside the with-block)
+        seconds: Wall time
+        cpu_seconds: Process CPU time
+        peak_rss_bytes: Process RSS high-water mark when the span ended
+        traced_peak_bytes: Peak traced allocations during the span
+            (only with tracemalloc)
+    """
+
+    def __init__(self, name, rows=None):
+        self.name = name
+        self.rows = rows
+        self.seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.peak_rss_bytes = 0
+        self.traced_peak_bytes = None
+        self.order = 0
+
+    @property
+    def rows_per_second(self):
+        """Throughput, or None without a row count."""
+        if not self.rows or not self.seconds:
+            return None
+        return self.rows / self.seconds
+
+    def to_dict(self):
+        """JSON-serializable view of the span."""
+        return {'name': self.name, 'rows': self.rows, 'seconds': self.seconds,
+                'cpu_seconds': self.cpu_seconds, 'rows_per_second': self.rows_per_second,
+                'peak_rss_bytes': self.peak_rss_bytes,
+                'traced_peak_bytes': self.traced_peak_bytes}
+
+
+class Recording:
+    """
+    Collects the spans of one pipeline stage run.
+
+    Args:
+        stage: Stage name ('preprocess', 'train' or 'evaluate'); the root
+            span of every nested span
+        profile: Run cProfile for the whole recording
+        trace_memory: Run tracemalloc and report per-span peaks
+    """
+
+    def __init__(self, stage, profile=False, trace_memory=False):
+        self.stage = stage
+        self.profile = profile
+        self.trace_memory = trace_memory
+        self.spans = []
+        self.profiler = None
+        self._root = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._started = 0
+
+    @property
+    def _stack(self):
+        """Open spans of the calling thread."""
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    def _new_span(self, name, rows=None):
+        """Create a span below the calling thread's innermost open span."""
+        stack = self._stack
+        # Threads without open spans of their own nest below the stage span
+        parent = stack[-1] if stack else self._root
+        record = Span(f'{parent.name}.{name}' if parent else name, rows)
+        with self._lock:
+            # Spans are appended when they end; keep the start order for printing
+            record.order = self._started
+            self._started += 1
+            if self._root is None:
+                self._root = record
+        return record, parent
+
+    def add_span(self, name, seconds, cpu_seconds=0.0, rows=None):
+        """
+        Add a step measured elsewhere (e.g. in a worker process).
+
+        Returns:
+            Span
+        """
+        record, _ = self._new_span(name, rows)
+        record.seconds = seconds
+        record.cpu_seconds = cpu_seconds
+        record.peak_rss_bytes = _peak_rss_bytes()
+        self.spans.append(record)
+        return record
+
+    @contextlib.contextmanager
+    def span(self, name, rows=None):
+        """Time a step; nested spans get dotted names below their parent."""
+        record, parent = self._new_span(name, rows)
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        if tracing:
+            # Fold the parent's peak so far before resetting for this span
+            if parent is not None:
+                parent.traced_peak_bytes = max(parent.traced_peak_bytes or 0,
+                                               tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+
+        stack = self._stack
+        stack.append(record)
+        start_time = time.perf_counter()
+        start_cpu = time.process_time()
+        try:
+            yield record
+        finally:
+            record.seconds = time.perf_counter() - start_time
+            record.cpu_seconds = time.process_time() - start_cpu
+            record.peak_rss_bytes = _peak_rss_bytes()
+            if tracing:
+                record.traced_peak_bytes = max(record.traced_peak_bytes or 0,
+                                               tracemalloc.get_traced_memory()[1])
+                if parent is not None:
+                    parent.traced_peak_bytes = max(parent.traced_peak_bytes or 0,
+                                                   record.traced_peak_bytes)
+            stack.pop()
+            self.spans.append(record)
+
+    def start(self):
+        """Start the optional profilers."""
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if self.profile:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+
+    def stop(self):
+        """Stop the optional profilers."""
+        if self.profiler is not None:
+            self.profiler.disable()
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def metrics(self):
+        """
+        Flatten the spans into MLflow metric names and values.
+
+        Returns:
+            dict: e.g. {'span.train.fit.seconds': 1.2, 'span.train.fit.rows': 8000, ...}
+        """
+        metrics = {}
+        for record in self.spans:
+            # MLflow rejects characters such as the brackets of DAG node names
+            prefix = 'span.' + re.sub(r'[^\w\-. :/]', '_', record.name)
+            metrics[f'{prefix}.seconds'] = record.seconds
+            metrics[f'{prefix}.cpu_seconds'] = record.cpu_seconds
+            metrics[f'{prefix}.peak_rss_mb'] = record.peak_rss_bytes / (1024 * 1024)
+            if record.rows is not None:
+                metrics[f'{prefix}.rows'] = record.rows
+            if record.rows_per_second is not None:
+                metrics[f'{prefix}.rows_per_second'] = record.rows_per_second
+            if record.traced_peak_bytes is not None:
+                metrics[f'{prefix}.traced_peak_mb'] = record.traced_peak_bytes / (1024 * 1024)
+        return metrics
+
+    def print_summary(self):
+        """Print the span timings as a table, in start order."""
+        width = max([36] + [len(record.name) + 2 for record in self.spans])
+        print("\n" + "=" * (width + 36))
+        print(f"TIMINGS ({self.stage})")
+        print("=" * (width + 36))
+        print(f"{'Span':<{width}}{'Seconds':>10}{'Rows':>12}{'Peak RSS (MB)':>14}")
+        for record in sorted(self.spans, key=lambda r: r.order):
+            rows = f'{record.rows:,}' if record.rows is not None else ''
+            print(f"{record.name:<{width}}{record.seconds:>10.3f}{rows:>12}"
+                  f"{record.peak_rss_bytes / (1024 * 1024):>14.0f}")
+
+    def write_prometheus_textfile(self, textfile_dir=DEFAULT_TEXTFILE_DIR):
+        """
+        Write the spans as a Prometheus textfile (node_exporter collector).
+
+        Each stage writes its own churn_pipeline_<stage>.prom, atomically,
+        so a scrape never sees a partial file.
+
+        Returns:
+            str: Path of the written file
+        """
+        # Only needed when a stage finishes; keeps imports of this module cheap
+        from prometheus_client import CollectorRegistry, Gauge, write_to_textfile
+
+        registry = CollectorRegistry()
+        labels = ['stage', 'span']
+        duration = Gauge('churn_pipeline_span_duration_seconds',
+                         'Wall time of a pipeline step', labels, registry=registry)
+        cpu = Gauge('churn_pipeline_span_cpu_seconds',
+                    'Process CPU time of a pipeline step', labels, registry=registry)
+        rows = Gauge('churn_pipeline_span_rows',
+                     'Rows processed by a pipeline step', labels, registry=registry)
+        peak_rss = Gauge('churn_pipeline_span_peak_rss_bytes',
+                         'Process RSS high-water mark at the end of a pipeline step',
+                         labels, registry=registry)
+        traced = Gauge('churn_pipeline_span_traced_peak_bytes',
+                       'Peak traced allocations during a pipeline step',
+                       labels, registry=registry)
+        last_run = Gauge('churn_pipeline_last_run_timestamp_seconds',
+                         'Completion time of the last instrumented stage run',
+                         ['stage'], registry=registry)
+
+        for record in self.spans:
+            duration.labels(self.stage, record.name).set(record.seconds)
+            cpu.labels(self.stage, record.name).set(record.cpu_seconds)
+            peak_rss.labels(self.stage, record.name).set(record.peak_rss_bytes)
+            if record.rows is not None:
+                rows.labels(self.stage, record.name).set(record.rows)
+            if record.traced_peak_bytes is not None:
+                traced.labels(self.stage, record.name).set(record.traced_peak_bytes)
+        last_run.labels(self.stage).set(time.time())
+
+        os.makedirs(textfile_dir, exist_ok=True)
+        path = os.path.join(textfile_dir, f'churn_pipeline_{self.stage}.prom')
+        write_to_textfile(path, registry)
+        return path
+
+    def save_profiles(self, output_dir=DEFAULT_TEXTFILE_DIR, top=25):
+        """
+        Save the cProfile stats and the per-span tracemalloc peaks.
+
+        Returns:
+            list: Paths of the written files
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        paths = []
+        if self.profiler is not None:
+            path = os.path.join(output_dir, f'{self.stage}.prof')
+            self.profiler.dump_stats(path)
+            paths.append(path)
+            print(f"\nTop {top} functions by cumulative time ({path}):")
+            pstats.Stats(self.profiler).sort_stats('cumulative').print_stats(top)
+        if self.trace_memory:
+            path = os.path.join(output_dir, f'{self.stage}_memory.txt')
+            with open(path, 'w') as f:
+                for record in sorted(self.spans, key=lambda r: r.order):
+                    if record.traced_peak_bytes is not None:
+                        f.write(f'{record.name}\t'
+                                f'{record.traced_peak_bytes / (1024 * 1024):.1f} MB\n')
+            paths.append(path)
+        return paths
+
+
+def _log_mlflow(recording, run, artifact_paths):
+    """Log span metrics and profile files to an MLflow run."""
+    run.log_metrics(recording.metrics())
+    for path in artifact_paths:
+        run.log_artifact(path)
+
+
+@contextlib.contextmanager
+def recording(stage, profile=False, trace_memory=False, textfile_dir=DEFAULT_TEXTFILE_DIR,
+              run=None):
+    """
+    Record the spans of one stage run and report them when it ends.
+
+    The stage itself is the root span. On exit, also when the stage fails,
+    the timings are printed, written to the Prometheus textfile, saved with
+    any profiles, and logged to the given MLflow run (enter the run before
+    this context so it is still open on exit).
+
+    Args:
+        stage: Stage name
+        profile: Capture a cProfile profile
+        trace_memory: Track allocations per span with tracemalloc
+        textfile_dir: Directory for the .prom textfile and profiles
+        run: tracking.Run to log metrics and profiles to (None: no MLflow logging)
+
+    Yields:
+        Recording
+    """
+    global _ACTIVE
+    previous = _ACTIVE
+    current = Recording(stage, profile, trace_memory)
+    _ACTIVE = current
+    current.start()
+    try:
+        with current.span(stage):
+            yield current
+    finally:
+        # Report failed runs too; their timings show where the time went
+        current.stop()
+        _ACTIVE = previous
+        current.print_summary()
+        artifact_paths = current.save_profiles(textfile_dir)
+        print(f"Prometheus metrics written to {current.write_prometheus_textfile(textfile_dir)}")
+        if run is not None:
+            _log_mlflow(current, run, artifact_paths)
+
+
+def span(name, rows=None):
+    """
+    Time a step in the active recording.
+
+    Usage:
+        with span('clean') as s:
+            df = clean_data(df)
+            s.rows = len(df)
+    """
+    if _ACTIVE is None:
+        return contextlib.nullcontext(Span(name, rows))
+    return _ACTIVE.span(name, rows)
+
+
+def add_span(name, seconds, cpu_seconds=0.0, rows=None):
+    """Add a step measured elsewhere to the active recording, if any."""
+    if _ACTIVE is not None:
+        _ACTIVE.add_span(name, seconds, cpu_seconds, rows)
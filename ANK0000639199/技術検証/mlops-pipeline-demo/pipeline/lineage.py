@@ -0,0 +1,165 @@
+"""
+Model Lineage Module
+
+This module keeps the training lineage of a model next to the model file:
+
+    churn_model.lineage.json   how the model was built: full or incremental,
+                               the tracking run, the parent model, row counts
+                               and the history of earlier versions
+    churn_model.seen.npy       sorted fingerprints of every raw row the model
+                               has seen (see fingerprint.py)
+    churn_model.transform.npz  the ChurnTransform the model was trained with,
+                               frozen so later trees see the same encoding
+
+Incremental training (train.py --incremental) uses these files to pick out
+the rows that are new since the last training and to encode them exactly
+like the rows the existing trees were fitted on.
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import numpy as np
+
+
+LINEAGE_SUFFIX = '.lineage.json'
+SEEN_SUFFIX = '.seen.npy'
+TRANSFORM_SUFFIX = '.transform.npz'
+# Earlier versions kept in the lineage file; MLflow holds the full chain
+MAX_HISTORY = 50
+
+
+def lineage_paths(model_path):
+    """
+    Paths of the lineage files of a model.
+
+    Returns:
+        dict: 'lineage', 'seen' and 'transform' paths
+    """
+    base = os.path.splitext(model_path)[0]
+    return {'lineage': base + LINEAGE_SUFFIX, 'seen': base + SEEN_SUFFIX,
+            'transform': base + TRANSFORM_SUFFIX}
+
+
+def file_sha256(path, block_size=1024 * 1024):
+    """SHA-256 of a file's content (identifies a model version)."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_lineage(model_path):
+    """
+    Read a model's lineage.
+
+    Returns:
+        dict: Lineage entry, or None if the model has no lineage files
+    """
+    paths = lineage_paths(model_path)
+    if not all(os.path.exists(path) for path in paths.values()):
+        return None
+    with open(paths['lineage']) as f:
+        return json.load(f)
+
+
+def remove_lineage(model_path):
+    """Delete the lineage files of a model (e.g. when it was replaced)."""
+    for path in lineage_paths(model_path).values():
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def check_lineage(model_path, entry):
+    """
+    Make sure a lineage entry describes the model file next to it.
+
+    Raises:
+        ValueError: If the model file was replaced after the lineage was written
+    """
+    sha256 = file_sha256(model_path)
+    if entry.get('model_sha256') != sha256:
+        raise ValueError(f"Lineage of {model_path} belongs to another model "
+                         f"(recorded sha256 {str(entry.get('model_sha256'))[:12]}, "
+                         f"file {sha256[:12]}); train a full model first")
+
+
+def load_seen(model_path):
+    """Sorted fingerprints of the rows a model has seen."""
+    return np.load(lineage_paths(model_path)['seen'])
+
+
+def write_lineage(model_path, entry, seen, transform_path=None):
+    """
+    Record a newly saved model version.
+
+    The previous entry (without its own history) is appended to the
+    history of the new one.
+
+    Args:
+        model_path: Path of the saved model
+        entry: Lineage fields of this version
+        seen: Sorted, unique fingerprints of all rows seen so far
+        transform_path: ChurnTransform to freeze with the model (None keeps
+            the current frozen transform)
+
+    Returns:
+        dict: The written entry
+    """
+    paths = lineage_paths(model_path)
+    previous = read_lineage(model_path) if os.path.exists(paths['lineage']) else None
+    history = []
+    if previous is not None:
+        history = previous.pop('history', []) + [previous]
+
+    entry = dict(entry, model_sha256=file_sha256(model_path), created=time.time(),
+                 rows_seen=int(len(seen)), history=history[-MAX_HISTORY:])
+    if transform_path is not None and (
+            os.path.abspath(transform_path) != os.path.abspath(paths['transform'])):
+        shutil.copyfile(transform_path, paths['transform'])
+    np.save(paths['seen'], np.asarray(seen, dtype=np.uint64))
+    tmp_path = f"{paths['lineage']}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(entry, f, indent=2)
+    os.replace(tmp_path, paths['lineage'])
+    return entry
+
+
+def set_lineage_run_id(model_path, run_key, run_id):
+    """
+    Fill in the MLflow run id once the run exists on the server.
+
+    Only updates the lineage if it still belongs to the run with run_key.
+    """
+    entry = read_lineage(model_path)
+    if entry is None or entry.get('run_key') != run_key or not run_id:
+        return
+    entry['run_id'] = run_id
+    path = lineage_paths(model_path)['lineage']
+    with open(path, 'w') as f:
+        json.dump(entry, f, indent=2)
+
+
+def parent_summary(entry):
+    """The fields of a lineage entry that identify it as a parent."""
+    if entry is None:
+        return None
+    return {key: entry.get(key) for key in ('run_key', 'run_id', 'model_sha256', 'mode',
+                                            'n_estimators')}
+
+
+def lineage_tags(entry):
+    """MLflow tags linking a run to its model version and parent."""
+    parent = entry.get('parent') or {}
+    tags = {
+        'lineage.mode': entry['mode'],
+        'lineage.run_key': entry['run_key'],
+        'lineage.model_sha256': entry['model_sha256'],
+        'lineage.parent_run_key': parent.get('run_key'),
+        'lineage.parent_run_id': parent.get('run_id'),
+        'lineage.parent_model_sha256': parent.get('model_sha256'),
+    }
+    return {key: value for key, value in tags.items() if value}
@@ -0,0 +1,123 @@
+"""
+Out-of-Core Training Module
+
+This module trains on processed data that does not fit in memory. The
+features must be stored as .npy files (preprocess.py --format npy, with
+--chunksize to stream the raw CSV as well); they are memory-mapped, and
+the model only ever sees one block of rows at a time:
+
+    for each epoch:
+        for each block of --block-rows rows (in shuffled block order):
+            shuffle the rows of the block
+            model.partial_fit(block)
+
+The learner is a logistic regression fitted by stochastic gradient descent
+(SGDClassifier), which supports partial_fit. Memory use is bounded by the
+block size instead of the dataset size, and predictions for the metrics
+are computed block by block as well.
+"""
+
+import time
+import numpy as np
+from instrumentation import span
+
+
+DEFAULT_BLOCK_ROWS = 65536
+DEFAULT_EPOCHS = 5
+DEFAULT_ALPHA = 1e-4
+
+
+def add_out_of_core_args(parser):
+    """Add the out-of-core training flags to an argument parser."""
+    parser.add_argument('--out-of-core', action='store_true',
+                       help='Train an SGD logistic regression on memory-mapped .npy '
+                            'data block by block instead of a random forest in memory')
+    parser.add_argument('--block-rows', type=int, default=DEFAULT_BLOCK_ROWS,
+                       help='Rows per training/prediction block with --out-of-core')
+    parser.add_argument('--epochs', type=int, default=DEFAULT_EPOCHS,
+                       help='Passes over the training data with --out-of-core')
+    parser.add_argument('--alpha', type=float, default=DEFAULT_ALPHA,
+                       help='L2 regularization strength with --out-of-core')
+
+
+def out_of_core_hyperparameters(args):
+    """Build the out-of-core hyperparameters from parsed command line arguments."""
+    if args.block_rows < 1 or args.epochs < 1:
+        raise ValueError("--block-rows and --epochs must be at least 1")
+    return {
+        'learner': 'sgd_log_loss',
+        'alpha': args.alpha,
+        'epochs': args.epochs,
+        'block_rows': args.block_rows,
+        'random_state': args.random_state,
+    }
+
+
+def check_memory_mapped(data_dir):
+    """
+    Make sure the processed data can be memory-mapped.
+
+    Raises:
+        ValueError: If the processed data is not stored as .npy
+    """
+    from storage import read_manifest
+
+    data_format = read_manifest(data_dir)['format']
+    if data_format != 'npy':
+        raise ValueError(f"Out-of-core training needs .npy processed data, {data_dir} is "
+                         f"{data_format}; run preprocess.py --format npy --chunksize N")
+
+
+def iter_blocks(n_rows, block_rows):
+    """Yield (start, stop) row ranges of at most block_rows rows."""
+    for start in range(0, n_rows, block_rows):
+        yield start, min(start + block_rows, n_rows)
+
+
+def train_model_out_of_core(X_train, y_train, hyperparameters):
+    """
+    Fit an SGD logistic regression one block of rows at a time.
+
+    Args:
+        X_train: Training features (a DataFrame over a memory map)
+        y_train: Training labels
+        hyperparameters: Dictionary from out_of_core_hyperparameters()
+
+    Returns:
+        tuple: (trained model, training time in seconds)
+    """
+    from sklearn.linear_model import SGDClassifier
+
+    print("Training SGD logistic regression out of core...")
+    print(f"Hyperparameters: {hyperparameters}")
+
+    start_time = time.time()
+    rng = np.random.default_rng(hyperparameters['random_state'])
+    model = SGDClassifier(loss='log_loss', alpha=hyperparameters['alpha'],
+                          random_state=hyperparameters['random_state'])
+    classes = np.array([0, 1])
+    blocks = list(iter_blocks(len(X_train), hyperparameters['block_rows']))
+
+    with span('fit', rows=len(X_train) * hyperparameters['epochs']):
+        for epoch in range(hyperparameters['epochs']):
+            for block in rng.permutation(len(blocks)):
+                start, stop = blocks[block]
+                order = rng.permutation(stop - start)
+                # Only this block is read from the memory map and copied
+                X_block = X_train.iloc[start:stop].iloc[order]
+                y_block = np.asarray(y_train[start:stop])[order]
+                model.partial_fit(X_block, y_block, classes=classes)
+            print(f"  Epoch {epoch + 1}/{hyperparameters['epochs']} done")
+
+    training_time = time.time() - start_time
+    print(f"Training completed in {training_time:.2f} seconds")
+
+    return model, training_time
+
+
+def predict_in_blocks(model, X, block_rows=DEFAULT_BLOCK_ROWS):
+    """Predict labels one block of rows at a time."""
+    if not len(X):
+        return np.empty(0, dtype=np.int64)
+    return np.concatenate([model.predict(X.iloc[start:stop])
+                           for start, stop in iter_blocks(len(X), block_rows)])
@@ -0,0 +1,255 @@
+"""
+Evaluation Plots Module
+
+This module renders the evaluation figures from plain curve data. The
+renderers import matplotlib and seaborn lazily, so runs that skip the
+plots never pay for them, and they take only arrays, so PlotPool can render
+all figures concurrently in worker processes while the main process keeps
+scoring.
+
+The same curve data is written to curves.json for dashboards that draw
+their own charts.
+"""
+
+import os
+import json
+import multiprocessing
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+from scoring import CLASS_NAMES
+
+
+PLOT_DPI = 150
+# One worker per figure; on a single core, rendering in-process avoids the pool start-up
+DEFAULT_PLOT_WORKERS = min(3, os.cpu_count() or 1)
+PLOT_LABELS = {
+    'confusion_matrix': 'Confusion matrix',
+    'roc_curve': 'ROC curve',
+    'precision_recall_curve': 'Precision-recall curve',
+}
+
+
+def curve_data(curve, threshold=0.5):
+    """
+    Collect everything the evaluation plots need from a ThresholdCurve.
+
+    Args:
+        curve: ThresholdCurve of the test predictions
+        threshold: Threshold the labels were predicted at
+
+    Returns:
+        dict: 'confusion_matrix', 'roc' and 'precision_recall' entries
+        holding NumPy arrays
+    """
+    tn, fp, fn, tp = curve.counts(threshold)
+    fpr, tpr, roc_thresholds = curve.roc_curve()
+    # Points inside vertical segments do not change the plot
+    precision, recall, pr_thresholds = curve.precision_recall_curve(drop_intermediate=True)
+    return {
+        'threshold': float(threshold),
+        'confusion_matrix': np.array([[tn, fp], [fn, tp]]),
+        'roc': {'fpr': fpr, 'tpr': tpr, 'thresholds': roc_thresholds,
+                'auc': curve.roc_auc()},
+        'precision_recall': {'precision': precision, 'recall': recall,
+                             'thresholds': pr_thresholds},
+    }
+
+
+def _to_json(value):
+    """Arrays to lists, with infinite thresholds as null (not valid JSON otherwise)."""
+    if isinstance(value, dict):
+        return {key: _to_json(item) for key, item in value.items()}
+    if isinstance(value, np.ndarray):
+        if value.dtype.kind == 'f' and not np.isfinite(value).all():
+            return [float(v) if np.isfinite(v) else None for v in value]
+        return value.tolist()
+    return value
+
+
+def write_curve_data(data, output_dir):
+    """
+    Save curve_data() as JSON for dashboards.
+
+    Returns:
+        str: Path of the written file
+    """
+    output_path = os.path.join(output_dir, 'curves.json')
+    with open(output_path, 'w') as f:
+        json.dump(_to_json(dict(data, class_names=CLASS_NAMES)), f)
+    print(f"Curve data saved to {output_path}")
+    return output_path
+
+
+def _pyplot():
+    """Import pyplot on first use, with the non-interactive backend."""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def _import_plotting():
+    """Worker initializer: pay the matplotlib/seaborn import before any figure is due."""
+    _pyplot()
+    import seaborn  # noqa: F401
+
+
+def render_confusion_matrix(cm, output_path):
+    """Draw a confusion matrix heatmap to output_path."""
+    plt = _pyplot()
+    import seaborn as sns
+
+    plt.figure(figsize=(8, 6))
+    sns.heatmap(cm, annot=True, fmt='d', cmap='Blues',
+                xticklabels=CLASS_NAMES, yticklabels=CLASS_NAMES)
+    plt.title('Confusion Matrix')
+    plt.ylabel('True Label')
+    plt.xlabel('Predicted Label')
+
+    plt.savefig(output_path, dpi=PLOT_DPI, bbox_inches='tight')
+    plt.close()
+    return output_path
+
+
+def render_roc_curve(fpr, tpr, roc_auc, output_path):
+    """Draw a ROC curve with the random-classifier diagonal to output_path."""
+    plt = _pyplot()
+
+    plt.figure(figsize=(8, 6))
+    plt.plot(fpr, tpr, color='darkorange', lw=2,
+             label=f'ROC curve (AUC = {roc_auc:.2f})')
+    plt.plot([0, 1], [0, 1], color='navy', lw=2, linestyle='--',
+             label='Random Classifier')
+    plt.xlim([0.0, 1.0])
+    plt.ylim([0.0, 1.05])
+    plt.xlabel('False Positive Rate')
+    plt.ylabel('True Positive Rate')
+    plt.title('Receiver Operating Characteristic (ROC) Curve')
+    plt.legend(loc="lower right")
+    plt.grid(alpha=0.3)
+
+    plt.savefig(output_path, dpi=PLOT_DPI, bbox_inches='tight')
+    plt.close()
+    return output_path
+
+
+def render_precision_recall_curve(precision, recall, output_path):
+    """Draw a precision-recall curve to output_path."""
+    plt = _pyplot()
+
+    plt.figure(figsize=(8, 6))
+    plt.plot(recall, precision, color='darkgreen', lw=2)
+    plt.xlabel('Recall')
+    plt.ylabel('Precision')
+    plt.title('Precision-Recall Curve')
+    plt.grid(alpha=0.3)
+
+    plt.savefig(output_path, dpi=PLOT_DPI, bbox_inches='tight')
+    plt.close()
+    return output_path
+
+
+def plot_jobs(data, output_dir):
+    """
+    The evaluation figures as (name, renderer, args) tuples.
+
+    Args:
+        data: curve_data() output
+        output_dir: Directory for the PNG files
+    """
+    roc, pr = data['roc'], data['precision_recall']
+    return [
+        ('confusion_matrix', render_confusion_matrix,
+         (data['confusion_matrix'], f'{output_dir}/confusion_matrix.png')),
+        ('roc_curve', render_roc_curve,
+         (roc['fpr'], roc['tpr'], roc['auc'], f'{output_dir}/roc_curve.png')),
+        ('precision_recall_curve', render_precision_recall_curve,
+         (pr['precision'], pr['recall'], f'{output_dir}/precision_recall_curve.png')),
+    ]
+
+
+def render_plot(name, data, output_dir):
+    """
+    Render one figure of plot_jobs() by name.
+
+    A module-level entry point, so a single figure can be sent to a worker
+    process (e.g. as a DAG node) with just the curve data.
+
+    Returns:
+        str: Path of the written PNG
+    """
+    for job_name, renderer, args in plot_jobs(data, output_dir):
+        if job_name == name:
+            return renderer(*args)
+    raise ValueError(f"Unknown plot {name!r}; expected one of {list(PLOT_LABELS)}")
+
+
+class PlotPool:
+    """
+    Renders figures in worker processes while the caller continues.
+
+    The workers start and import matplotlib as soon as the pool is created,
+    so creating it before the predictions hides the import time. With
+    max_workers <= 1 the figures are rendered in this process when
+    results() is called. Workers come from a forkserver, not a fork of the
+    caller, whose tracking sender thread may hold a lock at fork time.
+
+    Usage:
+        with PlotPool(3) as pool:
+            ...  # predict
+            pool.submit(plot_jobs(data, 'metrics'))
+            ...  # other work
+            paths = pool.results()
+
+    Args:
+        max_workers: Worker processes (one per figure is enough)
+    """
+
+    def __init__(self, max_workers=3):
+        self.max_workers = max_workers
+        self._executor = None
+        self._pending = []
+        if max_workers > 1:
+            self._executor = ProcessPoolExecutor(
+                max_workers, mp_context=multiprocessing.get_context('forkserver'),
+                initializer=_import_plotting)
+            # Workers are spawned on demand; one no-op task each starts them all now
+            for _ in range(max_workers):
+                self._executor.submit(int)
+
+    def submit(self, jobs):
+        """Start rendering (name, renderer, args) jobs."""
+        for name, renderer, args in jobs:
+            if self._executor is not None:
+                self._pending.append((name, self._executor.submit(renderer, *args)))
+            else:
+                self._pending.append((name, (renderer, args)))
+
+    def results(self):
+        """
+        Wait for the submitted figures.
+
+        Returns:
+            dict: Figure name to the path of the written PNG
+        """
+        paths = {}
+        for name, job in self._pending:
+            if self._executor is not None:
+                paths[name] = job.result()
+            else:
+                renderer, args = job
+                paths[name] = renderer(*args)
+            print(f"{PLOT_LABELS.get(name, name)} saved to {paths[name]}")
+        self._pending = []
+        return paths
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
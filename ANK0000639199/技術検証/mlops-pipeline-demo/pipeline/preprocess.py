@@ -5,91 +5,263 @@ This module handles data loading, cleaning, and preprocessing for the ML pipelin
 """
 
 import os
+import argparse
+import contextlib
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import LabelEncoder, StandardScaler
-import joblib
+from storage import (
+    FORMATS, DATASET_NAMES, MANIFEST_FILE, DatasetWriter, dataset_exists,
+    dataset_path, load_dataset, read_manifest, save_dataset, update_manifest
+)
+from validation import CHURN_SCHEMA, DataValidationError, validate
+from cache import (
+    DEFAULT_CACHE_DIR, DEFAULT_MAX_AGE_DAYS, DEFAULT_MAX_BYTES, StageCache
+)
+from transform import CATEGORICAL_COLUMNS, NUMERICAL_COLUMNS, ChurnTransform
+from fingerprint import RowDeduplicator, duplicate_mask, row_hashes
+from instrumentation import add_instrumentation_args, recording, span
+from tracking import Tracker, add_tracking_args
+
+
+# Source files whose code determines the preprocessing output
+PREPROCESS_SOURCES = [
+    os.path.abspath(__file__),
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'storage.py'),
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'validation.py'),
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'transform.py'),
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fingerprint.py'),
+]
+
+# Memory for the row fingerprints of streaming deduplication before spilling
+DEFAULT_DEDUP_MAX_MB = 256
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Preprocess raw churn data')
+    parser.add_argument('--data-path', type=str, default='data/sample_data.csv',
+                       help='Path to raw data CSV')
+    parser.add_argument('--output-dir', type=str, default='data/processed',
+                       help='Directory to save processed data')
+    parser.add_argument('--chunksize', type=int, default=None,
+                       help='Stream the CSV in chunks of this many rows '
+                            '(bounded memory mode)')
+    parser.add_argument('--format', dest='data_format', choices=sorted(FORMATS),
+                       default='csv', help='On-disk format of the processed data')
+    parser.add_argument('--dedup-max-mb', type=int, default=DEFAULT_DEDUP_MAX_MB,
+                       help='Memory for duplicate detection across chunks before '
+                            'spilling row fingerprints to disk')
+    parser.add_argument('--spill-dir', type=str, default=None,
+                       help='Directory for spilled row fingerprints (default: system temp)')
+    parser.add_argument('--no-cache', action='store_true',
+                       help='Always recompute instead of using the stage cache')
+    parser.add_argument('--cache-dir', type=str, default=DEFAULT_CACHE_DIR,
+                       help='Directory of the stage cache')
+    parser.add_argument('--cache-max-mb', type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024),
+                       help='Evict least recently used cache entries above this size')
+    parser.add_argument('--cache-max-age-days', type=float, default=DEFAULT_MAX_AGE_DAYS,
+                       help='Evict cache entries unused for this many days')
+    add_instrumentation_args(parser)
+    add_tracking_args(parser)
+    return parser.parse_args()
+
+
+def read_dtypes(schema=CHURN_SCHEMA):
+    """
+    Compact dtypes for reading the schema columns from CSV.
+
+    Integer columns may still hold missing values before cleaning, so they
+    are read as float32 (exact for these small integers) and narrowed by
+    compact_dtypes() after clean_data().
+
+    Args:
+        schema: Column spec dict (see validation.CHURN_SCHEMA)
+
+    Returns:
+        dict: Column name to dtype for pd.read_csv
+    """
+    dtypes = {}
+    for col, spec in schema.items():
+        storage = spec.get('storage')
+        if storage == 'category':
+            dtypes[col] = 'category'
+        elif storage:
+            dtypes[col] = 'float32' if np.dtype(storage).kind in 'iu' else storage
+    return dtypes
+
 
+def compact_dtypes(df, schema=CHURN_SCHEMA):
+    """
+    Narrow columns to their schema storage dtype where the values allow it.
+
+    Integer columns are only converted once they hold no missing,
+    fractional or out-of-range values (i.e. after cleaning).
+
+    Args:
+        df: DataFrame read with read_dtypes()
+        schema: Column spec dict (see validation.CHURN_SCHEMA)
 
-def load_data(data_path='data/sample_data.csv'):
+    Returns:
+        DataFrame: df with converted columns (the same object if none changed)
+    """
+    converted = {}
+    for col, spec in schema.items():
+        storage = spec.get('storage')
+        if col not in df.columns or not storage or df[col].dtype == storage:
+            continue
+        values = df[col]
+        if storage == 'category' or np.dtype(storage).kind == 'f':
+            converted[col] = values.astype(storage)
+            continue
+        limits = np.iinfo(storage)
+        as_float = values.to_numpy(dtype=np.float64, na_value=np.nan)
+        if (np.isfinite(as_float).all() and (as_float == np.round(as_float)).all()
+                and (as_float >= limits.min).all() and (as_float <= limits.max).all()):
+            converted[col] = values.astype(storage)
+    return df.assign(**converted) if converted else df
+
+
+def memory_mb(df):
+    """In-memory size of a DataFrame in MB, including string contents."""
+    return df.memory_usage(deep=True).sum() / (1024 * 1024)
+
+
+def load_data(data_path='data/sample_data.csv', compact=True, schema=CHURN_SCHEMA):
     """
     Load raw data from CSV file.
 
+    With compact dtypes, the schema columns are parsed straight into
+    category, float32 and (after cleaning) small integer columns instead of
+    object strings and 8-byte numbers. Files whose values do not parse
+    with those dtypes are read with pandas' defaults so validation can
+    report them.
+
     Args:
         data_path: Path to the CSV file
+        compact: Read the schema columns with compact dtypes
+        schema: Column spec dict (see validation.CHURN_SCHEMA)
 
     Returns:
         DataFrame: Loaded data
     """
     print(f"Loading data from {data_path}...")
-    df = pd.read_csv(data_path)
-    print(f"Loaded {len(df)} rows and {len(df.columns)} columns")
+    if compact:
+        try:
+            df = pd.read_csv(data_path, dtype=read_dtypes(schema))
+        except ValueError as exc:
+            print(f"Warning: compact dtypes do not fit {data_path} ({exc}); "
+                  f"reading with default dtypes")
+            compact = False
+    if not compact:
+        df = pd.read_csv(data_path)
+    print(f"Loaded {len(df)} rows and {len(df.columns)} columns "
+          f"({memory_mb(df):.1f} MB in memory)")
     return df
 
 
-def validate_data(df):
+def validate_data(df, verbose=True, schema=CHURN_SCHEMA):
     """
     Validate data quality and integrity.
 
+    All schema rules are checked in one vectorized pass; the returned
+    report also carries the row mask that clean_data() applies.
+
     Args:
         df: Input DataFrame
+        verbose: Print progress messages
+        schema: Column spec dict (see validation.CHURN_SCHEMA)
+
+    Returns:
+        ValidationReport: Per-rule violation counts and row keep mask
 
     Raises:
-        ValueError: If data validation fails
+        DataValidationError: If a schema or 'error' rule fails (a ValueError)
     """
-    print("Validating data...")
+    if verbose:
+        print("Validating data...")
 
-    # Check for required columns
-    required_columns = ['Age', 'Tenure', 'MonthlyCharges', 'TotalCharges',
-                       'Contract', 'PaymentMethod', 'Churn']
-    missing_columns = set(required_columns) - set(df.columns)
-    if missing_columns:
-        raise ValueError(f"Missing required columns: {missing_columns}")
+    report = validate(df, schema)
+    if not report.ok:
+        raise DataValidationError(report)
 
-    # Check for null values
-    null_counts = df.isnull().sum()
-    if null_counts.sum() > 0:
-        print(f"Warning: Found null values:\n{null_counts[null_counts > 0]}")
+    # Warn about non-fatal violations
+    for rule in report.violations():
+        if rule['action'] in ('warn', 'fill_median') or verbose:
+            print(f"Warning: {rule['rule']} ({rule['action']}): "
+                  f"{rule['violations']} rows")
 
-    # Check data types
-    assert df['Age'].dtype in [np.int64, np.float64], "Age must be numeric"
-    assert df['Tenure'].dtype in [np.int64, np.float64], "Tenure must be numeric"
-    assert df['Churn'].dtype in [np.int64, np.float64], "Churn must be numeric"
+    if verbose:
+        print("Data validation passed!")
+    return report
 
-    print("Data validation passed!")
 
+def compute_fill_values(df, schema=CHURN_SCHEMA):
+    """
+    Values used to fill missing numbers, per the schema's null policy.
+
+    Args:
+        df: Input DataFrame
+        schema: Column spec dict (see validation.CHURN_SCHEMA)
 
-def clean_data(df):
+    Returns:
+        dict: Column name to fill value
+    """
+    return {col: df[col].median() for col, spec in schema.items()
+            if spec.get('nulls') == 'fill_median'}
+
+
+def clean_data(df, verbose=True, report=None, schema=CHURN_SCHEMA, dedup=None):
     """
     Clean and handle missing values.
 
+    Duplicate rows are found by their 64-bit fingerprint (see
+    fingerprint.py) instead of hashing all columns in pandas.
+
     Args:
         df: Input DataFrame
+        verbose: Print progress messages
+        report: ValidationReport from validate_data() for df; computed
+            here when not given
+        schema: Column spec dict (see validation.CHURN_SCHEMA)
+        dedup: RowDeduplicator to also drop rows seen in earlier chunks
+            (default: duplicates within df only)
 
     Returns:
         DataFrame: Cleaned data
     """
-    print("Cleaning data...")
-    df_clean = df.copy()
+    if verbose:
+        print("Cleaning data...")
+    if report is None:
+        report = validate(df, schema)
+
+    # Medians come from the full column, before any row is dropped
+    fill_values = {col: value for col, value in compute_fill_values(df, schema).items()
+                   if df[col].isna().any()}
 
-    # Handle missing values in TotalCharges
-    if df_clean['TotalCharges'].isnull().any():
-        df_clean['TotalCharges'].fillna(df_clean['TotalCharges'].median(), inplace=True)
+    # Drop rows rejected by range and null rules (outliers, negative tenure)
+    df_clean = df[report.keep_mask] if report.dropped_rows else df
 
-    # Remove duplicates
+    # Remove duplicates, keeping the first occurrence. This runs before
+    # filling so a repeated row matches however its chunk's median came out.
     initial_rows = len(df_clean)
-    df_clean.drop_duplicates(inplace=True)
-    if len(df_clean) < initial_rows:
+    if dedup is not None:
+        keep = dedup.new_rows(df_clean)
+    else:
+        keep = ~duplicate_mask(row_hashes(df_clean))
+    if not keep.all():
+        df_clean = df_clean[keep]
+    if verbose and len(df_clean) < initial_rows:
         print(f"Removed {initial_rows - len(df_clean)} duplicate rows")
 
-    # Handle outliers in Age (keep reasonable range)
-    df_clean = df_clean[(df_clean['Age'] >= 18) & (df_clean['Age'] <= 100)]
+    # Handle missing values
+    if fill_values:
+        df_clean = df_clean.fillna(fill_values)
 
-    # Ensure Tenure is non-negative
-    df_clean = df_clean[df_clean['Tenure'] >= 0]
+    # Nulls and out-of-range values are gone, so integer columns can narrow
+    df_clean = compact_dtypes(df_clean, schema)
 
-    print(f"Cleaned data: {len(df_clean)} rows remaining")
+    if verbose:
+        print(f"Cleaned data: {len(df_clean)} rows remaining")
     return df_clean
 
 
@@ -97,28 +269,32 @@ def encode_features(df):
     """
     Encode categorical features and scale numerical features.
 
+    Codes are stored in the smallest integer type that holds them and
+    scaled numbers as float32, which is what the tree models fit on anyway.
+
     Args:
         df: Input DataFrame
 
     Returns:
         tuple: (encoded DataFrame, label encoders dict, scaler)
     """
+    from sklearn.preprocessing import LabelEncoder, StandardScaler
+
     print("Encoding features...")
     df_encoded = df.copy()
     encoders = {}
 
     # Encode categorical variables
-    categorical_columns = ['Contract', 'PaymentMethod']
-    for col in categorical_columns:
+    for col in CATEGORICAL_COLUMNS:
         le = LabelEncoder()
-        df_encoded[col] = le.fit_transform(df_encoded[col])
+        df_encoded[col] = pd.to_numeric(le.fit_transform(df_encoded[col]), downcast='integer')
         encoders[col] = le
         print(f"  Encoded {col}: {len(le.classes_)} categories")
 
     # Scale numerical features
-    numerical_columns = ['Age', 'Tenure', 'MonthlyCharges', 'TotalCharges']
     scaler = StandardScaler()
-    df_encoded[numerical_columns] = scaler.fit_transform(df_encoded[numerical_columns])
+    scaled = scaler.fit_transform(df_encoded[NUMERICAL_COLUMNS]).astype(np.float32)
+    df_encoded = df_encoded.assign(**dict(zip(NUMERICAL_COLUMNS, scaled.T)))
 
     print("Feature encoding completed!")
     return df_encoded, encoders, scaler
@@ -136,6 +312,8 @@ def split_data(df, test_size=0.2, random_state=42):
     Returns:
         tuple: (X_train, X_test, y_train, y_test)
     """
+    from sklearn.model_selection import train_test_split
+
     print(f"Splitting data (test_size={test_size})...")
 
     # Separate features and target
@@ -159,39 +337,230 @@ def split_data(df, test_size=0.2, random_state=42):
 
 
 def save_processed_data(X_train, X_test, y_train, y_test, encoders, scaler,
-                       output_dir='data/processed'):
+                       output_dir='data/processed', data_format='csv', fill_values=None):
     """
     Save processed data and preprocessing artifacts.
 
+    Besides the pickled encoders and scaler, the fitted ChurnTransform is
+    saved as transform.npz for applying the same preprocessing to new data.
+
     Args:
         X_train, X_test, y_train, y_test: Split datasets
         encoders: Dictionary of label encoders
         scaler: Fitted StandardScaler
         output_dir: Directory to save processed data
+        data_format: On-disk format (csv, parquet, feather or npy)
+        fill_values: Fill values for missing numbers (see compute_fill_values)
     """
-    print(f"Saving processed data to {output_dir}...")
+    import joblib
+
+    print(f"Saving processed data to {output_dir} ({data_format})...")
     os.makedirs(output_dir, exist_ok=True)
 
     # Save datasets
-    X_train.to_csv(f'{output_dir}/X_train.csv', index=False)
-    X_test.to_csv(f'{output_dir}/X_test.csv', index=False)
-    y_train.to_csv(f'{output_dir}/y_train.csv', index=False)
-    y_test.to_csv(f'{output_dir}/y_test.csv', index=False)
+    save_dataset({'X_train': X_train, 'X_test': X_test,
+                  'y_train': y_train, 'y_test': y_test},
+                 output_dir, data_format)
 
     # Save preprocessing artifacts
     joblib.dump(encoders, f'{output_dir}/encoders.pkl')
     joblib.dump(scaler, f'{output_dir}/scaler.pkl')
+    ChurnTransform.from_encoders(encoders, scaler, fill_values,
+                                 X_train.columns.tolist()).save(f'{output_dir}/transform.npz')
 
     print("Processed data saved successfully!")
 
 
-def preprocess_data(data_path='data/sample_data.csv', output_dir='data/processed'):
+def fit_encoders_streaming(data_path, chunksize, dedup_max_mb=DEFAULT_DEDUP_MAX_MB,
+                           spill_dir=None):
     """
-    Complete preprocessing pipeline.
+    Fit label encoders and scaler chunk by chunk (first streaming pass).
+
+    Each chunk is validated and cleaned on its own, with duplicates of rows
+    from earlier chunks removed as well. Category sets are accumulated and
+    the scaler is fitted with ``partial_fit``, so memory stays bounded by
+    ``chunksize`` (plus the deduplication budget).
+
+    Args:
+        data_path: Path to raw data CSV
+        chunksize: Number of rows per chunk
+        dedup_max_mb: Memory for row fingerprints before spilling to disk
+        spill_dir: Directory for spilled fingerprints
+
+    Returns:
+        tuple: (label encoders dict, scaler, raw row count, clean row count)
+    """
+    from sklearn.preprocessing import LabelEncoder, StandardScaler
+
+    print(f"Fitting encoders on {data_path} in chunks of {chunksize} rows...")
+    categories = {col: set() for col in CATEGORICAL_COLUMNS}
+    scaler = StandardScaler()
+    raw_rows = 0
+    clean_rows = 0
+
+    with RowDeduplicator(dedup_max_mb * 1024 * 1024, spill_dir) as dedup:
+        for chunk in pd.read_csv(data_path, chunksize=chunksize, dtype=read_dtypes()):
+            raw_rows += len(chunk)
+            report = validate_data(chunk, verbose=False)
+            chunk_clean = clean_data(chunk, verbose=False, report=report, dedup=dedup)
+            if chunk_clean.empty:
+                continue
+            clean_rows += len(chunk_clean)
+
+            for col in CATEGORICAL_COLUMNS:
+                categories[col].update(chunk_clean[col].unique())
+            scaler.partial_fit(chunk_clean[NUMERICAL_COLUMNS])
+    if dedup.duplicates:
+        print(f"Removed {dedup.duplicates} duplicate rows"
+              + (f" ({dedup.spilled_runs} fingerprint runs spilled to disk)"
+                 if dedup.spilled_runs else ""))
+
+    if clean_rows == 0:
+        raise ValueError(f"No rows left after cleaning {data_path}")
+
+    # LabelEncoder stores its classes sorted, so the union of the per-chunk
+    # categories gives exactly what a single fit on the full data would.
+    encoders = {}
+    for col in CATEGORICAL_COLUMNS:
+        le = LabelEncoder()
+        le.classes_ = np.array(sorted(categories[col]), dtype=object)
+        encoders[col] = le
+        print(f"  Encoded {col}: {len(le.classes_)} categories")
+
+    print(f"Fitted on {clean_rows} of {raw_rows} rows")
+    return encoders, scaler, raw_rows, clean_rows
+
+
+def transform_chunk(df, encoders, scaler):
+    """
+    Apply already fitted encoders and scaler to a cleaned chunk.
+
+    Args:
+        df: Cleaned DataFrame chunk
+        encoders: Dictionary of fitted label encoders
+        scaler: Fitted StandardScaler
+
+    Returns:
+        DataFrame: Encoded chunk
+    """
+    df_encoded = df.copy()
+    for col in CATEGORICAL_COLUMNS:
+        df_encoded[col] = pd.to_numeric(encoders[col].transform(df_encoded[col]),
+                                        downcast='integer')
+    scaled = scaler.transform(df_encoded[NUMERICAL_COLUMNS]).astype(np.float32)
+    return df_encoded.assign(**dict(zip(NUMERICAL_COLUMNS, scaled.T)))
+
+
+def _split_chunk(df, test_size, random_state):
+    """Split one encoded chunk, stratifying when every class allows it."""
+    from sklearn.model_selection import train_test_split
+
+    X = df.drop('Churn', axis=1)
+    y = df['Churn']
+    if 'CustomerID' in X.columns:
+        X = X.drop('CustomerID', axis=1)
+
+    if len(df) < 2:
+        return X, X.iloc[:0], y, y.iloc[:0]
+
+    class_counts = y.value_counts()
+    stratify = y if len(class_counts) > 1 and class_counts.min() >= 2 else None
+    return train_test_split(X, y, test_size=test_size,
+                            random_state=random_state, stratify=stratify)
+
+
+def preprocess_data_streaming(data_path='data/sample_data.csv',
+                              output_dir='data/processed', chunksize=100000,
+                              test_size=0.2, random_state=42, data_format='csv',
+                              dedup_max_mb=DEFAULT_DEDUP_MAX_MB, spill_dir=None):
+    """
+    Bounded-memory preprocessing pipeline for CSVs larger than RAM.
+
+    The raw CSV is read twice in chunks: the first pass fits the encoders
+    and scaler, the second pass cleans, encodes and splits every chunk and
+    appends it to the train/test files. Median filling of TotalCharges is
+    applied per chunk; duplicates are removed across chunks by row
+    fingerprint, spilling the fingerprints to disk beyond dedup_max_mb.
+
+    Args:
+        data_path: Path to raw data CSV
+        output_dir: Directory to save processed data
+        chunksize: Number of rows per chunk
+        test_size: Proportion of data for testing
+        random_state: Random seed for reproducibility
+        data_format: On-disk format (csv, parquet, feather or npy)
+        dedup_max_mb: Memory for row fingerprints before spilling to disk
+        spill_dir: Directory for spilled fingerprints (default: system temp)
+
+    Returns:
+        dict: Row counts of the written train and test sets
+    """
+    import joblib
+
+    print("=" * 60)
+    print("STARTING STREAMING DATA PREPROCESSING PIPELINE")
+    print("=" * 60)
+
+    with span('fit_encoders') as fit_span:
+        encoders, scaler, raw_rows, clean_rows = fit_encoders_streaming(
+            data_path, chunksize, dedup_max_mb, spill_dir
+        )
+        fit_span.rows = raw_rows
+
+    print(f"Writing processed shards to {output_dir} ({data_format})...")
+    counts = {'train_rows': 0, 'test_rows': 0, 'train_churn': 0, 'test_churn': 0}
+    with span('transform', rows=raw_rows), DatasetWriter(output_dir, data_format) as writer, \
+            RowDeduplicator(dedup_max_mb * 1024 * 1024, spill_dir) as dedup:
+        chunks = pd.read_csv(data_path, chunksize=chunksize, dtype=read_dtypes())
+        for i, chunk in enumerate(chunks):
+            # Same rows as the first pass: the deduplication is deterministic
+            chunk_clean = clean_data(chunk, verbose=False, dedup=dedup)
+            if chunk_clean.empty:
+                continue
+            chunk_encoded = transform_chunk(chunk_clean, encoders, scaler)
+            X_train, X_test, y_train, y_test = _split_chunk(
+                chunk_encoded, test_size, random_state + i
+            )
+
+            writer.append('X_train', X_train)
+            writer.append('X_test', X_test)
+            writer.append('y_train', y_train)
+            writer.append('y_test', y_test)
+
+            counts['train_rows'] += len(X_train)
+            counts['test_rows'] += len(X_test)
+            counts['train_churn'] += int(y_train.sum())
+            counts['test_churn'] += int(y_test.sum())
+
+    joblib.dump(encoders, f'{output_dir}/encoders.pkl')
+    joblib.dump(scaler, f'{output_dir}/scaler.pkl')
+    # Medians are only known per chunk here, so missing numbers at apply
+    # time fall back to the training mean
+    ChurnTransform.from_encoders(encoders, scaler).save(f'{output_dir}/transform.npz')
+
+    print(f"Cleaned data: {clean_rows} of {raw_rows} rows remaining")
+    print(f"Training set: {counts['train_rows']} samples")
+    print(f"Test set: {counts['test_rows']} samples")
+    if counts['train_rows'] and counts['test_rows']:
+        print(f"Churn rate - Train: {counts['train_churn'] / counts['train_rows']:.2%}, "
+              f"Test: {counts['test_churn'] / counts['test_rows']:.2%}")
+
+    print("=" * 60)
+    print("STREAMING PREPROCESSING PIPELINE COMPLETED SUCCESSFULLY")
+    print("=" * 60)
+
+    return counts
+
+
+def preprocess_data_in_memory(data_path='data/sample_data.csv',
+                              output_dir='data/processed', data_format='csv'):
+    """
+    Preprocessing pipeline that loads the whole CSV into memory.
 
     Args:
         data_path: Path to raw data CSV
         output_dir: Directory to save processed data
+        data_format: On-disk format (csv, parquet, feather or npy)
 
     Returns:
         tuple: (X_train, X_test, y_train, y_test)
@@ -201,22 +570,30 @@ def preprocess_data(data_path='data/sample_data.csv', output_dir='data/processed
     print("=" * 60)
 
     # Load data
-    df = load_data(data_path)
+    with span('load') as load_span:
+        df = load_data(data_path)
+        load_span.rows = len(df)
 
     # Validate data
-    validate_data(df)
+    with span('validate', rows=len(df)):
+        report = validate_data(df)
 
     # Clean data
-    df_clean = clean_data(df)
+    with span('clean', rows=len(df)):
+        df_clean = clean_data(df, report=report)
 
     # Encode features
-    df_encoded, encoders, scaler = encode_features(df_clean)
+    with span('encode', rows=len(df_clean)):
+        df_encoded, encoders, scaler = encode_features(df_clean)
 
     # Split data
-    X_train, X_test, y_train, y_test = split_data(df_encoded)
+    with span('split', rows=len(df_encoded)):
+        X_train, X_test, y_train, y_test = split_data(df_encoded)
 
     # Save processed data
-    save_processed_data(X_train, X_test, y_train, y_test, encoders, scaler, output_dir)
+    with span('save', rows=len(df_encoded)):
+        save_processed_data(X_train, X_test, y_train, y_test, encoders, scaler,
+                            output_dir, data_format, compute_fill_values(df))
 
     print("=" * 60)
     print("PREPROCESSING PIPELINE COMPLETED SUCCESSFULLY")
@@ -225,5 +602,158 @@ def preprocess_data(data_path='data/sample_data.csv', output_dir='data/processed
     return X_train, X_test, y_train, y_test
 
 
+def preprocess_cache_key(cache, data_path, chunksize=None, data_format='csv'):
+    """
+    Cache key of a preprocessing run.
+
+    The key covers the raw input's content, the parameters that change
+    the output and the source of this module and the storage layer.
+
+    Args:
+        cache: StageCache used to hash the inputs
+        data_path: Path to raw data CSV
+        chunksize: Streaming chunk size (None for in-memory mode)
+        data_format: On-disk format of the processed data
+
+    Returns:
+        tuple: (cache key, parameters dict recorded in the manifest)
+    """
+    params = {'data_path': data_path, 'chunksize': chunksize, 'data_format': data_format}
+    key_params = {'chunksize': chunksize, 'data_format': data_format}
+    return cache.key('preprocess', [data_path], key_params, PREPROCESS_SOURCES), params
+
+
+def _processed_files(data_format):
+    """File names making up one processed dataset directory."""
+    return ([os.path.basename(dataset_path('', name, data_format)) for name in DATASET_NAMES]
+            + [MANIFEST_FILE, 'encoders.pkl', 'scaler.pkl', 'transform.npz'])
+
+
+def preprocess_data(data_path='data/sample_data.csv', output_dir='data/processed',
+                    chunksize=None, data_format='csv', use_cache=True, cache=None,
+                    dedup_max_mb=DEFAULT_DEDUP_MAX_MB, spill_dir=None):
+    """
+    Complete preprocessing pipeline.
+
+    Outputs are stored in a content-addressed stage cache; when the raw
+    input, the parameters and the preprocessing code are unchanged, the
+    cached outputs are restored instead of recomputing them.
+
+    Args:
+        data_path: Path to raw data CSV
+        output_dir: Directory to save processed data
+        chunksize: If set, stream the CSV in chunks of this many rows via
+            preprocess_data_streaming() instead of loading it in one go
+        data_format: On-disk format (csv, parquet, feather or npy)
+        use_cache: Reuse and populate the stage cache
+        cache: StageCache to use (defaults to StageCache())
+        dedup_max_mb: Streaming only: memory for row fingerprints before
+            spilling them to disk
+        spill_dir: Streaming only: directory for spilled fingerprints
+
+    Returns:
+        tuple: (X_train, X_test, y_train, y_test), or the row counts dict
+        of preprocess_data_streaming() when chunksize is set
+    """
+    cache = cache or StageCache()
+    with span('cache_key'):
+        cache_key, params = preprocess_cache_key(cache, data_path, chunksize, data_format)
+
+    if use_cache:
+        with span('cache_restore'):
+            meta = cache.restore(cache_key, output_dir)
+        if meta is not None:
+            print(f"Preprocessing cache hit ({cache_key[:12]}): "
+                  f"restored processed data to {output_dir}")
+            update_manifest(output_dir, source_key=cache_key, source=params)
+            if chunksize:
+                return meta['counts']
+            datasets = load_dataset(output_dir)
+            return (datasets['X_train'], datasets['X_test'],
+                    pd.Series(datasets['y_train'], name='Churn'),
+                    pd.Series(datasets['y_test'], name='Churn'))
+
+    if chunksize:
+        result = preprocess_data_streaming(data_path, output_dir, chunksize,
+                                           data_format=data_format,
+                                           dedup_max_mb=dedup_max_mb, spill_dir=spill_dir)
+    else:
+        result = preprocess_data_in_memory(data_path, output_dir, data_format)
+
+    update_manifest(output_dir, source_key=cache_key, source=params)
+
+    if use_cache:
+        with span('cache_store'):
+            cache.store(cache_key, output_dir, _processed_files(data_format),
+                        meta={'counts': result if chunksize else None})
+            cache.evict()
+
+    return result
+
+
+def ensure_processed_data(data_dir='data/processed', data_path='data/sample_data.csv',
+                          cache=None):
+    """
+    Make sure data_dir holds processed data for the current input and code.
+
+    The manifest records which raw file and parameters produced the data
+    and their cache key. If the key no longer matches (the raw file or the
+    preprocessing code changed) or the data is missing, preprocessing is
+    re-run, which restores from the stage cache when possible.
+
+    Args:
+        data_dir: Directory containing processed data
+        data_path: Raw data CSV used when no processed data exists yet
+        cache: StageCache to use (defaults to StageCache())
+    """
+    cache = cache or StageCache()
+    manifest = read_manifest(data_dir)
+    source = manifest.get('source')
+    chunksize, data_format = None, 'csv'
+
+    if dataset_exists(data_dir) and source:
+        data_path = source['data_path']
+        chunksize, data_format = source['chunksize'], source['data_format']
+        if not os.path.exists(data_path):
+            print(f"Warning: raw data {data_path} not found, "
+                  f"cannot verify processed data in {data_dir}")
+            return
+        cache_key, _ = preprocess_cache_key(cache, data_path, chunksize, data_format)
+        if cache_key == manifest.get('source_key'):
+            return
+        print("Processed data is stale (raw data or preprocessing code changed). "
+              "Re-running preprocessing pipeline...")
+    elif dataset_exists(data_dir):
+        print("Processed data has no source information. Re-running preprocessing pipeline...")
+    else:
+        print("Processed data not found. Running preprocessing pipeline...")
+
+    with span('preprocess'):
+        preprocess_data(data_path, data_dir, chunksize=chunksize,
+                        data_format=data_format, cache=cache)
+
+
+def main():
+    """Run preprocessing from the command line, with stage timings."""
+    args = parse_args()
+    cache = StageCache(args.cache_dir,
+                       max_bytes=args.cache_max_mb * 1024 * 1024,
+                       max_age_days=args.cache_max_age_days)
+
+    with contextlib.ExitStack() as stack:
+        # Timings go to MLflow only when a tracking server is configured
+        run = None
+        if os.getenv('MLFLOW_TRACKING_URI'):
+            tracker = stack.enter_context(Tracker(spool_dir=args.spool_dir,
+                                                  mode=args.tracking_mode))
+            run = stack.enter_context(tracker.start_run(run_name='preprocess'))
+        stack.enter_context(recording('preprocess', args.profile, args.trace_memory,
+                                      args.prom_textfile_dir, run=run))
+        preprocess_data(args.data_path, args.output_dir, chunksize=args.chunksize,
+                        data_format=args.data_format, use_cache=not args.no_cache,
+                        cache=cache, dedup_max_mb=args.dedup_max_mb,
+                        spill_dir=args.spill_dir)
+
+
 if __name__ == '__main__':
-    preprocess_data()
+    main()
@@ -0,0 +1,459 @@
+"""
+Candidate Model Pipeline
+
+This module declares preprocessing, training and evaluation as a DAG of the
+functions in preprocess.py, train.py and evaluate.py (see dag.py) and trains
+several candidate models side by side on one machine. Preprocessing runs
+once; each candidate then trains, is scored and gets its own reports while
+the other candidates do the same. The figures are rendered in worker
+processes. A leaderboard compares the candidates at the end.
+
+Deterministic nodes (encoding, the split, model fits, predictions) are
+cached, so re-running with one candidate added only trains the new one,
+and nothing upstream of a cache hit is recomputed.
+
+Outputs:
+    models/candidates/<name>.pkl      Trained candidate models
+    metrics/candidates/<name>/        Reports and figures per candidate
+    metrics/candidates/leaderboard.csv
+
+With --promote the best candidate replaces the current model together
+with its flat forest and lineage files, so serving and incremental training
+see one consistent model.
+
+Usage:
+    python pipeline/run_dag.py
+    python pipeline/run_dag.py --candidates '{"small": {"n_estimators": 50, "max_depth": 5}}'
+    python pipeline/run_dag.py --select-by optimal_cost --promote
+"""
+
+import os
+import json
+import shutil
+import argparse
+import functools
+from dag import Dag
+from cache import DEFAULT_CACHE_DIR, StageCache
+from evaluate import add_evaluation_args
+from instrumentation import add_instrumentation_args, recording
+from lineage import set_lineage_run_id
+from tracking import Tracker, add_tracking_args
+from storage import FORMATS
+
+
+PIPELINE_DIR = os.path.dirname(os.path.abspath(__file__))
+TRAIN_SOURCES = [os.path.join(PIPELINE_DIR, name) for name in ('train.py', 'scoring.py')]
+EVALUATE_SOURCES = [os.path.join(PIPELINE_DIR, name)
+                    for name in ('evaluate.py', 'scoring.py', 'plots.py')]
+
+DEFAULT_HYPERPARAMETERS = {
+    'n_estimators': 100,
+    'max_depth': 10,
+    'min_samples_split': 2,
+    'min_samples_leaf': 1,
+    'random_state': 42,
+}
+DEFAULT_CANDIDATES = {
+    'rf-100-d10': {'n_estimators': 100, 'max_depth': 10},
+    'rf-200-d20': {'n_estimators': 200, 'max_depth': 20},
+    'rf-300-d6-leaf4': {'n_estimators': 300, 'max_depth': 6, 'min_samples_leaf': 4},
+}
+# Leaderboard metric -> whether higher is better
+SELECTION_METRICS = {'roc_auc': True, 'test_f1': True, 'test_recall': True,
+                     'optimal_cost': False}
+PLOTS = ('confusion_matrix', 'roc_curve', 'precision_recall_curve')
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description='Train and evaluate candidate churn models side by side')
+    parser.add_argument('--candidates', type=str, default=None,
+                       help='JSON dict of candidate name to hyperparameters; missing '
+                            'ones take the train.py defaults (defaults to DEFAULT_CANDIDATES)')
+    parser.add_argument('--data-path', type=str, default='data/sample_data.csv',
+                       help='Path to raw data CSV')
+    parser.add_argument('--data-dir', type=str, default='data/processed',
+                       help='Directory to save processed data')
+    parser.add_argument('--format', dest='data_format', choices=sorted(FORMATS),
+                       default='csv', help='On-disk format of the processed data')
+    parser.add_argument('--models-dir', type=str, default='models/candidates',
+                       help='Directory for the candidate models')
+    parser.add_argument('--metrics-dir', type=str, default='metrics/candidates',
+                       help='Directory for the per-candidate reports and the leaderboard')
+    parser.add_argument('--select-by', choices=sorted(SELECTION_METRICS), default='roc_auc',
+                       help='Leaderboard metric used to pick the best candidate')
+    parser.add_argument('--promote', action='store_true',
+                       help='Copy the best candidate to --model-path for serving')
+    parser.add_argument('--model-path', type=str, default='models/churn_model.pkl',
+                       help='Path the best candidate is promoted to')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                       help='Threads running DAG nodes')
+    parser.add_argument('--no-cache', action='store_true',
+                       help='Recompute every node instead of using the stage cache')
+    parser.add_argument('--cache-dir', type=str, default=DEFAULT_CACHE_DIR,
+                       help='Directory of the stage cache')
+    parser.add_argument('--experiment-name', type=str, default='churn-prediction',
+                       help='MLflow experiment name')
+    add_evaluation_args(parser)
+    add_instrumentation_args(parser)
+    add_tracking_args(parser)
+    return parser.parse_args()
+
+
+def candidate_hyperparameters(candidates, workers):
+    """
+    Complete each candidate's hyperparameters with the train.py defaults.
+
+    The fits run concurrently, so each forest gets an even share of the
+    cores instead of all of them.
+
+    Args:
+        candidates: Dict of candidate name to (partial) hyperparameters
+        workers: Threads running DAG nodes
+
+    Returns:
+        dict: Candidate name to hyperparameters
+    """
+    if not candidates:
+        raise ValueError("At least one candidate is required")
+    n_jobs = max(1, (os.cpu_count() or 1) // max(1, min(len(candidates), workers)))
+    result = {}
+    for name, params in candidates.items():
+        unknown = set(params) - set(DEFAULT_HYPERPARAMETERS) - {'n_jobs'}
+        if unknown:
+            raise ValueError(f"Candidate {name}: unknown hyperparameters {sorted(unknown)}")
+        result[name] = dict(DEFAULT_HYPERPARAMETERS, n_jobs=n_jobs, **params)
+    return result
+
+
+def clean(df, report):
+    """preprocess.clean_data with the validation report computed by its own node."""
+    from preprocess import clean_data
+
+    return clean_data(df, report=report)
+
+
+def save_processed(X_train, X_test, y_train, y_test, encoders, scaler, fill_values,
+                   output_dir, data_format, data_path, cache_dir):
+    """
+    preprocess.save_processed_data, recording the raw input in the manifest
+    so train.py and evaluate.py accept the data as current.
+
+    Returns:
+        str: output_dir
+    """
+    from preprocess import preprocess_cache_key, save_processed_data
+    from storage import update_manifest
+
+    save_processed_data(X_train, X_test, y_train, y_test, encoders, scaler,
+                        output_dir, data_format, fill_values)
+    cache_key, params = preprocess_cache_key(StageCache(cache_dir), data_path, None, data_format)
+    update_manifest(output_dir, source_key=cache_key, source=params)
+    return output_dir
+
+
+def summarize(name, hyperparameters, training_time, train_metrics, data, business_metrics):
+    """One leaderboard row for a candidate."""
+    return dict(
+        candidate=name,
+        **{key: value for key, value in hyperparameters.items() if key != 'n_jobs'},
+        training_time=training_time,
+        roc_auc=data['roc']['auc'],
+        test_f1=train_metrics['test_f1'],
+        test_recall=train_metrics['test_recall'],
+        test_precision=train_metrics['test_precision'],
+        cost=business_metrics['cost'],
+        optimal_threshold=business_metrics['optimal_threshold'],
+        optimal_cost=business_metrics['optimal_cost'],
+    )
+
+
+def write_leaderboard(output_path, select_by, *rows):
+    """
+    Rank the candidates and save the leaderboard as CSV.
+
+    Returns:
+        DataFrame: Leaderboard, best candidate first
+    """
+    import pandas as pd
+
+    leaderboard = pd.DataFrame(list(rows)).sort_values(
+        select_by, ascending=not SELECTION_METRICS[select_by]).reset_index(drop=True)
+    leaderboard.to_csv(output_path, index=False)
+
+    print("\n" + "=" * 60)
+    print(f"CANDIDATE LEADERBOARD (by {select_by})")
+    print("=" * 60)
+    print(leaderboard[['candidate', 'roc_auc', 'test_f1', 'optimal_cost',
+                       'training_time']].to_string(index=False))
+    print(f"Leaderboard saved to {output_path}")
+    return leaderboard
+
+
+def build_dag(candidates, plots=True):
+    """
+    Declare the churn pipeline with one train/evaluate branch per candidate.
+
+    Initial values: data_path, data_dir, data_format, cache_dir, threshold,
+    contact_cost, churn_cost, select_by, leaderboard_path and, per
+    candidate c, 'hyperparameters[c]', 'model_path[c]' and 'output_dir[c]'.
+
+    Args:
+        candidates: Candidate names
+        plots: Render the PNG figures
+
+    Returns:
+        Dag
+    """
+    from preprocess import (
+        PREPROCESS_SOURCES, compute_fill_values, encode_features, load_data,
+        split_data, validate_data
+    )
+    from train import evaluate_model, save_model, train_model
+    from evaluate import (
+        calculate_business_metrics, generate_classification_report,
+        generate_threshold_table, predict_churn, save_business_metrics
+    )
+    from plots import curve_data, render_plot, write_curve_data
+    from scoring import ThresholdCurve
+
+    dag = Dag()
+    splits = ['X_train', 'X_test', 'y_train', 'y_test']
+
+    # Preprocessing: shared by every candidate
+    dag.add('load_data', load_data, ['data_path'], ['raw'],
+            file_inputs=['data_path'], sources=PREPROCESS_SOURCES)
+    dag.add('validate_data', validate_data, ['raw'], ['validation_report'])
+    dag.add('compute_fill_values', compute_fill_values, ['raw'], ['fill_values'], cache=True,
+            sources=PREPROCESS_SOURCES)
+    dag.add('clean_data', clean, ['raw', 'validation_report'], ['clean'],
+            sources=PREPROCESS_SOURCES)
+    dag.add('encode_features', encode_features, ['clean'], ['encoded', 'encoders', 'scaler'],
+            cache=True, sources=PREPROCESS_SOURCES)
+    dag.add('split_data', split_data, ['encoded'], splits, cache=True,
+            sources=PREPROCESS_SOURCES)
+    dag.add('save_processed_data', save_processed,
+            splits + ['encoders', 'scaler', 'fill_values', 'data_dir', 'data_format',
+                      'data_path', 'cache_dir'], ['processed_dir'])
+
+    rows = []
+    for name in candidates:
+        def value(key):
+            return f'{key}[{name}]'
+
+        # Training
+        dag.add(value('train_model'), train_model,
+                ['X_train', 'y_train', value('hyperparameters')],
+                [value('model'), value('training_time')], cache=True, sources=TRAIN_SOURCES)
+        dag.add(value('evaluate_model'), evaluate_model,
+                [value('model')] + ['X_train', 'y_train', 'X_test', 'y_test'],
+                [value('train_metrics')], cache=True, sources=TRAIN_SOURCES)
+        dag.add(value('save_model'), save_model, [value('model'), value('model_path')],
+                [value('model_file')])
+
+        # Evaluation: one prediction, one curve, then independent reports
+        dag.add(value('predict'), predict_churn, [value('model'), 'X_test', 'threshold'],
+                [value('y_pred'), value('y_pred_proba')], cache=True, sources=EVALUATE_SOURCES)
+        dag.add(value('threshold_curve'), ThresholdCurve, ['y_test', value('y_pred_proba')],
+                [value('curve')])
+        dag.add(value('curve_data'), curve_data, [value('curve'), 'threshold'],
+                [value('curve_data')])
+        dag.add(value('write_curve_data'), write_curve_data,
+                [value('curve_data'), value('output_dir')], [value('curves_file')])
+        if plots:
+            for plot in PLOTS:
+                dag.add(value(plot), functools.partial(render_plot, plot),
+                        [value('curve_data'), value('output_dir')], [value(f'{plot}_file')],
+                        executor='process')
+        dag.add(value('classification_report'), generate_classification_report,
+                ['y_test', value('y_pred'), value('output_dir'), value('curve'), 'threshold'],
+                [value('report_file'), value('report')])
+        dag.add(value('business_metrics'), calculate_business_metrics,
+                ['y_test', value('y_pred'), value('y_pred_proba'), value('curve'),
+                 'threshold', 'contact_cost', 'churn_cost'], [value('business_metrics')])
+        dag.add(value('save_business_metrics'), save_business_metrics,
+                [value('business_metrics'), value('output_dir')],
+                [value('business_metrics_file')])
+        dag.add(value('threshold_table'), generate_threshold_table,
+                [value('curve'), value('output_dir'), 'contact_cost', 'churn_cost'],
+                [value('threshold_table_file'), value('threshold_table')])
+
+        dag.add(value('summarize'), functools.partial(summarize, name),
+                [value('hyperparameters'), value('training_time'), value('train_metrics'),
+                 value('curve_data'), value('business_metrics')], [value('summary')],
+                executor='inline')
+        rows.append(value('summary'))
+
+    dag.add('leaderboard', write_leaderboard, ['leaderboard_path', 'select_by'] + rows,
+            ['leaderboard'], executor='inline')
+    return dag
+
+
+def log_candidates(run, candidates, values):
+    """Log each candidate to its own child run."""
+    for name, hyperparameters in candidates.items():
+        def value(key):
+            return values.get(f'{key}[{name}]')
+
+        with run.child(name) as child:
+            child.log_params(hyperparameters)
+            child.log_metric('training_time', value('training_time'))
+            child.log_metrics(value('train_metrics'))
+            child.log_metric('roc_auc', value('curve_data')['roc']['auc'])
+            business_metrics = value('business_metrics')
+            child.log_metrics({key: business_metrics[key] for key in (
+                'churn_detection_rate', 'false_alarm_rate', 'optimal_threshold',
+                'optimal_cost')})
+            for key in ['curves_file', 'report_file', 'business_metrics_file',
+                        'threshold_table_file'] + [f'{plot}_file' for plot in PLOTS]:
+                if value(key) is not None:
+                    child.log_artifact(value(key))
+
+
+def check_model_files(model_path, X_sample):
+    """
+    Make sure the files next to a model all belong to it.
+
+    Args:
+        model_path: Joblib model
+        X_sample: A few feature rows the flat forest must predict like the model
+
+    Raises:
+        ValueError: If the flat forest or the lineage describe another model
+    """
+    import joblib
+    import numpy as np
+    from forest import FlatForest, forest_path_for
+    from lineage import check_lineage, read_lineage
+
+    model = joblib.load(model_path)
+    forest_path = forest_path_for(model_path)
+    if hasattr(model, 'estimators_'):
+        if not os.path.exists(forest_path):
+            raise ValueError(f"{model_path} has no flat forest at {forest_path}")
+        forest = FlatForest.load(forest_path)
+        if forest.n_estimators != len(model.estimators_) or not np.allclose(
+                forest.predict_proba(X_sample), model.predict_proba(X_sample)):
+            raise ValueError(f"{forest_path} does not match {model_path}")
+    elif os.path.exists(forest_path):
+        raise ValueError(f"Stale flat forest {forest_path} next to {model_path}")
+
+    lineage = read_lineage(model_path)
+    if lineage is not None:
+        check_lineage(model_path, lineage)
+
+
+def promote_model(candidate_path, model_path, data_dir, run, rows_trained, X_sample):
+    """
+    Make a candidate the current model, with the files that belong to it.
+
+    The pickle is copied, the flat forest is exported from it (a stale one
+    is removed for other models) and its lineage is recorded against the
+    processed data it was trained on. Lineage that cannot be recorded is
+    removed rather than left describing the previous model.
+
+    Args:
+        candidate_path: The candidate's model file
+        model_path: Path of the current model
+        data_dir: Processed data the candidate was trained on
+        run: tracking.Run to record the lineage in
+        rows_trained: Number of training rows
+        X_sample: Feature rows used to check the promoted files
+
+    Raises:
+        ValueError: If the promoted files do not all belong to the candidate
+    """
+    import joblib
+    from forest import forest_path_for, save_flat_forest
+    from lineage import file_sha256, read_lineage, remove_lineage
+    from train import record_full_lineage
+
+    os.makedirs(os.path.dirname(model_path) or '.', exist_ok=True)
+    tmp_path = f'{model_path}.{os.getpid()}.tmp'
+    shutil.copyfile(candidate_path, tmp_path)
+    os.replace(tmp_path, model_path)
+
+    model = joblib.load(model_path)
+    forest_path = forest_path_for(model_path)
+    if hasattr(model, 'estimators_'):
+        save_flat_forest(model, forest_path)
+    elif os.path.exists(forest_path):
+        os.remove(forest_path)
+
+    record_full_lineage(model, model_path, data_dir, run, rows_trained)
+    lineage = read_lineage(model_path)
+    if lineage is None or lineage['model_sha256'] != file_sha256(model_path):
+        remove_lineage(model_path)
+
+    check_model_files(model_path, X_sample)
+
+
+def main():
+    """Train and evaluate the candidates and rank them."""
+    args = parse_args()
+    candidates = candidate_hyperparameters(
+        json.loads(args.candidates) if args.candidates else DEFAULT_CANDIDATES, args.workers)
+
+    print("=" * 60)
+    print(f"STARTING CANDIDATE PIPELINE ({len(candidates)} candidates, "
+          f"{args.workers} workers)")
+    print("=" * 60)
+
+    values = {
+        'data_path': args.data_path,
+        'data_dir': args.data_dir,
+        'data_format': args.data_format,
+        'cache_dir': args.cache_dir,
+        'threshold': args.threshold,
+        'contact_cost': args.contact_cost,
+        'churn_cost': args.churn_cost,
+        'select_by': args.select_by,
+        'leaderboard_path': os.path.join(args.metrics_dir, 'leaderboard.csv'),
+    }
+    for name, hyperparameters in candidates.items():
+        values[f'hyperparameters[{name}]'] = hyperparameters
+        values[f'model_path[{name}]'] = os.path.join(args.models_dir, f'{name}.pkl')
+        values[f'output_dir[{name}]'] = os.path.join(args.metrics_dir, name)
+        os.makedirs(values[f'output_dir[{name}]'], exist_ok=True)
+
+    mlflow_uri = os.getenv('MLFLOW_TRACKING_URI', 'http://mlflow:5000')
+    print(f"\nMLflow Tracking URI: {mlflow_uri} ({args.tracking_mode} logging)")
+    tracker = Tracker(args.experiment_name, mlflow_uri, spool_dir=args.spool_dir,
+                      mode=args.tracking_mode)
+
+    dag = build_dag(candidates, plots=not args.no_plots)
+    cache = None if args.no_cache else StageCache(args.cache_dir)
+    with tracker, tracker.start_run(run_name='candidates') as run, recording(
+            'dag', args.profile, args.trace_memory, args.prom_textfile_dir, run=run):
+        run.log_params({'candidates': ','.join(candidates), 'select_by': args.select_by})
+        values = dag.run(values, max_workers=args.workers,
+                         process_workers=min(args.plot_workers, len(PLOTS)), cache=cache)
+        if cache is not None:
+            cache.evict()
+        dag.print_summary()
+
+        log_candidates(run, candidates, values)
+        leaderboard = values['leaderboard']
+        best = leaderboard.iloc[0]
+        run.log_params({'best_candidate': best['candidate']})
+        run.log_metric(f'best_{args.select_by}', float(best[args.select_by]))
+        run.log_artifact(values['leaderboard_path'])
+
+        print(f"\nBest candidate by {args.select_by}: {best['candidate']} "
+              f"({best[args.select_by]:.4f})")
+        if args.promote:
+            promote_model(values[f"model_path[{best['candidate']}]"], args.model_path,
+                          args.data_dir, run, len(values['X_train']), values['X_test'][:100])
+            print(f"Promoted {best['candidate']} to {args.model_path}")
+
+    if args.promote:
+        # The promoted model's lineage names this run, known once synced
+        set_lineage_run_id(args.model_path, run.key, run.run_id)
+
+    print(f"\nMLflow Run ID: {run.run_id or 'pending sync'}")
+    print(f"View results at: {mlflow_uri}")
+
+
+if __name__ == '__main__':
+    main()
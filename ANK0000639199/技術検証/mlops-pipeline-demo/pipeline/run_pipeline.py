@@ -0,0 +1,183 @@
+"""
+Pipeline Runner
+
+This module runs preprocessing, training and evaluation in one process. The
+processed DataFrames and the fitted model are handed from stage to stage in
+memory, so the data is read once, the model is never reloaded, and the
+interpreter and imports start only once.
+
+Every stage still writes its usual artifacts (data/processed, the model file
+and the metrics directory), so a run can resume from any stage: the earlier
+stages are skipped and their outputs are read from disk instead.
+
+Usage:
+    python pipeline/run_pipeline.py
+    python pipeline/run_pipeline.py --from-stage train --n-estimators 200
+    python pipeline/run_pipeline.py --from-stage evaluate --threshold 0.3
+"""
+
+import os
+import argparse
+from train import add_hyperparameter_args, hyperparameters_from_args
+from evaluate import add_evaluation_args
+from instrumentation import add_instrumentation_args, recording, span
+from lineage import set_lineage_run_id
+from tracking import Tracker, add_tracking_args
+from storage import FORMATS
+
+
+STAGES = ['preprocess', 'train', 'evaluate']
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Run the churn pipeline in one process')
+    parser.add_argument('--from-stage', choices=STAGES, default=STAGES[0],
+                       help='First stage to run; earlier outputs are read from disk')
+    parser.add_argument('--to-stage', choices=STAGES, default=STAGES[-1],
+                       help='Last stage to run')
+    parser.add_argument('--data-path', type=str, default='data/sample_data.csv',
+                       help='Path to raw data CSV')
+    parser.add_argument('--data-dir', type=str, default='data/processed',
+                       help='Directory of the processed data')
+    parser.add_argument('--chunksize', type=int, default=None,
+                       help='Stream the CSV in chunks of this many rows (the processed '
+                            'data is then re-read from disk for training)')
+    parser.add_argument('--format', dest='data_format', choices=sorted(FORMATS),
+                       default='csv', help='On-disk format of the processed data')
+    parser.add_argument('--no-cache', action='store_true',
+                       help='Always recompute preprocessing instead of using the stage cache')
+    parser.add_argument('--model-path', type=str, default='models/churn_model.pkl',
+                       help='Path of the trained model')
+    parser.add_argument('--metrics-dir', type=str, default='metrics',
+                       help='Directory to save evaluation results')
+    parser.add_argument('--experiment-name', type=str, default='churn-prediction',
+                       help='MLflow experiment name')
+    add_hyperparameter_args(parser)
+    add_evaluation_args(parser)
+    add_instrumentation_args(parser)
+    add_tracking_args(parser)
+    args = parser.parse_args()
+    if STAGES.index(args.from_stage) > STAGES.index(args.to_stage):
+        parser.error(f'--from-stage {args.from_stage} comes after --to-stage {args.to_stage}')
+    return args
+
+
+def load_test_data(data_dir):
+    """
+    Read the test split from disk (resuming at evaluation).
+
+    Returns:
+        tuple: (X_test, y_test)
+    """
+    from preprocess import ensure_processed_data
+    from storage import load_dataset
+
+    ensure_processed_data(data_dir)
+    datasets = load_dataset(data_dir, names=['X_test', 'y_test'])
+    return datasets['X_test'], datasets['y_test']
+
+
+def load_model(model_path):
+    """Load the model written by an earlier train stage (resuming at evaluation)."""
+    from forest import load_model as load_model_file
+
+    if not os.path.exists(model_path):
+        raise ValueError(f"No trained model at {model_path}; "
+                         f"run the pipeline from the train stage first")
+    print(f"Loading model from {model_path}...")
+    return load_model_file(model_path)
+
+
+def run_stages(stages, args, run):
+    """
+    Run the selected stages, passing their outputs along in memory.
+
+    Each stage logs to its own child run below run.
+
+    Args:
+        stages: Stage names to run, in pipeline order
+        args: Parsed command line arguments
+        run: tracking.Run of the whole pipeline
+
+    Returns:
+        dict: Outputs of the stages ('datasets', 'model', 'business_metrics',
+            'train_run')
+    """
+    outputs = {'datasets': None, 'model': None, 'business_metrics': None, 'train_run': None}
+
+    if 'preprocess' in stages:
+        from preprocess import preprocess_data
+
+        with span('preprocess'), run.child('preprocess'):
+            result = preprocess_data(args.data_path, args.data_dir, chunksize=args.chunksize,
+                                     data_format=args.data_format,
+                                     use_cache=not args.no_cache)
+            # Streaming mode only reports row counts; its data stays on disk
+            if not args.chunksize:
+                outputs['datasets'] = result
+
+    if 'train' in stages:
+        from train import load_processed_data, run_training
+
+        with span('train'), run.child('train') as stage_run:
+            outputs['train_run'] = stage_run
+            if outputs['datasets'] is None:
+                with span('load') as load_span:
+                    outputs['datasets'] = load_processed_data(args.data_dir)
+                    load_span.rows = len(outputs['datasets'][0]) + len(outputs['datasets'][1])
+            outputs['model'], _ = run_training(*outputs['datasets'],
+                                               hyperparameters_from_args(args), stage_run,
+                                               args.model_path, args.data_dir)
+
+    if 'evaluate' in stages:
+        from evaluate import run_evaluation
+
+        with span('evaluate'), run.child('evaluation') as stage_run:
+            with span('load'):
+                if outputs['model'] is None:
+                    outputs['model'] = load_model(args.model_path)
+                if outputs['datasets'] is None:
+                    X_test, y_test = load_test_data(args.data_dir)
+                else:
+                    _, X_test, _, y_test = outputs['datasets']
+            outputs['business_metrics'] = run_evaluation(
+                outputs['model'], X_test, y_test, stage_run, args.metrics_dir, args.threshold,
+                args.contact_cost, args.churn_cost, not args.no_plots, args.plot_workers
+            )
+
+    return outputs
+
+
+def main():
+    """Run the pipeline stages in this process."""
+    args = parse_args()
+    stages = STAGES[STAGES.index(args.from_stage):STAGES.index(args.to_stage) + 1]
+
+    print("=" * 60)
+    print(f"STARTING PIPELINE ({' -> '.join(stages)})")
+    print("=" * 60)
+
+    mlflow_uri = os.getenv('MLFLOW_TRACKING_URI', 'http://mlflow:5000')
+    print(f"\nMLflow Tracking URI: {mlflow_uri} ({args.tracking_mode} logging)")
+    tracker = Tracker(args.experiment_name, mlflow_uri, spool_dir=args.spool_dir,
+                      mode=args.tracking_mode)
+
+    with tracker, tracker.start_run(run_name='pipeline') as run, recording(
+            'pipeline', args.profile, args.trace_memory, args.prom_textfile_dir, run=run):
+        run.log_params({'stages': ','.join(stages)})
+        outputs = run_stages(stages, args, run)
+
+    # The lineage was recorded by the train stage's run, known once synced
+    if outputs['train_run'] is not None:
+        set_lineage_run_id(args.model_path, outputs['train_run'].key,
+                           outputs['train_run'].run_id)
+    print("\n" + "=" * 60)
+    print("PIPELINE COMPLETED SUCCESSFULLY")
+    print("=" * 60)
+    print(f"\nMLflow Run ID: {run.run_id or 'pending sync'}")
+    print(f"View results at: {mlflow_uri}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,272 @@
+"""
+Scoring Module
+
+This module derives every binary classification metric the pipeline reports
+from one sort of the predicted probabilities. Cumulative true/false positive
+counts at each distinct score give the confusion matrix at any threshold,
+the ROC and precision-recall curves, the classification report and a
+business cost table, without re-scanning the labels per metric.
+"""
+
+import numpy as np
+
+
+CLASS_NAMES = ['No Churn', 'Churn']
+
+DEFAULT_CONTACT_COST = 10.0
+DEFAULT_CHURN_COST = 100.0
+
+
+def _safe_divide(numerator, denominator):
+    """Elementwise division that returns 0 where the denominator is 0 (like sklearn)."""
+    numerator = np.asarray(numerator, dtype=np.float64)
+    denominator = np.asarray(denominator, dtype=np.float64)
+    out = np.zeros(np.broadcast(numerator, denominator).shape)
+    np.divide(numerator, denominator, out=out, where=denominator != 0)
+    return out
+
+
+def confusion_counts(y_true, y_pred):
+    """
+    Confusion matrix of binary labels in one pass.
+
+    Returns:
+        tuple: (tn, fp, fn, tp)
+    """
+    codes = 2 * np.asarray(y_true, dtype=np.int64) + np.asarray(y_pred, dtype=np.int64)
+    tn, fp, fn, tp = np.bincount(codes, minlength=4)
+    return int(tn), int(fp), int(fn), int(tp)
+
+
+def binary_metrics(tn, fp, fn, tp):
+    """
+    Accuracy, precision, recall and F1 of the positive class.
+
+    Works on scalars or on arrays of counts (one entry per threshold).
+    """
+    precision = _safe_divide(tp, tp + fp)
+    recall = _safe_divide(tp, tp + fn)
+    return {
+        'accuracy': _safe_divide(tp + tn, tn + fp + fn + tp),
+        'precision': precision,
+        'recall': recall,
+        'f1': _safe_divide(2 * precision * recall, precision + recall),
+    }
+
+
+class ThresholdCurve:
+    """
+    Confusion counts at every threshold of one set of predicted scores.
+
+    Scores are sorted once in descending order; tps[i] and fps[i] count
+    the positives and negatives scoring at least thresholds[i]. The counts
+    at any other threshold are found by binary search.
+
+    Args:
+        y_true: Binary labels
+        y_score: Predicted probability of the positive class
+    """
+
+    def __init__(self, y_true, y_score):
+        y_true = np.asarray(y_true).astype(bool, copy=False)
+        y_score = np.asarray(y_score, dtype=np.float64)
+        if y_true.shape != y_score.shape:
+            raise ValueError(f"y_true and y_score differ in shape: "
+                             f"{y_true.shape} vs {y_score.shape}")
+
+        order = np.argsort(y_score, kind='stable')[::-1]
+        scores = y_score[order]
+        # Last index of each run of equal scores
+        last = np.r_[np.flatnonzero(np.diff(scores)), len(scores) - 1] if len(scores) else \
+            np.empty(0, dtype=np.int64)
+
+        self.thresholds = scores[last]
+        self.tps = np.cumsum(y_true[order], dtype=np.int64)[last]
+        self.fps = last + 1 - self.tps
+        self.n_samples = len(y_score)
+        self.positives = int(self.tps[-1]) if len(last) else 0
+        self.negatives = self.n_samples - self.positives
+
+    def counts(self, threshold=0.5, inclusive=False):
+        """
+        Confusion counts when predicting positive above threshold.
+
+        By default a score equal to the threshold is negative, which
+        matches predict() of a binary classifier at 0.5 (argmax prefers
+        the first class on ties).
+
+        Returns:
+            tuple: (tn, fp, fn, tp)
+        """
+        # thresholds is descending; count the distinct scores passing
+        side = 'right' if inclusive else 'left'
+        n_passing = np.searchsorted(-self.thresholds, -threshold, side=side)
+        tp = int(self.tps[n_passing - 1]) if n_passing else 0
+        fp = int(self.fps[n_passing - 1]) if n_passing else 0
+        return self.negatives - fp, fp, self.positives - tp, tp
+
+    def metrics(self, threshold=0.5):
+        """Accuracy, precision, recall and F1 at threshold."""
+        return {name: float(value)
+                for name, value in binary_metrics(*self.counts(threshold)).items()}
+
+    def roc_curve(self, drop_intermediate=True):
+        """
+        ROC curve over the distinct thresholds.
+
+        Args:
+            drop_intermediate: Drop points on straight segments (they do
+                not change the curve), like sklearn.metrics.roc_curve
+
+        Returns:
+            tuple: (fpr, tpr, thresholds), starting at (0, 0) with an
+            infinite threshold
+        """
+        tps, fps, thresholds = self.tps, self.fps, self.thresholds
+        if drop_intermediate and len(tps) > 2:
+            keep = np.r_[True, np.logical_or(np.diff(fps, 2), np.diff(tps, 2)), True]
+            tps, fps, thresholds = tps[keep], fps[keep], thresholds[keep]
+        tps, fps = np.r_[0, tps], np.r_[0, fps]
+        return (_safe_divide(fps, self.negatives), _safe_divide(tps, self.positives),
+                np.r_[np.inf, thresholds])
+
+    def roc_auc(self):
+        """Area under the ROC curve (trapezoidal rule)."""
+        fpr, tpr, _ = self.roc_curve(drop_intermediate=False)
+        return float(np.sum(np.diff(fpr) * (tpr[1:] + tpr[:-1])) / 2)
+
+    def precision_recall_curve(self, drop_intermediate=False):
+        """
+        Precision-recall curve like sklearn.metrics.precision_recall_curve.
+
+        Args:
+            drop_intermediate: Keep only the first and last point of each
+                run of equal recall (vertical segments), for plotting
+
+        Returns:
+            tuple: (precision, recall, thresholds) with increasing
+            thresholds and a final (precision=1, recall=0) point
+        """
+        tps, fps, thresholds = self.tps, self.fps, self.thresholds
+        if drop_intermediate and len(tps) > 2:
+            keep = np.r_[True, np.logical_or(np.diff(tps[:-1]), np.diff(tps[1:])), True]
+            tps, fps, thresholds = tps[keep], fps[keep], thresholds[keep]
+        precision = _safe_divide(tps, tps + fps)
+        recall = _safe_divide(tps, self.positives)
+        return np.r_[precision[::-1], 1.0], np.r_[recall[::-1], 0.0], thresholds[::-1]
+
+    def classification_report(self, threshold=0.5, target_names=CLASS_NAMES):
+        """
+        Per-class precision/recall/F1 in sklearn's output_dict layout.
+
+        Returns:
+            dict: Keyed by class name, 'accuracy', 'macro avg' and 'weighted avg'
+        """
+        tn, fp, fn, tp = self.counts(threshold)
+        positive = binary_metrics(tn, fp, fn, tp)
+        # The negative class is the positive class with the roles swapped
+        negative = binary_metrics(tp, fn, fp, tn)
+        # sklearn reports supports as floats in output_dict
+        supports = [float(self.negatives), float(self.positives)]
+
+        report = {}
+        for name, scores, support in zip(target_names, [negative, positive], supports):
+            report[name] = {'precision': float(scores['precision']),
+                            'recall': float(scores['recall']),
+                            'f1-score': float(scores['f1']), 'support': support}
+        report['accuracy'] = float(positive['accuracy'])
+        for avg, weights in (('macro avg', [1, 1]), ('weighted avg', supports)):
+            total = sum(weights)
+            report[avg] = {key: float(sum(w * report[name][key]
+                                          for w, name in zip(weights, target_names)) / total)
+                           if total else 0.0
+                           for key in ('precision', 'recall', 'f1-score')}
+            report[avg]['support'] = float(self.n_samples)
+        return report
+
+    def threshold_table(self, contact_cost=DEFAULT_CONTACT_COST,
+                        churn_cost=DEFAULT_CHURN_COST, thresholds=None):
+        """
+        Business outcome of flagging customers at each threshold.
+
+        Customers scoring above the threshold are flagged, like counts(),
+        predict_churn() and the serving API, so a threshold from this table
+        can be passed to --threshold as is. Every flagged customer costs
+        contact_cost (retention outreach) and every missed
+        churner costs churn_cost. All rows are computed from the
+        cumulative counts at once.
+
+        Args:
+            contact_cost: Cost of contacting one flagged customer
+            churn_cost: Cost of one churner that was not flagged
+            thresholds: Thresholds to tabulate (defaults to every distinct
+                score, which is where the optimum lies, plus -inf for
+                flagging everyone)
+
+        Returns:
+            dict: Column name to array, one entry per threshold
+        """
+        if thresholds is None:
+            # Flagging nobody, then the top 1, 2, ... distinct scores: scores
+            # > t for t at each distinct score and below the lowest one
+            tps = np.r_[0, self.tps]
+            fps = np.r_[0, self.fps]
+            thresholds = np.r_[self.thresholds, -np.inf]
+        else:
+            thresholds = np.asarray(thresholds, dtype=np.float64)
+            n_passing = np.searchsorted(-self.thresholds, -thresholds, side='left')
+            tps = np.r_[0, self.tps][n_passing]
+            fps = np.r_[0, self.fps][n_passing]
+
+        fns = self.positives - tps
+        tns = self.negatives - fps
+        scores = binary_metrics(tns, fps, fns, tps)
+        return {
+            'threshold': thresholds,
+            'flagged': tps + fps,
+            'true_positives': tps,
+            'false_positives': fps,
+            'missed_churners': fns,
+            'precision': scores['precision'],
+            'recall': scores['recall'],
+            'f1': scores['f1'],
+            'false_alarm_rate': _safe_divide(fps, self.negatives),
+            'cost': (tps + fps) * contact_cost + fns * churn_cost,
+        }
+
+    def optimal_threshold(self, contact_cost=DEFAULT_CONTACT_COST,
+                          churn_cost=DEFAULT_CHURN_COST):
+        """
+        Threshold with the lowest business cost.
+
+        Returns:
+            tuple: (threshold, cost); customers scoring above the
+            threshold are flagged
+        """
+        table = self.threshold_table(contact_cost, churn_cost)
+        best = int(np.argmin(table['cost']))
+        return float(table['threshold'][best]), float(table['cost'][best])
+
+
+def format_classification_report(report, target_names=CLASS_NAMES, digits=2):
+    """Render a classification_report() dict as text, like sklearn's report."""
+    width = max(len(name) for name in target_names + ['weighted avg'])
+
+    def row(name, values, support):
+        cells = ''.join(f' {value:>9.{digits}f}' if value != '' else f" {'':>9}"
+                        for value in values)
+        return f'{name:>{width}} {cells} {int(support):>9}'
+
+    lines = [f"{'':>{width}} " + ''.join(f' {header:>9}' for header in
+                                         ('precision', 'recall', 'f1-score', 'support')), '']
+    for name in target_names:
+        scores = report[name]
+        lines.append(row(name, [scores['precision'], scores['recall'], scores['f1-score']],
+                         scores['support']))
+    lines.append('')
+    lines.append(row('accuracy', ['', '', report['accuracy']], report['macro avg']['support']))
+    for name in ('macro avg', 'weighted avg'):
+        scores = report[name]
+        lines.append(row(name, [scores['precision'], scores['recall'], scores['f1-score']],
+                         scores['support']))
+    return '\n'.join(lines) + '\n'
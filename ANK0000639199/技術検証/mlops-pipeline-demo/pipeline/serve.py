@@ -0,0 +1,322 @@
+"""
+Model Serving Module
+
+This module serves the trained churn model over HTTP. The model and the
+ChurnTransform written by preprocessing are loaded once at startup; raw
+customer records go through the same transform as the training data, and
+concurrent requests are coalesced into micro-batches for predict_proba.
+
+The development server is started with `python pipeline/serve.py`; for
+production, gunicorn runs several workers (see gunicorn.conf.py):
+
+    gunicorn -c pipeline/gunicorn.conf.py 'serve:app_from_env()'
+"""
+
+import os
+import time
+import queue
+import argparse
+import threading
+import warnings
+from concurrent.futures import Future
+import numpy as np
+import joblib
+from flask import Flask, jsonify, request
+from prometheus_client import (
+    Counter, Histogram, Gauge, CollectorRegistry, generate_latest, multiprocess, REGISTRY
+)
+from transform import FEATURE_COLUMNS, NUMERICAL_COLUMNS, ChurnTransform
+from forest import load_model
+
+
+# Batches are built as plain arrays in the model's feature order
+warnings.filterwarnings('ignore', message='X does not have valid feature names')
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.0075, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+# Prometheus Metrics
+REQUEST_COUNT = Counter(
+    'churn_serving_requests_total',
+    'Total prediction requests',
+    ['endpoint', 'status']
+)
+
+REQUEST_DURATION = Histogram(
+    'churn_serving_request_duration_seconds',
+    'Prediction request latency in seconds',
+    ['endpoint'],
+    buckets=LATENCY_BUCKETS
+)
+
+BATCH_SIZE = Histogram(
+    'churn_serving_batch_size',
+    'Number of records scored per predict_proba call',
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+)
+
+INFERENCE_DURATION = Histogram(
+    'churn_serving_inference_duration_seconds',
+    'predict_proba latency per micro-batch in seconds',
+    buckets=LATENCY_BUCKETS
+)
+
+QUEUE_DEPTH = Gauge(
+    'churn_serving_queue_depth',
+    'Records waiting to be batched',
+    multiprocess_mode='livesum'
+)
+
+
+def check_record(record, feature_columns=FEATURE_COLUMNS):
+    """
+    Reject records the transform cannot score.
+
+    Unknown categories are fine (they map to the transform's unknown
+    bucket), but every field must be present, numbers must be numeric and
+    categories must be strings (or null).
+
+    Raises:
+        ValueError: On missing fields or values of the wrong type
+    """
+    for col in feature_columns:
+        if col not in record:
+            raise ValueError(f"Missing field: {col}")
+        if col in NUMERICAL_COLUMNS:
+            try:
+                float(record[col])
+            except (TypeError, ValueError):
+                raise ValueError(f"{col} must be numeric, got {record[col]!r}")
+        elif record[col] is not None and not isinstance(record[col], str):
+            raise ValueError(f"{col} must be a string, got {record[col]!r}")
+
+
+def forest_predict_proba(model, X):
+    """
+    predict_proba for tree ensembles without joblib dispatch overhead.
+
+    RandomForestClassifier.predict_proba spends several milliseconds per
+    call scheduling trees even with n_jobs=1; walking the fitted trees
+    directly gives the same averaged probabilities at a fraction of that
+    cost for small batches. Other models fall back to predict_proba.
+    """
+    estimators = getattr(model, 'estimators_', None)
+    if not estimators or not all(hasattr(est, 'tree_') for est in estimators):
+        return model.predict_proba(X)
+
+    X = np.ascontiguousarray(X, dtype=np.float32)
+    total = 0.0
+    for est in estimators:
+        proba = est.tree_.predict(X)
+        # Older sklearn stores class counts in the leaves; normalize per tree
+        total = total + proba / proba.sum(axis=1, keepdims=True)
+    return total / len(estimators)
+
+
+class MicroBatcher:
+    """
+    Coalesce concurrent prediction requests into micro-batches.
+
+    Request threads submit transformed rows and wait on a Future. A single
+    worker thread takes the first waiting row, keeps collecting until
+    max_batch_size rows are gathered or max_wait_ms has passed, and scores
+    the whole batch with one predict_proba call.
+    """
+
+    def __init__(self, model, max_batch_size=64, max_wait_ms=2.0):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, rows):
+        """Queue transformed rows; returns a Future resolving to their churn probabilities."""
+        future = Future()
+        self._queue.put((rows, future))
+        QUEUE_DEPTH.inc(len(rows))
+        return future
+
+    def _collect(self):
+        """Block for the first item, then gather more until the batch is full or times out."""
+        items = [self._queue.get()]
+        size = len(items[0][0])
+        deadline = time.perf_counter() + self.max_wait
+        while size < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            items.append(item)
+            size += len(item[0])
+        return items, size
+
+    def _run(self):
+        while True:
+            items, size = self._collect()
+            QUEUE_DEPTH.dec(size)
+            try:
+                X = np.vstack([rows for rows, _ in items])
+                start_time = time.perf_counter()
+                proba = forest_predict_proba(self.model, X)[:, 1]
+                INFERENCE_DURATION.observe(time.perf_counter() - start_time)
+                BATCH_SIZE.observe(size)
+            except Exception as exc:  # propagate to every waiting request
+                for _, future in items:
+                    future.set_exception(exc)
+                continue
+
+            offset = 0
+            for rows, future in items:
+                future.set_result(proba[offset:offset + len(rows)])
+                offset += len(rows)
+
+
+def load_artifacts(model_path='models/churn_model.pkl', data_dir='data/processed'):
+    """
+    Load the trained model and the fitted preprocessing transform.
+
+    Args:
+        model_path: Path to trained model (a .forest file loads memory-mapped
+            without scikit-learn)
+        data_dir: Directory containing transform.npz (or, for data
+            processed before it existed, encoders.pkl and scaler.pkl)
+
+    Returns:
+        tuple: (model, ChurnTransform)
+    """
+    print(f"Loading model from {model_path}...")
+    model = load_model(model_path)
+    # Micro-batches are small; joblib's thread pool costs more than it saves
+    if hasattr(model, 'n_jobs'):
+        model.set_params(n_jobs=1)
+
+    feature_columns = list(getattr(model, 'feature_names_in_', FEATURE_COLUMNS))
+    transform_path = os.path.join(data_dir, 'transform.npz')
+    if os.path.exists(transform_path):
+        transform = ChurnTransform.load(transform_path)
+    else:
+        transform = ChurnTransform.from_encoders(joblib.load(f'{data_dir}/encoders.pkl'),
+                                                 joblib.load(f'{data_dir}/scaler.pkl'),
+                                                 feature_columns=feature_columns)
+    if transform.feature_columns != feature_columns:
+        raise ValueError(f"Transform columns {transform.feature_columns} do not match "
+                         f"model features {feature_columns}")
+    print(f"Model loaded: {type(model).__name__}")
+    return model, transform
+
+
+def create_app(model_path='models/churn_model.pkl', data_dir='data/processed',
+               max_batch_size=64, max_wait_ms=2.0, threshold=0.5):
+    """
+    Build the Flask serving application.
+
+    Args:
+        model_path: Path to trained model
+        data_dir: Directory containing the preprocessing artifacts
+        max_batch_size: Maximum records per predict_proba call
+        max_wait_ms: Maximum time to wait for a batch to fill
+        threshold: Churn probability threshold for the predicted label
+
+    Returns:
+        Flask application
+    """
+    model, transform = load_artifacts(model_path, data_dir)
+    batcher = MicroBatcher(model, max_batch_size, max_wait_ms)
+    app = Flask(__name__)
+
+    @app.route('/predict', methods=['POST'])
+    def predict():
+        """Score one record or a list of records."""
+        start_time = time.perf_counter()
+        payload = request.get_json(silent=True)
+        records = payload if isinstance(payload, list) else [payload]
+
+        try:
+            if payload is None or not all(isinstance(r, dict) for r in records):
+                raise ValueError("Expected a JSON object or a list of objects")
+            for record in records:
+                check_record(record, transform.feature_columns)
+            rows = transform.transform_records(records)
+        except ValueError as exc:
+            REQUEST_COUNT.labels(endpoint='predict', status='400').inc()
+            return jsonify({'error': str(exc)}), 400
+
+        proba = batcher.submit(rows).result()
+        # Strictly above the threshold, like evaluate.predict_churn and predict()
+        predictions = [{'churn_probability': float(p), 'churn': int(p > threshold)}
+                       for p in proba]
+
+        REQUEST_DURATION.labels(endpoint='predict').observe(time.perf_counter() - start_time)
+        REQUEST_COUNT.labels(endpoint='predict', status='200').inc()
+        return jsonify(predictions if isinstance(payload, list) else predictions[0])
+
+    @app.route('/health')
+    def health():
+        """Health check endpoint"""
+        return jsonify({'status': 'healthy', 'model': type(model).__name__,
+                        'timestamp': time.time()}), 200
+
+    @app.route('/metrics')
+    def metrics():
+        """Prometheus metrics endpoint"""
+        registry = REGISTRY
+        if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+            # Under gunicorn every worker writes its own metric files; sum them
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), 200, {'Content-Type': 'text/plain; charset=utf-8'}
+
+    return app
+
+
+def app_from_env():
+    """
+    Build the serving application from environment variables.
+
+    Entry point for gunicorn, which loads it once per worker. MODEL_PATH,
+    DATA_DIR, MAX_BATCH_SIZE, MAX_WAIT_MS and CHURN_THRESHOLD override the
+    create_app() defaults.
+
+    Returns:
+        Flask application
+    """
+    return create_app(
+        model_path=os.environ.get('MODEL_PATH', 'models/churn_model.pkl'),
+        data_dir=os.environ.get('DATA_DIR', 'data/processed'),
+        max_batch_size=int(os.environ.get('MAX_BATCH_SIZE', 64)),
+        max_wait_ms=float(os.environ.get('MAX_WAIT_MS', 2.0)),
+        threshold=float(os.environ.get('CHURN_THRESHOLD', 0.5)),
+    )
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Serve the churn model')
+    parser.add_argument('--model-path', type=str, default='models/churn_model.pkl',
+                       help='Path to trained model (joblib pickle or .forest)')
+    parser.add_argument('--data-dir', type=str, default='data/processed',
+                       help='Directory containing the preprocessing artifacts')
+    parser.add_argument('--host', type=str, default='0.0.0.0',
+                       help='Interface to bind')
+    parser.add_argument('--port', type=int, default=int(os.environ.get('PORT', 8080)),
+                       help='Port to listen on')
+    parser.add_argument('--max-batch-size', type=int, default=64,
+                       help='Maximum records per predict_proba call')
+    parser.add_argument('--max-wait-ms', type=float, default=2.0,
+                       help='Maximum time to wait for a micro-batch to fill')
+    parser.add_argument('--threshold', type=float, default=0.5,
+                       help='Churn probability above which a record is labelled churn')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    app = create_app(args.model_path, args.data_dir, args.max_batch_size, args.max_wait_ms,
+                     args.threshold)
+    print(f"Serving churn model on http://{args.host}:{args.port}/predict "
+          f"(development server; use gunicorn.conf.py for production)")
+    app.run(host=args.host, port=args.port, threaded=True, debug=False)
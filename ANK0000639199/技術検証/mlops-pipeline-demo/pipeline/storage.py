@@ -0,0 +1,241 @@
+"""
+Processed Dataset Storage Module
+
+This module reads and writes the processed train/test datasets in a
+pluggable on-disk format: CSV, Parquet, Feather or raw NumPy .npy files.
+"""
+
+import os
+import json
+import shutil
+import numpy as np
+
+
+FORMATS = {
+    'csv': '.csv',
+    'parquet': '.parquet',
+    'feather': '.feather',
+    'npy': '.npy',
+}
+DATASET_NAMES = ['X_train', 'X_test', 'y_train', 'y_test']
+MANIFEST_FILE = 'dataset.json'
+
+
+def dataset_path(data_dir, name, data_format):
+    """Return the file path of one dataset part in the given format."""
+    return os.path.join(data_dir, f'{name}{FORMATS[data_format]}')
+
+
+def read_manifest(data_dir):
+    """
+    Read the dataset manifest written alongside the processed data.
+
+    Directories written before the manifest existed only contain CSV files,
+    so a missing manifest is reported as CSV without dtype information.
+
+    Args:
+        data_dir: Directory containing processed data
+
+    Returns:
+        dict: Manifest with 'format' and per-dataset 'columns'/'dtypes'
+    """
+    manifest_path = os.path.join(data_dir, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return {'format': 'csv', 'datasets': {}}
+    with open(manifest_path) as f:
+        return json.load(f)
+
+
+def dataset_exists(data_dir):
+    """Check whether a complete processed dataset exists in data_dir."""
+    data_format = read_manifest(data_dir)['format']
+    return all(os.path.exists(dataset_path(data_dir, name, data_format))
+               for name in DATASET_NAMES)
+
+
+def update_manifest(data_dir, **fields):
+    """Add or replace top-level fields of an existing dataset manifest."""
+    manifest_path = os.path.join(data_dir, MANIFEST_FILE)
+    manifest = read_manifest(data_dir)
+    manifest.update(fields)
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+
+class DatasetWriter:
+    """
+    Incrementally write the processed datasets in one on-disk format.
+
+    Every dataset part can be appended to repeatedly, which lets the
+    streaming preprocessor write shards without holding the full data.
+    close() finalizes the files and writes the manifest.
+    """
+
+    def __init__(self, output_dir, data_format='csv'):
+        if data_format not in FORMATS:
+            raise ValueError(f"Unknown data format '{data_format}', "
+                             f"expected one of {sorted(FORMATS)}")
+        self.output_dir = output_dir
+        self.data_format = data_format
+        self._writers = {}
+        self._meta = {}
+
+        os.makedirs(output_dir, exist_ok=True)
+        for name in DATASET_NAMES:
+            for fmt in FORMATS:
+                path = dataset_path(output_dir, name, fmt)
+                if os.path.exists(path):
+                    os.remove(path)
+        manifest_path = os.path.join(output_dir, MANIFEST_FILE)
+        if os.path.exists(manifest_path):
+            os.remove(manifest_path)
+
+    def append(self, name, data):
+        """
+        Append rows to one dataset part.
+
+        Args:
+            name: One of DATASET_NAMES
+            data: DataFrame of features or Series of labels
+        """
+        import pandas as pd
+
+        frame = data.to_frame() if isinstance(data, pd.Series) else data
+        path = dataset_path(self.output_dir, name, self.data_format)
+
+        if name not in self._meta:
+            self._meta[name] = {
+                'columns': [str(col) for col in frame.columns],
+                'dtypes': {str(col): str(dtype) for col, dtype in frame.dtypes.items()},
+                'rows': 0,
+                'series': isinstance(data, pd.Series),
+            }
+        self._meta[name]['rows'] += len(frame)
+
+        if self.data_format == 'csv':
+            first = name not in self._writers
+            frame.to_csv(path, mode='w' if first else 'a', header=first, index=False)
+            self._writers[name] = path
+        elif self.data_format == 'parquet':
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if name not in self._writers:
+                self._writers[name] = pq.ParquetWriter(path, table.schema)
+            self._writers[name].write_table(table)
+        elif self.data_format == 'feather':
+            import pyarrow as pa
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if name not in self._writers:
+                # Feather v2 is the Arrow IPC file format; leaving it
+                # uncompressed keeps it memory-mappable on read.
+                self._writers[name] = pa.ipc.new_file(path, table.schema)
+            self._writers[name].write_table(table)
+        else:
+            values = frame.to_numpy()
+            if name not in self._writers:
+                self._meta[name]['npy_dtype'] = values.dtype.str
+                self._writers[name] = open(path + '.part', 'wb')
+            values = np.ascontiguousarray(values, dtype=self._meta[name]['npy_dtype'])
+            self._writers[name].write(values.tobytes())
+
+    def close(self):
+        """Finalize all dataset files and write the manifest."""
+        for name, writer in self._writers.items():
+            if self.data_format == 'npy':
+                writer.close()
+                self._finalize_npy(name)
+            elif self.data_format != 'csv':
+                writer.close()
+        self._writers = {}
+
+        manifest = {'format': self.data_format, 'datasets': self._meta}
+        with open(os.path.join(self.output_dir, MANIFEST_FILE), 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+    def _finalize_npy(self, name):
+        """Prepend the .npy header now that the final row count is known."""
+        meta = self._meta[name]
+        path = dataset_path(self.output_dir, name, 'npy')
+        shape = (meta['rows'],) if meta['series'] else (meta['rows'], len(meta['columns']))
+        header = {'descr': meta['npy_dtype'], 'fortran_order': False, 'shape': shape}
+
+        with open(path, 'wb') as out, open(path + '.part', 'rb') as raw:
+            np.lib.format.write_array_header_1_0(out, header)
+            shutil.copyfileobj(raw, out, length=16 * 1024 * 1024)
+        os.remove(path + '.part')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            for writer in self._writers.values():
+                if hasattr(writer, 'close'):
+                    writer.close()
+
+
+def save_dataset(datasets, output_dir, data_format='csv'):
+    """
+    Write the processed datasets in one go.
+
+    Args:
+        datasets: Dict mapping DATASET_NAMES to DataFrames/Series
+        output_dir: Directory to save processed data
+        data_format: One of FORMATS
+    """
+    with DatasetWriter(output_dir, data_format) as writer:
+        for name in DATASET_NAMES:
+            writer.append(name, datasets[name])
+
+
+def load_dataset(data_dir, names=None, mmap=True):
+    """
+    Load processed datasets in whatever format they were written.
+
+    Feature sets come back as DataFrames and label sets as 1-D arrays.
+    Parquet and Feather are read with their stored column types; .npy
+    features are a single homogeneous (usually float64) matrix wrapped
+    without copying; CSV is parsed with the dtypes recorded in the
+    manifest when available.
+
+    Args:
+        data_dir: Directory containing processed data
+        names: Dataset parts to load (defaults to all of DATASET_NAMES)
+        mmap: Memory-map .npy and Feather files instead of reading them
+
+    Returns:
+        dict: Mapping of dataset name to DataFrame or array
+    """
+    import pandas as pd
+
+    manifest = read_manifest(data_dir)
+    data_format = manifest['format']
+    loaded = {}
+
+    for name in names or DATASET_NAMES:
+        path = dataset_path(data_dir, name, data_format)
+        meta = manifest['datasets'].get(name, {})
+
+        if data_format == 'csv':
+            frame = pd.read_csv(path, dtype=meta.get('dtypes'))
+        elif data_format == 'parquet':
+            frame = pd.read_parquet(path)
+        elif data_format == 'feather':
+            import pyarrow.feather as feather
+            frame = feather.read_table(path, memory_map=mmap).to_pandas()
+        else:
+            values = np.load(path, mmap_mode='r' if mmap else None)
+            if values.ndim == 1:
+                loaded[name] = values
+                continue
+            frame = pd.DataFrame(values, columns=meta['columns'], copy=False)
+
+        if name.startswith('y_'):
+            loaded[name] = frame.iloc[:, 0].to_numpy()
+        else:
+            loaded[name] = frame
+
+    return loaded
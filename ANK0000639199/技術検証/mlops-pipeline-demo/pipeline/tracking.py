@@ -0,0 +1,630 @@
+"""
+Experiment Tracking Module
+
+This module buffers MLflow logging in a local spool so tracking-server
+latency stays off the pipeline's critical path. Runs, params, metrics, tags
+and artifacts are appended to an event log on disk; a background worker
+sends them with MlflowClient in batches (log_batch) and retries with
+backoff when the server is slow or down. Events the server rejects as
+invalid (a 4xx error such as INVALID_PARAMETER_VALUE) are not retried: they
+are moved to a dead-letter file, rejected/<session>.jsonl in the spool
+directory, so the events after them still get sent.
+
+Modes:
+    async    Log to the spool; a worker thread syncs it (default)
+    sync     Log to the spool and sync before returning (plain MLflow timing)
+    offline  Only log to the spool; sync later with
+             python pipeline/tracking.py sync
+
+Usage:
+    tracker = Tracker('churn-prediction', mlflow_uri)
+    with tracker, tracker.start_run(run_name='train') as run:
+        run.log_params({'n_estimators': 100})
+        run.log_metric('test_f1', 0.91)
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import shutil
+import getpass
+import argparse
+import threading
+import contextlib
+
+
+MODES = ('async', 'sync', 'offline')
+DEFAULT_MODE = os.environ.get('MLFLOW_TRACKING_MODE', 'async')
+DEFAULT_SPOOL_DIR = os.environ.get('MLFLOW_SPOOL_DIR', 'mlruns-spool')
+# Longest a finished stage waits at exit for the server; the rest stays spooled
+DEFAULT_CLOSE_TIMEOUT = float(os.environ.get('MLFLOW_SPOOL_CLOSE_TIMEOUT', '30'))
+EVENTS_FILE = 'events.jsonl'
+STATE_FILE = 'state.json'
+CLOSED_FILE = 'closed'
+REJECTED_FILE = 'rejected.jsonl'
+# Dead letters of removed sessions, inside the spool directory
+REJECTED_DIR = 'rejected'
+
+# Per-request limits of the MLflow log_batch API
+MAX_BATCH_METRICS = 1000
+MAX_BATCH_PARAMS = 100
+MAX_BATCH_TAGS = 100
+BATCH_OPS = ('params', 'metrics', 'tags')
+
+# Importing mlflow from two threads at once can fail on its circular imports
+_mlflow_import_lock = threading.Lock()
+
+
+def add_tracking_args(parser):
+    """Add the shared tracking flags to a script's argument parser."""
+    parser.add_argument('--tracking-mode', choices=MODES, default=DEFAULT_MODE,
+                       help='async: log in the background; sync: block on every call; '
+                            'offline: spool only, sync later with pipeline/tracking.py sync')
+    parser.add_argument('--spool-dir', type=str, default=DEFAULT_SPOOL_DIR,
+                       help='Directory buffering tracking events before they are sent')
+    return parser
+
+
+def _now_ms():
+    return int(time.time() * 1000)
+
+
+class Spool:
+    """
+    Append-only event log of one tracking session.
+
+    events.jsonl holds the events in logging order; state.json records
+    how many have been sent and the MLflow run id of every local run key,
+    so a sync can resume after a crash or in another process. An empty
+    'closed' file marks a session whose tracker has finished logging, and
+    rejected.jsonl holds the events the server refused.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.files_dir = os.path.join(path, 'files')
+        os.makedirs(self.files_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._file_count = 0
+
+    @property
+    def events_path(self):
+        return os.path.join(self.path, EVENTS_FILE)
+
+    def append(self, event):
+        """Write one event; returns it."""
+        line = json.dumps(event, default=str) + '\n'
+        with self._lock, open(self.events_path, 'a') as f:
+            f.write(line)
+        return event
+
+    def reject(self, events, error):
+        """Append events the server refused, with the error, to the dead-letter file."""
+        lines = ''.join(json.dumps({'event': event, 'error': error}, default=str) + '\n'
+                        for event in events)
+        with self._lock, open(os.path.join(self.path, REJECTED_FILE), 'a') as f:
+            f.write(lines)
+
+    def remove(self):
+        """
+        Delete a fully sent session, keeping its dead letters.
+
+        Returns:
+            str: Path the rejected events were moved to, or None
+        """
+        rejected_path = os.path.join(self.path, REJECTED_FILE)
+        kept = None
+        if os.path.exists(rejected_path):
+            rejected_dir = os.path.join(os.path.dirname(self.path), REJECTED_DIR)
+            os.makedirs(rejected_dir, exist_ok=True)
+            kept = os.path.join(rejected_dir, os.path.basename(self.path) + '.jsonl')
+            shutil.move(rejected_path, kept)
+        shutil.rmtree(self.path, ignore_errors=True)
+        return kept
+
+    def stage(self, name):
+        """Reserve a directory inside the spool for a copied artifact."""
+        with self._lock:
+            self._file_count += 1
+            stage_dir = os.path.join(self.files_dir, f'{self._file_count:06d}')
+        os.makedirs(stage_dir, exist_ok=True)
+        return os.path.join(stage_dir, name)
+
+    def events(self):
+        """All events written so far (a torn last line is skipped)."""
+        if not os.path.exists(self.events_path):
+            return []
+        with self._lock, open(self.events_path) as f:
+            lines = f.readlines()
+        if lines and not lines[-1].endswith('\n'):
+            lines = lines[:-1]
+        return [json.loads(line) for line in lines]
+
+    @property
+    def closed(self):
+        return os.path.exists(os.path.join(self.path, CLOSED_FILE))
+
+    def mark_closed(self):
+        """Record that no more events will be appended."""
+        open(os.path.join(self.path, CLOSED_FILE), 'w').close()
+
+    def load_state(self):
+        """Sync progress: {'synced': n, 'run_ids': {...}, 'tracking_uri': uri}."""
+        path = os.path.join(self.path, STATE_FILE)
+        if not os.path.exists(path):
+            return {'synced': 0, 'run_ids': {}}
+        with open(path) as f:
+            return json.load(f)
+
+    def save_state(self, state):
+        """Write the sync progress atomically."""
+        path = os.path.join(self.path, STATE_FILE)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, path)
+
+
+def _import_mlflow():
+    """Import mlflow once, so the sender thread and the caller don't race on it."""
+    with _mlflow_import_lock:
+        import mlflow  # noqa: F401
+
+
+def _is_rejected(exc):
+    """Whether the server refused a request as invalid (retrying cannot help)."""
+    from mlflow.exceptions import MlflowException
+
+    # The file store re-raises validation errors as INTERNAL_ERROR; look at the cause too
+    while exc is not None:
+        if isinstance(exc, MlflowException):
+            status = exc.get_http_status_code()
+            # 429: rate limited, worth retrying
+            if 400 <= status < 500 and status != 429:
+                return True
+        exc = exc.__cause__ or exc.__context__
+    return False
+
+
+def _with_retries(fn, max_retries, backoff):
+    """Call fn, retrying with exponential backoff; re-raises the last error."""
+    for attempt in range(max_retries + 1):
+        try:
+            return fn()
+        except Exception as exc:
+            if attempt == max_retries or _is_rejected(exc):
+                raise
+            time.sleep(min(backoff * 2 ** attempt, 30.0))
+
+
+def _experiment_id(client, name):
+    """Id of the named experiment, creating it if needed (None: default experiment)."""
+    if name is None:
+        return '0'
+    experiment = client.get_experiment_by_name(name)
+    if experiment is not None:
+        return experiment.experiment_id
+    return client.create_experiment(name)
+
+
+def _take_batch(events, start, stop=None):
+    """
+    Collect consecutive params/metrics/tags events of one run from start.
+
+    Args:
+        events: Spooled events
+        start: Index of the first event
+        stop: Index the batch must end at or before (default: no limit)
+
+    Returns:
+        tuple: (end index, metrics, params, tags) within log_batch limits
+    """
+    from mlflow.entities import Metric, Param, RunTag
+
+    run_key = events[start]['run']
+    metrics, params, tags = [], [], []
+    end = start
+    stop = len(events) if stop is None else min(stop, len(events))
+    while end < stop and events[end]['op'] in BATCH_OPS and events[end]['run'] == run_key:
+        event = events[end]
+        if event['op'] == 'metrics':
+            new = [Metric(k, float(v), event['timestamp'], event['step'])
+                   for k, v in event['values'].items()]
+            if metrics and len(metrics) + len(new) > MAX_BATCH_METRICS:
+                break
+            metrics += new
+        elif event['op'] == 'params':
+            new = [Param(k, str(v)) for k, v in event['values'].items()]
+            if params and len(params) + len(new) > MAX_BATCH_PARAMS:
+                break
+            params += new
+        else:
+            new = [RunTag(k, str(v)) for k, v in event['values'].items()]
+            if tags and len(tags) + len(new) > MAX_BATCH_TAGS:
+                break
+            tags += new
+        end += 1
+    return end, metrics, params, tags
+
+
+def sync_events(client, spool, max_retries=3, backoff=0.5):
+    """
+    Send a spool's pending events to the tracking server, in order.
+
+    Consecutive params/metrics/tags of one run are sent as log_batch calls;
+    progress is saved after every request, so a failed sync resumes where
+    it stopped. Transient errors are retried and then raised. Events the
+    server rejects as invalid are moved to the spool's dead-letter file
+    with a warning and skipped; a rejected batch is re-sent one event at a
+    time so only the offending events are dropped. Events of a run whose
+    creation was rejected are dead-lettered without a request.
+
+    Args:
+        client: MlflowClient for the target tracking server
+        spool: Spool to send
+        max_retries: Retries per request before giving up
+        backoff: Initial retry delay in seconds
+
+    Returns:
+        int: Number of events sent (including rejected ones)
+    """
+    state = spool.load_state()
+    events = spool.events()
+    run_ids = state['run_ids']
+    start = index = state['synced']
+    # Events up to this index are sent one per request after a rejected batch
+    isolate_until = index
+
+    while index < len(events):
+        event = events[index]
+        op = event['op']
+        run_id = run_ids.get(event['run'])
+
+        if op not in BATCH_OPS + ('create_run', 'artifact', 'end_run'):
+            raise ValueError(f"Unknown tracking event '{op}' in {spool.events_path}")
+        if op in BATCH_OPS:
+            end, metrics, params, tags = _take_batch(
+                events, index, index + 1 if index < isolate_until else None)
+        else:
+            end = index + 1
+
+        error = None
+        if op != 'create_run' and run_id is None:
+            error = f"Skipped: run {event['run']} was rejected"
+        else:
+            try:
+                if op in BATCH_OPS:
+                    # A single oversized event is split to stay within the API limits
+                    n_requests = max(-(-len(metrics) // MAX_BATCH_METRICS),
+                                     -(-len(params) // MAX_BATCH_PARAMS),
+                                     -(-len(tags) // MAX_BATCH_TAGS))
+                    for i in range(n_requests):
+                        batch = {
+                            'metrics': metrics[i * MAX_BATCH_METRICS:(i + 1) * MAX_BATCH_METRICS],
+                            'params': params[i * MAX_BATCH_PARAMS:(i + 1) * MAX_BATCH_PARAMS],
+                            'tags': tags[i * MAX_BATCH_TAGS:(i + 1) * MAX_BATCH_TAGS]}
+                        _with_retries(lambda: client.log_batch(run_id, **batch),
+                                      max_retries, backoff)
+                elif op == 'create_run':
+                    tags = dict(event['tags'])
+                    # A child of a rejected run is still created, without the link
+                    if run_ids.get(event.get('parent')):
+                        tags['mlflow.parentRunId'] = run_ids[event['parent']]
+                    run = _with_retries(lambda: client.create_run(
+                        _experiment_id(client, event['experiment']),
+                        start_time=event['timestamp'], tags=tags, run_name=event['run_name']),
+                        max_retries, backoff)
+                    run_ids[event['run']] = run.info.run_id
+                elif op == 'artifact':
+                    path = os.path.join(spool.path, event['path'])
+                    if os.path.isdir(path):
+                        _with_retries(lambda: client.log_artifacts(run_id, path,
+                                                                   event['artifact_path']),
+                                      max_retries, backoff)
+                    else:
+                        _with_retries(lambda: client.log_artifact(run_id, path,
+                                                                  event['artifact_path']),
+                                      max_retries, backoff)
+                else:
+                    _with_retries(lambda: client.set_terminated(run_id, event['status'],
+                                                                event['timestamp']),
+                                  max_retries, backoff)
+            except Exception as exc:
+                if not _is_rejected(exc):
+                    raise
+                if end - index > 1:
+                    # Re-send the batch one event at a time to find the offending ones
+                    isolate_until = end
+                    continue
+                error = f"{type(exc).__name__}: {exc}"
+        if error is not None:
+            spool.reject(events[index:end], error)
+            print(f"Warning: MLflow rejected {end - index} tracking event(s) ({error}); "
+                  f"moved to {os.path.join(spool.path, REJECTED_FILE)}")
+
+        index = end
+        state['synced'] = index
+        spool.save_state(state)
+
+    return index - start
+
+
+class Run:
+    """
+    Handle for logging to one run; mirrors the mlflow.log_* functions.
+
+    Every call appends an event to the spool and returns immediately (in
+    async and offline mode).
+    """
+
+    def __init__(self, tracker, key):
+        self.tracker = tracker
+        self.key = key
+
+    @property
+    def run_id(self):
+        """MLflow run id, or None until the run has been created on the server."""
+        return self.tracker.run_ids().get(self.key)
+
+    def _log(self, op, **fields):
+        self.tracker._submit(dict(fields, op=op, run=self.key))
+
+    def log_param(self, key, value):
+        self.log_params({key: value})
+
+    def log_params(self, params):
+        self._log('params', values=dict(params))
+
+    def log_metric(self, key, value, step=0):
+        self.log_metrics({key: value}, step)
+
+    def log_metrics(self, metrics, step=0):
+        self._log('metrics', values={k: float(v) for k, v in metrics.items()},
+                  step=step, timestamp=_now_ms())
+
+    def set_tag(self, key, value):
+        self.set_tags({key: value})
+
+    def set_tags(self, tags):
+        self._log('tags', values=dict(tags))
+
+    def log_artifact(self, local_path, artifact_path=None):
+        """Copy a file into the spool now; it is uploaded later."""
+        staged = self.tracker.spool.stage(os.path.basename(local_path))
+        shutil.copy2(local_path, staged)
+        self._log('artifact', path=os.path.relpath(staged, self.tracker.spool.path),
+                  artifact_path=artifact_path)
+
+    def log_model(self, model, artifact_path='model'):
+        """
+        Save an sklearn model in MLflow format into the spool and upload it
+        as the run's artifact_path directory (loadable as runs:/<id>/model).
+        """
+        _import_mlflow()
+        import mlflow.sklearn
+
+        staged = self.tracker.spool.stage(artifact_path)
+        mlflow.sklearn.save_model(model, staged)
+        self._log('artifact', path=os.path.relpath(staged, self.tracker.spool.path),
+                  artifact_path=artifact_path)
+
+    @contextlib.contextmanager
+    def child(self, run_name=None):
+        """Start a nested run below this one."""
+        with self.tracker.start_run(run_name, parent=self) as run:
+            yield run
+
+
+class Tracker:
+    """
+    Spooled, batched MLflow logging for one process.
+
+    Args:
+        experiment_name: Experiment for new runs (None: default experiment)
+        tracking_uri: MLflow tracking URI (defaults to MLFLOW_TRACKING_URI)
+        spool_dir: Directory holding the spool of this session
+        mode: 'async', 'sync' or 'offline'
+        flush_interval: Seconds the worker waits to gather more events
+        max_retries: Retries per request before the worker backs off
+        close_timeout: Seconds close() waits for the worker to drain the spool
+    """
+
+    def __init__(self, experiment_name=None, tracking_uri=None, spool_dir=DEFAULT_SPOOL_DIR,
+                 mode=DEFAULT_MODE, flush_interval=1.0, max_retries=3,
+                 close_timeout=DEFAULT_CLOSE_TIMEOUT):
+        if mode not in MODES:
+            raise ValueError(f"Unknown tracking mode '{mode}'; expected one of {MODES}")
+        self.experiment_name = experiment_name
+        self.tracking_uri = tracking_uri or os.getenv('MLFLOW_TRACKING_URI')
+        self.mode = mode
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.close_timeout = close_timeout
+
+        session = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.spool = Spool(os.path.join(spool_dir, session))
+        self.spool.save_state({'synced': 0, 'run_ids': {}, 'tracking_uri': self.tracking_uri})
+        self._client = None
+        self._run_ids = None
+        self._pending = threading.Event()
+        self._stopping = False
+        self._error = None
+        self._worker = None
+        if mode == 'async':
+            self._worker = threading.Thread(target=self._run_worker, name='mlflow-spool',
+                                            daemon=True)
+            self._worker.start()
+
+    @property
+    def client(self):
+        if self._client is None:
+            # Imported lazily: offline runs never talk to MLflow
+            _import_mlflow()
+            from mlflow.tracking import MlflowClient
+            self._client = MlflowClient(self.tracking_uri)
+        return self._client
+
+    def _submit(self, event):
+        self.spool.append(event)
+        if self.mode == 'sync':
+            sync_events(self.client, self.spool, self.max_retries)
+        elif self.mode == 'async':
+            self._pending.set()
+
+    @contextlib.contextmanager
+    def start_run(self, run_name=None, parent=None):
+        """
+        Start a run; ends it FINISHED, or FAILED if the block raises.
+
+        Yields:
+            Run
+        """
+        run = Run(self, uuid.uuid4().hex)
+        self._submit({'op': 'create_run', 'run': run.key, 'experiment': self.experiment_name,
+                      'run_name': run_name, 'parent': parent.key if parent else None,
+                      'timestamp': _now_ms(),
+                      'tags': {'mlflow.source.name': os.path.basename(sys.argv[0]),
+                               'mlflow.user': getpass.getuser()}})
+        status = 'FAILED'
+        try:
+            yield run
+            status = 'FINISHED'
+        finally:
+            self._submit({'op': 'end_run', 'run': run.key, 'status': status,
+                          'timestamp': _now_ms()})
+
+    def _run_worker(self):
+        """Send spooled events in the background, backing off while the server fails."""
+        delay = self.flush_interval
+        while True:
+            self._pending.wait(timeout=delay)
+            if not self._stopping:
+                # Let more events accumulate into the same batch
+                time.sleep(self.flush_interval)
+            self._pending.clear()
+            try:
+                sync_events(self.client, self.spool, self.max_retries)
+                self._error = None
+                delay = self.flush_interval
+            except Exception as exc:
+                if self._error is None:
+                    print(f"Warning: MLflow sync failed ({type(exc).__name__}: {exc}); "
+                          f"events stay in {self.spool.path} and will be retried")
+                self._error = exc
+                delay = min(delay * 2, 60.0)
+            if self._stopping and (self._error is not None or self.pending_events() == 0):
+                return
+
+    def run_ids(self):
+        """Local run keys mapped to the MLflow run ids created so far."""
+        if self._run_ids is not None:
+            return self._run_ids
+        return self.spool.load_state()['run_ids']
+
+    def pending_events(self):
+        """Number of spooled events not yet sent."""
+        return len(self.spool.events()) - self.spool.load_state()['synced']
+
+    def close(self):
+        """
+        Flush the spool and stop the worker.
+
+        In async mode this waits up to close_timeout for the remaining
+        events; whatever is left stays in the spool for a later sync.
+        """
+        if self._worker is not None:
+            self._stopping = True
+            self._pending.set()
+            self._worker.join(self.close_timeout)
+
+        self.spool.mark_closed()
+        self._run_ids = self.spool.load_state()['run_ids']
+
+        pending = self.pending_events()
+        if pending:
+            print(f"{pending} tracking events are spooled in {self.spool.path}; send them with: "
+                  f"python pipeline/tracking.py sync --spool-dir "
+                  f"{os.path.dirname(self.spool.path)}")
+        else:
+            rejected_path = self.spool.remove()
+            if rejected_path:
+                print(f"Tracking events rejected by MLflow were kept in {rejected_path}")
+        return pending
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def sync_spool(spool_dir=DEFAULT_SPOOL_DIR, tracking_uri=None, include_open=False):
+    """
+    Send every closed session in spool_dir to the tracking server.
+
+    Sessions that are fully sent are removed. Sessions whose process has
+    not closed its tracker yet are skipped unless include_open is set.
+
+    Args:
+        spool_dir: Spool directory of the trackers
+        tracking_uri: Target server (defaults to the URI each session was
+            started with, then MLFLOW_TRACKING_URI)
+        include_open: Also sync sessions still open (e.g. after a crash)
+
+    Returns:
+        int: Number of events sent
+    """
+    from mlflow.tracking import MlflowClient
+
+    if not os.path.isdir(spool_dir):
+        return 0
+    total = 0
+    for name in sorted(os.listdir(spool_dir)):
+        if name == REJECTED_DIR:
+            continue
+        spool = Spool(os.path.join(spool_dir, name))
+        if not spool.closed and not include_open:
+            print(f"Skipping open session {name}")
+            continue
+        uri = (tracking_uri or spool.load_state().get('tracking_uri')
+               or os.getenv('MLFLOW_TRACKING_URI'))
+        sent = sync_events(MlflowClient(uri), spool)
+        total += sent
+        print(f"Synced {sent} events from {name}")
+        rejected_path = spool.remove()
+        if rejected_path:
+            print(f"Rejected events of {name} were kept in {rejected_path}")
+    return total
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Manage spooled MLflow tracking events')
+    parser.add_argument('command', choices=['sync', 'status'],
+                       help='sync: send spooled events; status: list pending sessions')
+    parser.add_argument('--spool-dir', type=str, default=DEFAULT_SPOOL_DIR,
+                       help='Spool directory of the trackers')
+    parser.add_argument('--tracking-uri', type=str, default=None,
+                       help='Send to this server instead of the one each session recorded')
+    parser.add_argument('--include-open', action='store_true',
+                       help='Also sync sessions whose process did not close its tracker')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    if args.command == 'sync':
+        sent = sync_spool(args.spool_dir, args.tracking_uri, args.include_open)
+        print(f"Sent {sent} tracking events")
+    else:
+        sessions = sorted(os.listdir(args.spool_dir)) if os.path.isdir(args.spool_dir) else []
+        for name in sessions:
+            if name == REJECTED_DIR:
+                print(f"{name}: {len(os.listdir(os.path.join(args.spool_dir, name)))} "
+                      f"sessions with rejected events")
+                continue
+            spool = Spool(os.path.join(args.spool_dir, name))
+            print(f"{name}: {len(spool.events()) - spool.load_state()['synced']} pending"
+                  f"{'' if spool.closed else ' (open)'}")
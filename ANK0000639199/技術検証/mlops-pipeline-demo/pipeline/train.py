@@ -2,24 +2,48 @@
 Model Training Module
 
 This module handles model training with MLflow experiment tracking.
+
+Every trained model records its lineage next to the model file (see
+lineage.py). With --incremental, the saved model is grown instead of
+replaced: only raw rows that no earlier training has seen are selected,
+encoded with the model's frozen transform, and fitted as additional trees
+(warm_start), so the cost of a daily retrain follows the new data rather
+than the full history.
+
+With --out-of-core, processed data stored as .npy is memory-mapped and a
+linear model is fitted block by block (see out_of_core.py), so datasets
+larger than memory can be trained on.
+
+scikit-learn, pandas and the preprocessing stage are imported by the
+functions that use them, so `--help` and argument errors return without
+paying for those imports.
 """
 
 import os
 import time
 import argparse
-import pandas as pd
 import numpy as np
-import joblib
-import mlflow
-import mlflow.sklearn
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
-from preprocess import preprocess_data
-
-
-def parse_args():
-    """Parse command line arguments."""
-    parser = argparse.ArgumentParser(description='Train ML model')
+from scoring import binary_metrics, confusion_counts
+from forest import forest_path_for, save_flat_forest
+from out_of_core import (
+    add_out_of_core_args, check_memory_mapped, out_of_core_hyperparameters,
+    predict_in_blocks, train_model_out_of_core
+)
+from fingerprint import csv_row_hashes, merge_hashes, row_hashes, seen_mask
+from lineage import (
+    check_lineage, lineage_paths, lineage_tags, load_seen, parent_summary, read_lineage,
+    set_lineage_run_id, write_lineage
+)
+from instrumentation import add_instrumentation_args, recording, span
+from tracking import Tracker, add_tracking_args
+
+
+# Fewer new rows than this are left for the next incremental run
+MIN_NEW_ROWS = 10
+
+
+def add_hyperparameter_args(parser):
+    """Add the random forest hyperparameter flags to an argument parser."""
     parser.add_argument('--n-estimators', type=int, default=100,
                        help='Number of trees in random forest')
     parser.add_argument('--max-depth', type=int, default=10,
@@ -30,8 +54,39 @@ def parse_args():
                        help='Minimum samples required at leaf node')
     parser.add_argument('--random-state', type=int, default=42,
                        help='Random state for reproducibility')
+    return parser
+
+
+def hyperparameters_from_args(args):
+    """Hyperparameters dict from parsed add_hyperparameter_args() flags."""
+    return {
+        'n_estimators': args.n_estimators,
+        'max_depth': args.max_depth,
+        'min_samples_split': args.min_samples_split,
+        'min_samples_leaf': args.min_samples_leaf,
+        'random_state': args.random_state
+    }
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Train ML model')
+    add_hyperparameter_args(parser)
+    add_out_of_core_args(parser)
+    parser.add_argument('--model-path', type=str, default='models/churn_model.pkl',
+                       help='Path to save the model (and, with --incremental, the model to grow)')
+    parser.add_argument('--incremental', action='store_true',
+                       help='Grow the saved model with trees fitted on rows it has not seen')
+    parser.add_argument('--data-path', type=str, default=None,
+                       help='Raw CSV to take new rows from with --incremental '
+                            '(defaults to the CSV the model was last trained on)')
+    parser.add_argument('--new-trees', type=int, default=None,
+                       help='Trees to add with --incremental (defaults to the share of '
+                            'new rows in all trained rows, times the current tree count)')
     parser.add_argument('--experiment-name', type=str, default='churn-prediction',
                        help='MLflow experiment name')
+    add_instrumentation_args(parser)
+    add_tracking_args(parser)
     return parser.parse_args()
 
 
@@ -45,17 +100,19 @@ def load_processed_data(data_dir='data/processed'):
     Returns:
         tuple: (X_train, X_test, y_train, y_test)
     """
+    from preprocess import ensure_processed_data
+    from storage import load_dataset
+
     print(f"Loading processed data from {data_dir}...")
 
-    # Check if processed data exists
-    if not os.path.exists(f'{data_dir}/X_train.csv'):
-        print("Processed data not found. Running preprocessing pipeline...")
-        preprocess_data()
+    # Make sure processed data exists and matches the current raw data
+    ensure_processed_data(data_dir)
 
-    X_train = pd.read_csv(f'{data_dir}/X_train.csv')
-    X_test = pd.read_csv(f'{data_dir}/X_test.csv')
-    y_train = pd.read_csv(f'{data_dir}/y_train.csv').values.ravel()
-    y_test = pd.read_csv(f'{data_dir}/y_test.csv').values.ravel()
+    with span('read') as read_span:
+        datasets = load_dataset(data_dir)
+        read_span.rows = len(datasets['X_train']) + len(datasets['X_test'])
+    X_train, X_test = datasets['X_train'], datasets['X_test']
+    y_train, y_test = datasets['y_train'], datasets['y_test']
 
     print(f"Loaded training set: {X_train.shape}")
     print(f"Loaded test set: {X_test.shape}")
@@ -75,6 +132,8 @@ def train_model(X_train, y_train, hyperparameters):
     Returns:
         Trained model
     """
+    from sklearn.ensemble import RandomForestClassifier
+
     print("Training Random Forest model...")
     print(f"Hyperparameters: {hyperparameters}")
 
@@ -86,11 +145,12 @@ def train_model(X_train, y_train, hyperparameters):
         min_samples_split=hyperparameters['min_samples_split'],
         min_samples_leaf=hyperparameters['min_samples_leaf'],
         random_state=hyperparameters['random_state'],
-        n_jobs=-1,
+        n_jobs=hyperparameters.get('n_jobs', -1),
         verbose=0
     )
 
-    model.fit(X_train, y_train)
+    with span('fit', rows=len(X_train)):
+        model.fit(X_train, y_train)
 
     training_time = time.time() - start_time
     print(f"Training completed in {training_time:.2f} seconds")
@@ -98,14 +158,18 @@ def train_model(X_train, y_train, hyperparameters):
     return model, training_time
 
 
-def evaluate_model(model, X_train, y_train, X_test, y_test):
+def evaluate_model(model, X_train, y_train, X_test, y_test, block_rows=None):
     """
     Evaluate model performance on train and test sets.
 
+    Each set's metrics come from one pass over its confusion counts
+    instead of a label scan per metric.
+
     Args:
         model: Trained model
         X_train, y_train: Training data
         X_test, y_test: Test data
+        block_rows: Predict this many rows at a time (default: all at once)
 
     Returns:
         Dictionary of metrics
@@ -113,18 +177,25 @@ def evaluate_model(model, X_train, y_train, X_test, y_test):
     print("Evaluating model...")
 
     # Training predictions
-    y_train_pred = model.predict(X_train)
-    train_accuracy = accuracy_score(y_train, y_train_pred)
-    train_precision = precision_score(y_train, y_train_pred)
-    train_recall = recall_score(y_train, y_train_pred)
-    train_f1 = f1_score(y_train, y_train_pred)
+    with span('predict', rows=len(X_train) + len(X_test)):
+        if block_rows:
+            y_train_pred = predict_in_blocks(model, X_train, block_rows)
+            y_test_pred = predict_in_blocks(model, X_test, block_rows)
+        else:
+            y_train_pred = model.predict(X_train)
+            y_test_pred = model.predict(X_test)
+    train_scores = binary_metrics(*confusion_counts(y_train, y_train_pred))
+    train_accuracy = float(train_scores['accuracy'])
+    train_precision = float(train_scores['precision'])
+    train_recall = float(train_scores['recall'])
+    train_f1 = float(train_scores['f1'])
 
     # Test predictions
-    y_test_pred = model.predict(X_test)
-    test_accuracy = accuracy_score(y_test, y_test_pred)
-    test_precision = precision_score(y_test, y_test_pred)
-    test_recall = recall_score(y_test, y_test_pred)
-    test_f1 = f1_score(y_test, y_test_pred)
+    test_scores = binary_metrics(*confusion_counts(y_test, y_test_pred))
+    test_accuracy = float(test_scores['accuracy'])
+    test_precision = float(test_scores['precision'])
+    test_recall = float(test_scores['recall'])
+    test_f1 = float(test_scores['f1'])
 
     metrics = {
         'train_accuracy': train_accuracy,
@@ -156,6 +227,8 @@ def get_feature_importance(model, feature_names):
     """
     Get feature importance from trained model.
 
+    Linear models report the absolute coefficient of each feature.
+
     Args:
         model: Trained model
         feature_names: List of feature names
@@ -163,9 +236,15 @@ def get_feature_importance(model, feature_names):
     Returns:
         DataFrame with feature importance
     """
+    import pandas as pd
+
+    importance = getattr(model, 'feature_importances_', None)
+    if importance is None:
+        importance = np.abs(model.coef_).ravel()
+
     importance_df = pd.DataFrame({
         'feature': feature_names,
-        'importance': model.feature_importances_
+        'importance': importance
     }).sort_values('importance', ascending=False)
 
     print("\nTop 5 Important Features:")
@@ -183,74 +262,337 @@ def save_model(model, model_path='models/churn_model.pkl'):
         model: Trained model
         model_path: Path to save model
     """
+    import joblib
+
     os.makedirs(os.path.dirname(model_path), exist_ok=True)
     joblib.dump(model, model_path)
     print(f"\nModel saved to {model_path}")
     return model_path
 
 
-def main():
-    """Main training pipeline."""
-    args = parse_args()
+def run_training(X_train, X_test, y_train, y_test, hyperparameters, run,
+                 model_path='models/churn_model.pkl', data_dir='data/processed',
+                 out_of_core=False):
+    """
+    Train, score, save and log a model on already loaded data.
 
-    print("=" * 60)
-    print("STARTING MODEL TRAINING PIPELINE")
-    print("=" * 60)
+    Args:
+        X_train, X_test, y_train, y_test: Processed datasets
+        hyperparameters: Dictionary of hyperparameters
+        run: tracking.Run to log to
+        model_path: Path to save the model
+        data_dir: Directory the processed data belongs to (for its cache key)
+        out_of_core: Train and predict block by block on memory-mapped data
+            (hyperparameters from out_of_core_hyperparameters())
 
-    # Set MLflow tracking URI
-    mlflow_uri = os.getenv('MLFLOW_TRACKING_URI', 'http://mlflow:5000')
-    mlflow.set_tracking_uri(mlflow_uri)
-    print(f"\nMLflow Tracking URI: {mlflow_uri}")
+    Returns:
+        tuple: (trained model, metrics dict)
+    """
+    from storage import read_manifest
+
+    # Log parameters
+    run.log_params(hyperparameters)
+    run.log_params({
+        'train_size': len(X_train),
+        'test_size': len(X_test),
+        'processed_data_key': read_manifest(data_dir).get('source_key', 'unknown'),
+    })
+
+    # Train model
+    if out_of_core:
+        model, training_time = train_model_out_of_core(X_train, y_train, hyperparameters)
+    else:
+        model, training_time = train_model(X_train, y_train, hyperparameters)
+    run.log_metric('training_time', training_time)
+
+    # Evaluate model
+    with span('evaluate', rows=len(X_train) + len(X_test)):
+        metrics = evaluate_model(model, X_train, y_train, X_test, y_test,
+                                 hyperparameters['block_rows'] if out_of_core else None)
+    run.log_metrics(metrics)
+
+    # Get feature importance
+    feature_importance = get_feature_importance(model, X_train.columns.tolist())
+
+    # Save feature importance as artifact
+    importance_path = os.path.join(os.path.dirname(model_path), 'feature_importance.csv')
+    os.makedirs(os.path.dirname(importance_path), exist_ok=True)
+    feature_importance.to_csv(importance_path, index=False)
+    run.log_artifact(importance_path)
+
+    # Save model
+    with span('save'):
+        model_path = save_model(model, model_path)
+
+    # Export the flat forest for fast, memory-mapped loading
+    forest_path = forest_path_for(model_path)
+    if hasattr(model, 'estimators_'):
+        with span('export_forest'):
+            save_flat_forest(model, forest_path)
+        run.log_artifact(forest_path)
+        run.log_metric('forest_size_mb', os.path.getsize(forest_path) / (1024 * 1024))
+    elif os.path.exists(forest_path):
+        # Never leave the previous model's flat forest next to a different model
+        os.remove(forest_path)
+
+    # Log model with MLflow (saved into the spool, uploaded in the background)
+    with span('log_model'):
+        run.log_model(model, "model")
+
+    # Log model file size
+    model_size_mb = os.path.getsize(model_path) / (1024 * 1024)
+    run.log_metric('model_size_mb', model_size_mb)
+
+    # Record which raw rows the model has seen, for later incremental runs
+    with span('lineage'):
+        record_full_lineage(model, model_path, data_dir, run, len(X_train))
+
+    return model, metrics
+
+
+def record_full_lineage(model, model_path, data_dir, run, rows_trained):
+    """
+    Write the lineage of a model trained on the full processed data.
 
-    # Set experiment
-    mlflow.set_experiment(args.experiment_name)
+    The seen rows are all rows of the raw CSV the processed data came from
+    (as recorded in its manifest), including the test split and the rows
+    cleaning dropped.
 
-    # Load data
-    X_train, X_test, y_train, y_test = load_processed_data()
+    Args:
+        model: Trained model
+        model_path: Path the model was saved to
+        data_dir: Directory of the processed data it was trained on
+        run: tracking.Run of the training
+        rows_trained: Number of training rows
+    """
+    from storage import read_manifest
+
+    source = read_manifest(data_dir).get('source') or {}
+    data_path = source.get('data_path')
+    transform_path = os.path.join(data_dir, 'transform.npz')
+    if not data_path or not os.path.exists(data_path) or not os.path.exists(transform_path):
+        print(f"Warning: no raw data or transform recorded for {data_dir}; "
+              f"incremental training will need a full run first")
+        return
+
+    seen = np.unique(csv_row_hashes(data_path))
+    entry = write_lineage(model_path, {
+        'mode': 'full',
+        'run_key': run.key,
+        'run_id': run.run_id,
+        'parent': parent_summary(read_lineage(model_path)),
+        'data_path': data_path,
+        'n_estimators': len(getattr(model, 'estimators_', [])),
+        'rows_trained': rows_trained,
+    }, seen, transform_path)
+    run.set_tags(lineage_tags(entry))
+    run.log_artifact(lineage_paths(model_path)['lineage'])
+    print(f"Lineage: {len(seen)} raw rows recorded as seen")
+
+
+def select_new_rows(data_path, seen, chunksize=100000):
+    """
+    Read the raw rows whose fingerprint is not among the seen ones.
 
-    # Prepare hyperparameters
-    hyperparameters = {
-        'n_estimators': args.n_estimators,
-        'max_depth': args.max_depth,
-        'min_samples_split': args.min_samples_split,
-        'min_samples_leaf': args.min_samples_leaf,
-        'random_state': args.random_state
-    }
+    Rows repeated within the new data are kept once.
 
-    # Start MLflow run
-    with mlflow.start_run():
-        # Log parameters
-        mlflow.log_params(hyperparameters)
-        mlflow.log_param('train_size', len(X_train))
-        mlflow.log_param('test_size', len(X_test))
+    Args:
+        data_path: Raw data CSV
+        seen: Sorted fingerprints of the rows already trained on
+        chunksize: Rows read at a time
 
-        # Train model
-        model, training_time = train_model(X_train, y_train, hyperparameters)
-        mlflow.log_metric('training_time', training_time)
+    Returns:
+        tuple: (DataFrame of new rows, their fingerprints, total rows read)
+    """
+    import pandas as pd
+
+    parts, hashes, total_rows = [], [], 0
+    for chunk in pd.read_csv(data_path, chunksize=chunksize):
+        chunk_hashes = row_hashes(chunk)
+        new = ~seen_mask(chunk_hashes, seen)
+        total_rows += len(chunk)
+        if new.any():
+            parts.append(chunk[new])
+            hashes.append(chunk_hashes[new])
+
+    if not parts:
+        return pd.DataFrame(), np.empty(0, dtype=np.uint64), total_rows
+    delta = pd.concat(parts, ignore_index=True)
+    delta_hashes = np.concatenate(hashes)
+    _, first = np.unique(delta_hashes, return_index=True)
+    first.sort()
+    return delta.iloc[first].reset_index(drop=True), delta_hashes[first], total_rows
+
+
+def run_incremental_training(run, model_path='models/churn_model.pkl', data_path=None,
+                             new_trees=None, test_size=0.2, random_state=42):
+    """
+    Grow a saved forest with trees fitted on rows it has not seen.
+
+    The new rows are validated, encoded with the transform frozen in the
+    model's lineage and split like split_data(); the existing trees are
+    kept and new_trees trees are fitted on the new training rows with
+    warm_start. Metrics are computed on the new test rows.
+
+    Args:
+        run: tracking.Run to log to
+        model_path: Saved model to grow (replaced by the grown model)
+        data_path: Raw CSV to take new rows from (default: the CSV the
+            model was last trained on)
+        new_trees: Trees to add (default: current trees times the new
+            rows' share of all trained rows, at least one)
+        test_size: Proportion of the new rows held out for metrics
+        random_state: Random seed for the split
 
-        # Evaluate model
-        metrics = evaluate_model(model, X_train, y_train, X_test, y_test)
-        mlflow.log_metrics(metrics)
+    Returns:
+        tuple: (model, metrics dict); metrics are empty when nothing was added
+
+    Raises:
+        ValueError: If the model has no lineage or was replaced since its
+            lineage was written, is not a forest, or the new training rows do
+            not contain every class
+    """
+    import joblib
+    import pandas as pd
+    from sklearn.model_selection import train_test_split
+    from preprocess import validate_data
+    from transform import ChurnTransform
+
+    lineage = read_lineage(model_path)
+    if lineage is None:
+        raise ValueError(f"{model_path} has no lineage; train a full model first")
+    # Seen rows and transform must be this model's, not those of a model it replaced
+    check_lineage(model_path, lineage)
+    data_path = data_path or lineage['data_path']
+    model = joblib.load(model_path)
+    if not hasattr(model, 'estimators_') or 'warm_start' not in model.get_params():
+        raise ValueError(f"{type(model).__name__} cannot be grown incrementally")
+    n_trees = len(model.estimators_)
+
+    print(f"Incremental training of {model_path} ({n_trees} trees, "
+          f"{lineage['rows_seen']} rows seen) on {data_path}...")
+    with span('select_new_rows') as select_span:
+        delta, delta_hashes, total_rows = select_new_rows(data_path, load_seen(model_path))
+        select_span.rows = total_rows
+    print(f"New rows: {len(delta)} of {total_rows}")
+
+    run.log_params({
+        'training_mode': 'incremental',
+        'data_path': data_path,
+        'parent_run_key': lineage['run_key'],
+        'parent_run_id': lineage.get('run_id') or 'unknown',
+        'parent_model_sha256': lineage['model_sha256'],
+        'rows_read': total_rows,
+        'new_rows': len(delta),
+    })
+    if len(delta) < MIN_NEW_ROWS:
+        print(f"Fewer than {MIN_NEW_ROWS} new rows; model left unchanged")
+        return model, {}
+
+    # Validate and encode like the rows the existing trees were fitted on
+    with span('transform', rows=len(delta)):
+        report = validate_data(delta, verbose=False)
+        delta_clean = delta[report.keep_mask] if report.dropped_rows else delta
+        transform = ChurnTransform.load(lineage_paths(model_path)['transform'])
+        if list(getattr(model, 'feature_names_in_', transform.feature_columns)) != \
+                transform.feature_columns:
+            raise ValueError("Frozen transform columns do not match the model features")
+        X = pd.DataFrame(transform.transform(delta_clean), columns=transform.feature_columns)
+        y = delta_clean['Churn'].to_numpy()
+
+    _, class_counts = np.unique(y, return_counts=True)
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=test_size, random_state=random_state,
+        stratify=y if len(class_counts) > 1 and class_counts.min() >= 2 else None
+    )
+    if set(np.unique(y_train)) != set(model.classes_):
+        raise ValueError(f"New training rows contain classes {sorted(set(np.unique(y_train)))}, "
+                         f"the model predicts {list(model.classes_)}; wait for more data")
 
-        # Get feature importance
-        feature_importance = get_feature_importance(model, X_train.columns.tolist())
+    if new_trees is None:
+        new_trees = max(1, round(n_trees * len(X_train) / lineage['rows_trained']))
+    run.log_params({'new_trees': new_trees, 'new_train_rows': len(X_train),
+                    'new_test_rows': len(X_test), 'n_estimators': n_trees + new_trees})
 
-        # Save feature importance as artifact
-        importance_path = 'models/feature_importance.csv'
-        feature_importance.to_csv(importance_path, index=False)
-        mlflow.log_artifact(importance_path)
+    print(f"Adding {new_trees} trees fitted on {len(X_train)} new rows...")
+    start_time = time.time()
+    model.set_params(warm_start=True, n_estimators=n_trees + new_trees)
+    with span('fit', rows=len(X_train)):
+        model.fit(X_train, y_train)
+    model.set_params(warm_start=False)
+    run.log_metric('training_time', time.time() - start_time)
+
+    metrics = {}
+    if len(X_test):
+        with span('evaluate', rows=len(X_train) + len(X_test)):
+            metrics = evaluate_model(model, X_train, y_train, X_test, y_test)
+        run.log_metrics(metrics)
+
+    with span('save'):
+        model_path = save_model(model, model_path)
+        forest_path = save_flat_forest(model, forest_path_for(model_path))
+    run.log_artifact(forest_path)
+    run.log_metric('model_size_mb', os.path.getsize(model_path) / (1024 * 1024))
+
+    # Every new row counts as seen, also those held out or dropped by validation
+    entry = write_lineage(model_path, {
+        'mode': 'incremental',
+        'run_key': run.key,
+        'run_id': run.run_id,
+        'parent': parent_summary(lineage),
+        'data_path': data_path,
+        'n_estimators': n_trees + new_trees,
+        'rows_trained': lineage['rows_trained'] + len(X_train),
+    }, merge_hashes(load_seen(model_path), delta_hashes))
+    run.set_tags(lineage_tags(entry))
+    run.log_artifact(lineage_paths(model_path)['lineage'])
+    print(f"Model grown to {n_trees + new_trees} trees; "
+          f"{entry['rows_seen']} rows seen, {entry['rows_trained']} trained on")
+    return model, metrics
 
-        # Save model
-        model_path = save_model(model)
 
-        # Log model with MLflow
-        mlflow.sklearn.log_model(model, "model")
+def main():
+    """Main training pipeline."""
+    args = parse_args()
 
-        # Log model file size
-        model_size_mb = os.path.getsize(model_path) / (1024 * 1024)
-        mlflow.log_metric('model_size_mb', model_size_mb)
+    print("=" * 60)
+    print("STARTING MODEL TRAINING PIPELINE")
+    print("=" * 60)
 
-        print(f"\nMLflow Run ID: {mlflow.active_run().info.run_id}")
+    # Set MLflow tracking URI
+    mlflow_uri = os.getenv('MLFLOW_TRACKING_URI', 'http://mlflow:5000')
+    print(f"\nMLflow Tracking URI: {mlflow_uri} ({args.tracking_mode} logging)")
+
+    # Logging goes to a local spool; the tracker sends it in the background
+    tracker = Tracker(args.experiment_name, mlflow_uri, spool_dir=args.spool_dir,
+                      mode=args.tracking_mode)
+
+    # Start the run; the recording is inside it so its timings are logged to the run
+    with tracker, tracker.start_run() as run, recording('train', args.profile,
+                                                        args.trace_memory,
+                                                        args.prom_textfile_dir, run=run):
+        if args.incremental:
+            run_incremental_training(run, args.model_path, args.data_path, args.new_trees)
+        else:
+            if args.out_of_core:
+                # Before loading: CSV/Parquet data would be read fully into memory
+                check_memory_mapped('data/processed')
+
+            # Load data (memory-mapped when stored as .npy)
+            with span('load') as load_span:
+                X_train, X_test, y_train, y_test = load_processed_data()
+                load_span.rows = len(X_train) + len(X_test)
+
+            if args.out_of_core:
+                hyperparameters = out_of_core_hyperparameters(args)
+            else:
+                hyperparameters = hyperparameters_from_args(args)
+            run_training(X_train, X_test, y_train, y_test, hyperparameters, run,
+                         model_path=args.model_path, out_of_core=args.out_of_core)
+
+    # The run id is only known once the tracker has synced the run
+    set_lineage_run_id(args.model_path, run.key, run.run_id)
+    print(f"\nMLflow Run ID: {run.run_id or 'pending sync'}")
 
     print("\n" + "=" * 60)
     print("TRAINING PIPELINE COMPLETED SUCCESSFULLY")
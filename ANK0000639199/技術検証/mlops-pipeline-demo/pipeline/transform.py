@@ -0,0 +1,154 @@
+"""
+Feature Transform Module
+
+This module provides ChurnTransform, a fitted version of what clean_data and
+encode_features do to the raw customer columns. It applies to plain NumPy
+column arrays, maps unseen categories to an explicit unknown bucket, and
+saves as a single compact .npz artifact for training/serving parity.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+FEATURE_COLUMNS = ['Age', 'Tenure', 'MonthlyCharges', 'TotalCharges',
+                   'Contract', 'PaymentMethod']
+CATEGORICAL_COLUMNS = ['Contract', 'PaymentMethod']
+NUMERICAL_COLUMNS = ['Age', 'Tenure', 'MonthlyCharges', 'TotalCharges']
+
+
+def _encode_categorical(values, classes):
+    """
+    Map category values to their LabelEncoder codes in one vectorized pass.
+
+    classes is sorted (LabelEncoder keeps classes_ sorted), so codes come
+    from a binary search; anything not found gets len(classes), the
+    unknown bucket. pandas Categoricals (and long object arrays, after
+    factorizing) are mapped through their few distinct values and then
+    their integer codes.
+    """
+    unknown = len(classes)
+    categories = getattr(values, 'categories', None)
+    if categories is not None and hasattr(values, 'codes'):
+        category_codes = _encode_categorical(np.asarray(categories, dtype=object), classes)
+        codes = np.asarray(values.codes)
+        # Missing values have code -1 and map to the unknown bucket
+        return np.where(codes >= 0, np.append(category_codes, unknown)[codes], unknown)
+
+    values = np.asarray(values)
+    if values.dtype.kind == 'O' and len(values) > len(classes):
+        # Hash-factorize long object arrays so only the distinct values
+        # are searched; nulls get code -1 and land in the unknown bucket
+        codes, uniques = pd.factorize(values)
+        return _encode_categorical(pd.Categorical.from_codes(codes, uniques), classes)
+    if values.dtype.kind not in 'OUS':
+        values = values.astype(str)
+    if values.dtype.kind == 'O':
+        # Nulls cannot be compared with strings; give them a sentinel
+        values = np.where(values == None, '', values)  # noqa: E711
+    if not unknown:
+        return np.zeros(len(values), dtype=np.int64)
+    codes = np.minimum(np.searchsorted(classes, values), unknown - 1)
+    return np.where(classes[codes] == values, codes, unknown)
+
+
+class ChurnTransform:
+    """
+    Fitted preprocessing transform for raw churn features.
+
+    Holds, per column, the LabelEncoder classes, the scaler mean/scale and
+    the value used to fill missing numbers. transform() turns raw columns
+    into the feature matrix the model was trained on.
+
+    Attributes:
+        feature_columns: Output column order
+        classes: Dict of categorical column to sorted class array
+        mean, scale: StandardScaler statistics for NUMERICAL_COLUMNS
+        fill_values: Fill value per numerical column for missing input
+    """
+
+    def __init__(self, classes, mean, scale, fill_values, feature_columns=FEATURE_COLUMNS):
+        self.feature_columns = list(feature_columns)
+        self.classes = {col: np.asarray(classes[col], dtype=str) for col in CATEGORICAL_COLUMNS}
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.fill_values = np.asarray([fill_values[col] for col in NUMERICAL_COLUMNS],
+                                      dtype=np.float64)
+
+    @classmethod
+    def from_encoders(cls, encoders, scaler, fill_values=None,
+                      feature_columns=FEATURE_COLUMNS):
+        """
+        Build the transform from encode_features() outputs.
+
+        Args:
+            encoders: Dict of fitted LabelEncoders
+            scaler: Fitted StandardScaler
+            fill_values: Dict of numerical column to fill value; defaults
+                to the training mean of each column
+            feature_columns: Output column order
+
+        Returns:
+            ChurnTransform
+        """
+        if fill_values is None:
+            fill_values = {}
+        fill_values = {col: fill_values.get(col, mean)
+                       for col, mean in zip(NUMERICAL_COLUMNS, scaler.mean_)}
+        return cls({col: encoders[col].classes_ for col in CATEGORICAL_COLUMNS},
+                   scaler.mean_, scaler.scale_, fill_values, feature_columns)
+
+    def unknown_code(self, column):
+        """Code assigned to categories not seen during fitting."""
+        return len(self.classes[column])
+
+    def transform(self, columns, dtype=np.float64):
+        """
+        Transform raw columns into the model feature matrix.
+
+        Args:
+            columns: Mapping of column name to 1-D array (a dict of NumPy
+                arrays or a DataFrame)
+            dtype: Output dtype
+
+        Returns:
+            ndarray: Matrix of shape (n_rows, len(feature_columns))
+        """
+        n_rows = len(columns[self.feature_columns[0]])
+        X = np.empty((n_rows, len(self.feature_columns)), dtype=dtype)
+
+        for i, col in enumerate(NUMERICAL_COLUMNS):
+            values = np.asarray(columns[col], dtype=np.float64)
+            values = np.where(np.isnan(values), self.fill_values[i], values)
+            X[:, self.feature_columns.index(col)] = (values - self.mean[i]) / self.scale[i]
+
+        for col in CATEGORICAL_COLUMNS:
+            values = columns[col]
+            values = getattr(values, 'array', values)  # unwrap pandas Series
+            X[:, self.feature_columns.index(col)] = _encode_categorical(values, self.classes[col])
+
+        return X
+
+    def transform_records(self, records, dtype=np.float64):
+        """Transform a list of raw record dicts (e.g. JSON request bodies)."""
+        columns = {col: np.array([record.get(col) for record in records],
+                                 dtype=object if col in CATEGORICAL_COLUMNS else np.float64)
+                   for col in self.feature_columns}
+        return self.transform(columns, dtype)
+
+    def save(self, path):
+        """Save the transform as a single .npz artifact (no pickled objects)."""
+        arrays = {f'classes_{col}': self.classes[col] for col in CATEGORICAL_COLUMNS}
+        np.savez_compressed(path, mean=self.mean, scale=self.scale,
+                            fill_values=self.fill_values,
+                            feature_columns=np.asarray(self.feature_columns), **arrays)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        """Load a transform written by save()."""
+        with np.load(path, allow_pickle=False) as data:
+            fill_values = dict(zip(NUMERICAL_COLUMNS, data['fill_values']))
+            classes = {col: data[f'classes_{col}'] for col in CATEGORICAL_COLUMNS}
+            return cls(classes, data['mean'], data['scale'], fill_values,
+                       data['feature_columns'].tolist())
@@ -0,0 +1,380 @@
+"""
+Hyperparameter Search Module
+
+This module runs grid, random and successive-halving hyperparameter searches
+around train.train_model. The processed data is loaded once and shared with a
+process pool through memory-mapped .npy files; every trial is logged to
+MLflow as a child run of one search run.
+"""
+
+import os
+import io
+import json
+import time
+import random
+import argparse
+import itertools
+import tempfile
+import contextlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from train import (
+    add_hyperparameter_args, evaluate_model, hyperparameters_from_args, load_processed_data,
+    train_model
+)
+from tracking import Tracker, add_tracking_args
+
+
+DEFAULT_SPACE = {
+    'n_estimators': [50, 100, 200],
+    'max_depth': [5, 10, 20],
+    'min_samples_split': [2, 5, 10],
+    'min_samples_leaf': [1, 2, 4],
+}
+
+# Scores of evaluate_model on the fit and validation sets, as named in _score()
+METRICS = [f'{split}_{name}' for split in ('val', 'fit')
+           for name in ('accuracy', 'precision', 'recall', 'f1')]
+
+# Per-process state set up by _init_worker()
+_WORKER = {}
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Hyperparameter search for the churn model')
+    parser.add_argument('--strategy', choices=['grid', 'random', 'halving'], default='random',
+                       help='Search strategy')
+    parser.add_argument('--n-trials', type=int, default=20,
+                       help='Number of sampled configurations (random/halving)')
+    parser.add_argument('--space', type=str, default=None,
+                       help='JSON dict of parameter name to list of values; parameters '
+                            'left out keep the train.py default (defaults to DEFAULT_SPACE)')
+    parser.add_argument('--metric', choices=METRICS, default='val_f1',
+                       help='Validation metric to maximize')
+    parser.add_argument('--validation-fraction', type=float, default=0.2,
+                       help='Fraction of the training set held out for scoring trials')
+    parser.add_argument('--n-jobs', type=int, default=os.cpu_count(),
+                       help='Number of worker processes')
+    parser.add_argument('--prune-margin', type=float, default=0.05,
+                       help='Stop grid/random trials whose partial score trails the '
+                            'best finished trial by more than this (negative disables)')
+    parser.add_argument('--min-estimators', type=int, default=10,
+                       help='Trees per candidate in the first halving rung')
+    parser.add_argument('--eta', type=int, default=3,
+                       help='Halving rate for successive halving')
+    parser.add_argument('--random-state', type=int, default=42,
+                       help='Random state for reproducibility')
+    parser.add_argument('--experiment-name', type=str, default='churn-prediction',
+                       help='MLflow experiment name')
+    add_tracking_args(parser)
+    args = parser.parse_args()
+    try:
+        args.space = search_space(json.loads(args.space) if args.space else DEFAULT_SPACE)
+    except ValueError as e:
+        parser.error(f'--space: {e}')
+    return args
+
+
+def search_space(space):
+    """
+    Complete a search space with the train.py defaults.
+
+    Parameters the space leaves out are searched over their default value
+    only, so every trial gets the full set train_model needs.
+
+    Args:
+        space: Dict of parameter name to list of values
+
+    Returns:
+        dict: Parameter name to list of values, for every train.py parameter
+
+    Raises:
+        ValueError: If the space names unknown parameters or has empty value lists
+    """
+    defaults = hyperparameters_from_args(
+        add_hyperparameter_args(argparse.ArgumentParser()).parse_args([]))
+    defaults.pop('random_state')
+    if not isinstance(space, dict):
+        raise ValueError("expected a JSON dict of parameter name to list of values")
+    unknown = set(space) - set(defaults)
+    if unknown:
+        raise ValueError(f"unknown hyperparameters {sorted(unknown)}")
+    empty = [name for name, values in space.items()
+             if not isinstance(values, list) or not values]
+    if empty:
+        raise ValueError(f"expected a non-empty list of values for {sorted(empty)}")
+    return dict({name: [value] for name, value in defaults.items()}, **space)
+
+
+def grid_candidates(space):
+    """All combinations of the search space values."""
+    names = sorted(space)
+    return [dict(zip(names, values))
+            for values in itertools.product(*(space[name] for name in names))]
+
+
+def random_candidates(space, n_trials, random_state):
+    """Sample n_trials distinct combinations from the search space."""
+    grid = grid_candidates(space)
+    rng = random.Random(random_state)
+    return rng.sample(grid, min(n_trials, len(grid)))
+
+
+def share_arrays(arrays, work_dir):
+    """
+    Write arrays to .npy files that worker processes can memory-map.
+
+    Features are stored as C-contiguous float32, the dtype sklearn's
+    trees use internally, so workers fit on the mapping without copying.
+
+    Args:
+        arrays: Dict of name to array
+        work_dir: Directory for the .npy files
+
+    Returns:
+        dict: Mapping of name to .npy path
+    """
+    paths = {}
+    for name, values in arrays.items():
+        path = os.path.join(work_dir, f'{name}.npy')
+        dtype = np.float32 if name.startswith('X_') else np.int64
+        np.save(path, np.ascontiguousarray(values, dtype=dtype))
+        paths[name] = path
+    return paths
+
+
+def _init_worker(paths, best_score, best_lock):
+    """Memory-map the shared arrays once per worker process."""
+    _WORKER['arrays'] = {name: np.load(path, mmap_mode='r') for name, path in paths.items()}
+    _WORKER['best_score'] = best_score
+    _WORKER['best_lock'] = best_lock
+
+
+def _score(model, metric):
+    """Evaluate a model on the shared fit/validation arrays."""
+    arrays = _WORKER['arrays']
+    with contextlib.redirect_stdout(io.StringIO()):
+        metrics = evaluate_model(model, arrays['X_fit'], arrays['y_fit'],
+                                 arrays['X_val'], arrays['y_val'])
+    # evaluate_model reports the held-out set as test_*; here it is validation
+    metrics = {key.replace('test_', 'val_').replace('train_', 'fit_'): value
+               for key, value in metrics.items()}
+    return metrics, metrics[metric]
+
+
+def run_trial(trial_id, hyperparameters, budgets, metric, prune_margin):
+    """
+    Train and score one configuration, growing the forest rung by rung.
+
+    Runs inside a worker process. After every rung but the last, the trial
+    stops early if its score trails the best finished trial by more than
+    prune_margin; the best score lives in shared memory.
+
+    Args:
+        trial_id: Trial number
+        hyperparameters: Parameters for train_model (n_estimators excluded)
+        budgets: Increasing list of tree counts to evaluate at
+        metric: Validation metric to maximize
+        prune_margin: Allowed gap to the best score (negative disables pruning)
+
+    Returns:
+        dict: Trial result with params, metrics, status and timings
+    """
+    arrays = _WORKER['arrays']
+    params = dict(hyperparameters, n_estimators=budgets[0], n_jobs=1)
+    start_time = time.time()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        model, _ = train_model(arrays['X_fit'], arrays['y_fit'], params)
+    metrics, score = _score(model, metric)
+    status = 'completed'
+
+    for budget in budgets[1:]:
+        if prune_margin >= 0 and score < _WORKER['best_score'].value - prune_margin:
+            status = 'pruned'
+            break
+        # Grow the existing forest instead of refitting it
+        model.set_params(warm_start=True, n_estimators=budget)
+        model.fit(arrays['X_fit'], arrays['y_fit'])
+        metrics, score = _score(model, metric)
+
+    if status == 'completed':
+        with _WORKER['best_lock']:
+            if score > _WORKER['best_score'].value:
+                _WORKER['best_score'].value = score
+
+    return {
+        'trial_id': trial_id,
+        'params': dict(hyperparameters, n_estimators=model.n_estimators),
+        'metrics': metrics,
+        'score': score,
+        'status': status,
+        'training_time': time.time() - start_time,
+    }
+
+
+def _run_batch(pool, trials, metric, prune_margin):
+    """Submit (trial_id, params, budgets) tuples and collect their results."""
+    futures = [pool.submit(run_trial, trial_id, params, budgets, metric, prune_margin)
+               for trial_id, params, budgets in trials]
+    results = []
+    for future in as_completed(futures):
+        result = future.result()
+        print(f"  Trial {result['trial_id']:3d} {result['status']:9s} "
+              f"{metric}={result['score']:.4f} {result['params']}")
+        results.append(result)
+    return results
+
+
+def search(pool, strategy, candidates, space, args):
+    """
+    Run the search strategy on the worker pool.
+
+    Args:
+        pool: ProcessPoolExecutor with shared arrays
+        strategy: 'grid', 'random' or 'halving'
+        candidates: List of hyperparameter dicts
+        space: Search space the candidates were drawn from
+        args: Parsed command line arguments
+
+    Returns:
+        list: Trial results
+    """
+    if strategy != 'halving':
+        trials = []
+        for trial_id, params in enumerate(candidates):
+            params = dict(params, random_state=args.random_state)
+            n_estimators = params.pop('n_estimators', 100)
+            probe = max(1, n_estimators // 4)
+            budgets = [probe, n_estimators] if probe < n_estimators else [n_estimators]
+            trials.append((trial_id, params, budgets))
+        return _run_batch(pool, trials, args.metric, args.prune_margin)
+
+    # Successive halving: n_estimators is the budget, so drop it from the
+    # candidates and grow it by eta each rung while keeping the best 1/eta.
+    max_estimators = max(space.get('n_estimators', [100]))
+    unique = {json.dumps({k: v for k, v in c.items() if k != 'n_estimators'}, sort_keys=True)
+              for c in candidates}
+    survivors = [dict(json.loads(c), random_state=args.random_state) for c in sorted(unique)]
+    budget = args.min_estimators
+    results = []
+    trial_id = 0
+    rung = 0
+
+    while survivors:
+        budget = min(budget, max_estimators)
+        final = budget >= max_estimators or len(survivors) == 1
+        print(f"Rung {rung}: {len(survivors)} candidates with {budget} trees")
+        trials = []
+        for params in survivors:
+            trials.append((trial_id, params, [budget]))
+            trial_id += 1
+        rung_results = _run_batch(pool, trials, args.metric, -1)
+        for result in rung_results:
+            result['rung'] = rung
+        results += rung_results
+
+        if final:
+            break
+        rung_results.sort(key=lambda r: r['score'], reverse=True)
+        keep = max(1, len(rung_results) // args.eta)
+        survivors = [{k: v for k, v in r['params'].items() if k != 'n_estimators'}
+                     for r in rung_results[:keep]]
+        # Survivors are scored again with more trees; only the last rung counts
+        for result in rung_results[:keep]:
+            result['status'] = 'promoted'
+        for result in rung_results[keep:]:
+            result['status'] = 'pruned'
+        budget *= args.eta
+        rung += 1
+
+    return results
+
+
+def log_trials(results, run):
+    """Log every trial as a nested MLflow run of the search run."""
+    for result in sorted(results, key=lambda r: r['trial_id']):
+        with run.child(run_name=f"trial-{result['trial_id']}") as trial_run:
+            trial_run.log_params(result['params'])
+            trial_run.log_param('status', result['status'])
+            if 'rung' in result:
+                trial_run.log_param('rung', result['rung'])
+            trial_run.log_metrics(dict(result['metrics'], training_time=result['training_time'],
+                                       score=result['score']))
+
+
+def main():
+    """Main hyperparameter search pipeline."""
+    args = parse_args()
+    space = args.space
+
+    print("=" * 60)
+    print(f"STARTING HYPERPARAMETER SEARCH ({args.strategy})")
+    print("=" * 60)
+
+    mlflow_uri = os.getenv('MLFLOW_TRACKING_URI', 'http://mlflow:5000')
+
+    from sklearn.model_selection import train_test_split
+
+    # Load data once and hold out a validation set for scoring trials
+    X_train, _, y_train, _ = load_processed_data()
+    X_fit, X_val, y_fit, y_val = train_test_split(
+        X_train, y_train, test_size=args.validation_fraction,
+        random_state=args.random_state, stratify=y_train
+    )
+
+    if args.strategy == 'grid':
+        candidates = grid_candidates(space)
+    else:
+        candidates = random_candidates(space, args.n_trials, args.random_state)
+    print(f"Searching {len(candidates)} configurations on {args.n_jobs} workers")
+
+    # Not fork: the tracker's sender thread runs while the pool starts workers
+    ctx = multiprocessing.get_context('forkserver')
+    best_score = ctx.Value('d', float('-inf'), lock=False)
+    best_lock = ctx.Lock()
+
+    with tempfile.TemporaryDirectory(prefix='tune-') as work_dir:
+        paths = share_arrays({'X_fit': X_fit, 'X_val': X_val,
+                              'y_fit': y_fit, 'y_val': y_val}, work_dir)
+
+        tracker = Tracker(args.experiment_name, mlflow_uri, spool_dir=args.spool_dir,
+                          mode=args.tracking_mode)
+        with tracker, tracker.start_run(run_name=f'search-{args.strategy}') as run:
+            run.log_params({'strategy': args.strategy, 'metric': args.metric,
+                            'n_candidates': len(candidates), 'n_jobs': args.n_jobs,
+                            'search_space': json.dumps(space)})
+
+            start_time = time.time()
+            with ProcessPoolExecutor(max_workers=args.n_jobs, mp_context=ctx,
+                                     initializer=_init_worker,
+                                     initargs=(paths, best_score, best_lock)) as pool:
+                results = search(pool, args.strategy, candidates, space, args)
+            search_time = time.time() - start_time
+
+            log_trials(results, run)
+
+            completed = [r for r in results if r['status'] == 'completed']
+            best = max(completed or results, key=lambda r: r['score'])
+            run.log_metrics({'search_time': search_time, f'best_{args.metric}': best['score']})
+            run.log_params({f'best_{k}': v for k, v in best['params'].items()})
+
+    print("\n" + "=" * 60)
+    print("HYPERPARAMETER SEARCH COMPLETED SUCCESSFULLY")
+    print("=" * 60)
+    pruned = sum(1 for r in results if r['status'] == 'pruned')
+    print(f"Trials: {len(results)} ({pruned} pruned) in {search_time:.1f} seconds")
+    print(f"Best {args.metric}: {best['score']:.4f}")
+    print(f"Best hyperparameters: {best['params']}")
+    params = best['params']
+    print("\nTrain the final model with:")
+    print(f"  python pipeline/train.py --n-estimators {params['n_estimators']} "
+          f"--max-depth {params['max_depth']} "
+          f"--min-samples-split {params['min_samples_split']} "
+          f"--min-samples-leaf {params['min_samples_leaf']}")
+
+
+if __name__ == '__main__':
+    main()
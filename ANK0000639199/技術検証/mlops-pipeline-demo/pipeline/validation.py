@@ -0,0 +1,198 @@
+"""
+Data Validation Module
+
+This module provides a declarative schema for the raw customer data and a
+validation engine that checks every rule in a single vectorized pass per
+column. The result is a structured report with per-rule violation counts
+and the row mask used by cleaning.
+"""
+
+import pandas as pd
+import numpy as np
+
+
+# Column spec keys:
+#   dtype:   'numeric' or 'category'
+#   storage: compact in-memory dtype of the column (see preprocess.load_data)
+#   min/max: inclusive numeric range
+#   allowed: allowed category values
+#   nulls:   'allow', 'warn', 'drop', 'fill_median' or 'error'
+#   invalid: action for range/allowed violations: 'warn', 'drop' or 'error'
+CHURN_SCHEMA = {
+    'Age': {'dtype': 'numeric', 'storage': 'int8', 'min': 18, 'max': 100,
+            'nulls': 'drop', 'invalid': 'drop'},
+    'Tenure': {'dtype': 'numeric', 'storage': 'int16', 'min': 0, 'nulls': 'drop',
+               'invalid': 'drop'},
+    'MonthlyCharges': {'dtype': 'numeric', 'storage': 'float32', 'nulls': 'warn'},
+    'TotalCharges': {'dtype': 'numeric', 'storage': 'float32', 'nulls': 'fill_median'},
+    'Contract': {'dtype': 'category', 'storage': 'category', 'nulls': 'warn', 'invalid': 'warn',
+                 'allowed': ['Month-to-month', 'One year', 'Two year']},
+    'PaymentMethod': {'dtype': 'category', 'storage': 'category', 'nulls': 'warn',
+                      'invalid': 'warn',
+                      'allowed': ['Bank transfer', 'Credit card', 'Electronic check',
+                                  'Mailed check']},
+    'Churn': {'dtype': 'numeric', 'storage': 'int8', 'nulls': 'error', 'invalid': 'warn',
+              'allowed': [0, 1]},
+}
+
+NULL_ACTIONS = ('allow', 'warn', 'drop', 'fill_median', 'error')
+INVALID_ACTIONS = ('warn', 'drop', 'error')
+
+
+class DataValidationError(ValueError):
+    """Raised when data violates a schema rule whose action is 'error'."""
+
+    def __init__(self, report):
+        self.report = report
+        super().__init__("Data validation failed:\n" + "\n".join(report.error_messages()))
+
+
+class ValidationReport:
+    """
+    Structured result of validating one DataFrame against a schema.
+
+    Attributes:
+        n_rows: Number of validated rows
+        schema_errors: Structural problems (missing columns, wrong dtypes)
+        rules: List of dicts with 'rule', 'column', 'action' and 'violations'
+        keep_mask: Boolean array, False for rows a 'drop' rule rejected
+    """
+
+    def __init__(self, n_rows, schema_errors, rules, keep_mask):
+        self.n_rows = n_rows
+        self.schema_errors = schema_errors
+        self.rules = rules
+        self.keep_mask = keep_mask
+
+    @property
+    def ok(self):
+        """True when no schema error and no 'error' rule was violated."""
+        return not self.error_messages()
+
+    @property
+    def dropped_rows(self):
+        """Number of rows rejected by 'drop' rules."""
+        return int(self.n_rows - np.count_nonzero(self.keep_mask))
+
+    def violations(self, action=None):
+        """Rules with at least one violation, optionally filtered by action."""
+        return [rule for rule in self.rules
+                if rule['violations'] and (action is None or rule['action'] == action)]
+
+    def error_messages(self):
+        """Human readable messages for everything that fails validation."""
+        messages = list(self.schema_errors)
+        messages += [f"{rule['rule']}: {rule['violations']} violating rows"
+                     for rule in self.violations('error')]
+        return messages
+
+    def to_dict(self):
+        """JSON-serializable summary of the report (without the row mask)."""
+        return {
+            'n_rows': int(self.n_rows),
+            'ok': self.ok,
+            'dropped_rows': self.dropped_rows,
+            'schema_errors': list(self.schema_errors),
+            'rules': [dict(rule) for rule in self.rules],
+        }
+
+
+def _compile_rules(schema):
+    """
+    Turn a column schema into a flat list of rule checks.
+
+    Each check is (rule name, column, action, kind, argument) where kind is
+    one of 'null', 'min', 'max' or 'allowed'.
+    """
+    rules = []
+    for column, spec in schema.items():
+        nulls = spec.get('nulls', 'warn')
+        invalid = spec.get('invalid', 'warn')
+        if nulls not in NULL_ACTIONS:
+            raise ValueError(f"Unknown null policy '{nulls}' for column {column}")
+        if invalid not in INVALID_ACTIONS:
+            raise ValueError(f"Unknown invalid action '{invalid}' for column {column}")
+
+        if nulls != 'allow':
+            rules.append((f'{column}.nulls', column, nulls, 'null', None))
+        if 'min' in spec:
+            rules.append((f'{column}.min', column, invalid, 'min', spec['min']))
+        if 'max' in spec:
+            rules.append((f'{column}.max', column, invalid, 'max', spec['max']))
+        if 'allowed' in spec:
+            rules.append((f'{column}.allowed', column, invalid, 'allowed', spec['allowed']))
+    return rules
+
+
+def _check_dtype(series, expected):
+    """Return an error message if a column does not have the expected kind."""
+    if expected == 'numeric' and not pd.api.types.is_numeric_dtype(series.dtype):
+        return f"{series.name} must be numeric, got {series.dtype}"
+    return None
+
+
+def validate(df, schema=CHURN_SCHEMA):
+    """
+    Validate a DataFrame against a declarative schema.
+
+    Every column is converted to a NumPy array once; its null mask is
+    computed once and shared by all rules on that column, and range and
+    category rules are evaluated as vectorized comparisons. Rows failing a
+    'drop' rule are cleared in the returned keep mask.
+
+    Args:
+        df: Input DataFrame
+        schema: Column spec dict (see CHURN_SCHEMA)
+
+    Returns:
+        ValidationReport: Per-rule violation counts and the row keep mask
+    """
+    n_rows = len(df)
+    schema_errors = []
+    missing_columns = [col for col in schema if col not in df.columns]
+    if missing_columns:
+        schema_errors.append(f"Missing required columns: {set(missing_columns)}")
+    unusable_columns = set(missing_columns)
+
+    for column, spec in schema.items():
+        if column in df.columns:
+            error = _check_dtype(df[column], spec.get('dtype'))
+            if error:
+                schema_errors.append(error)
+                unusable_columns.add(column)
+
+    keep_mask = np.ones(n_rows, dtype=bool)
+    results = []
+    null_masks = {}
+    numeric_values = {}
+
+    for name, column, action, kind, arg in _compile_rules(schema):
+        if column in unusable_columns:
+            results.append({'rule': name, 'column': column, 'action': action,
+                            'violations': 0})
+            continue
+
+        series = df[column]
+        if column not in null_masks:
+            null_masks[column] = series.isna().to_numpy()
+        nulls = null_masks[column]
+
+        if kind == 'null':
+            violating = nulls
+        elif kind == 'allowed':
+            violating = ~series.isin(arg).to_numpy() & ~nulls
+        else:
+            if column not in numeric_values:
+                numeric_values[column] = series.to_numpy(dtype=np.float64, na_value=np.nan)
+            values = numeric_values[column]
+            with np.errstate(invalid='ignore'):
+                violating = values < arg if kind == 'min' else values > arg
+            # NaN fails every comparison; nulls are handled by the null rule
+            violating &= ~nulls
+
+        if action == 'drop':
+            keep_mask &= ~violating
+        results.append({'rule': name, 'column': column, 'action': action,
+                        'violations': int(np.count_nonzero(violating))})
+
+    return ValidationReport(n_rows, schema_errors, results, keep_mask)
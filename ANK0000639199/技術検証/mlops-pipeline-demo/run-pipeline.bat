@@ -23,16 +23,8 @@ timeout /t 10 /nobreak >nul
 echo MLflow should be ready!
 echo.
 
-echo Step 3: Running data preprocessing...
-docker-compose run --rm pipeline python -c "from pipeline.preprocess import preprocess_data; preprocess_data()"
-echo.
-
-echo Step 4: Training model...
-docker-compose run --rm pipeline python pipeline/train.py
-echo.
-
-echo Step 5: Evaluating model...
-docker-compose run --rm pipeline python pipeline/evaluate.py
+echo Step 3: Running preprocessing, training and evaluation...
+docker-compose run --rm pipeline python pipeline/run_pipeline.py %*
 echo.
 
 echo ========================================
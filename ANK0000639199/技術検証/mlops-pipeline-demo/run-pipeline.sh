@@ -45,19 +45,10 @@ if [ $attempt -eq $max_attempts ]; then
 fi
 echo ""
 
-# Run preprocessing
-echo -e "${BLUE}Step 3: Running data preprocessing...${NC}"
-docker-compose run --rm pipeline python -c "from pipeline.preprocess import preprocess_data; preprocess_data()"
-echo ""
-
-# Run training
-echo -e "${BLUE}Step 4: Training model...${NC}"
-docker-compose run --rm pipeline python pipeline/train.py
-echo ""
-
-# Run evaluation
-echo -e "${BLUE}Step 5: Evaluating model...${NC}"
-docker-compose run --rm pipeline python pipeline/evaluate.py
+# Run preprocessing, training and evaluation in one container and process;
+# data and model are passed between the stages in memory
+echo -e "${BLUE}Step 3: Running preprocessing, training and evaluation...${NC}"
+docker-compose run --rm pipeline python pipeline/run_pipeline.py "$@"
 echo ""
 
 echo -e "${GREEN}========================================"
@@ -3,15 +3,22 @@ SRE Monitoring Demo - Sample Flask Application
 This application demonstrates Prometheus metrics integration
 """
 
-from flask import Flask, jsonify, request
-from prometheus_client import Counter, Histogram, Gauge, generate_latest, REGISTRY
+from flask import Flask, jsonify
+from prometheus_client import Counter, Histogram, Gauge
 import time
 import random
 import os
 
+from compute_pool import BoundedProcessPool, PoolFull
+from metrics_registry import render_metrics
+from request_metrics import RequestMetrics
+from workloads import sum_of_squares
+
 app = Flask(__name__)
 
 # Prometheus Metrics
+# Under gunicorn these live in PROMETHEUS_MULTIPROC_DIR and are summed
+# across workers; gauges declare how their per-worker values combine.
 REQUEST_COUNT = Counter(
     'flask_http_request_total',
     'Total HTTP requests',
@@ -26,39 +33,23 @@ REQUEST_DURATION = Histogram(
 
 ACTIVE_REQUESTS = Gauge(
     'flask_http_requests_active',
-    'Number of active requests'
+    'Number of active requests',
+    multiprocess_mode='livesum'
 )
 
 BUSINESS_METRIC = Gauge(
     'business_metric_value',
     'Sample business metric',
-    ['metric_type']
+    ['metric_type'],
+    multiprocess_mode='mostrecent'
 )
 
-# Middleware to track metrics
-@app.before_request
-def before_request():
-    request.start_time = time.time()
-    ACTIVE_REQUESTS.inc()
+# CPU-bound handlers run here instead of on the request thread
+COMPUTE_POOL = BoundedProcessPool()
 
-@app.after_request
-def after_request(response):
-    request_duration = time.time() - request.start_time
-    
-    REQUEST_DURATION.labels(
-        method=request.method,
-        endpoint=request.endpoint or 'unknown'
-    ).observe(request_duration)
-    
-    REQUEST_COUNT.labels(
-        method=request.method,
-        endpoint=request.endpoint or 'unknown',
-        status=response.status_code
-    ).inc()
-    
-    ACTIVE_REQUESTS.dec()
-    
-    return response
+# Middleware to track metrics (buffered per thread, merged at scrape time)
+REQUEST_METRICS = RequestMetrics(REQUEST_COUNT, REQUEST_DURATION, ACTIVE_REQUESTS)
+REQUEST_METRICS.init_app(app)
 
 # Application Routes
 @app.route('/')
@@ -91,8 +82,10 @@ def metrics():
     # Update business metrics before returning
     BUSINESS_METRIC.labels(metric_type='random').set(random.randint(1, 100))
     BUSINESS_METRIC.labels(metric_type='timestamp').set(time.time())
-    
-    return generate_latest(REGISTRY), 200, {'Content-Type': 'text/plain; charset=utf-8'}
+
+    REQUEST_METRICS.flush()
+    body, headers = render_metrics()
+    return body, 200, headers
 
 @app.route('/api/data')
 def api_data():
@@ -140,8 +133,8 @@ def api_error():
 @app.route('/api/compute')
 def api_compute():
     """CPU-intensive endpoint for testing CPU alerts"""
-    # Simulate CPU work
-    result = sum([i ** 2 for i in range(100000)])
+    # CPU work runs in a pool process; 503 when the pool's queue is full
+    result = COMPUTE_POOL.run(sum_of_squares, 100000)
     
     return jsonify({
         'result': result,
@@ -152,10 +145,18 @@ def api_compute():
 def not_found(error):
     return jsonify({'error': 'Not found'}), 404
 
+@app.errorhandler(PoolFull)
+def compute_pool_full(error):
+    return jsonify({
+        'error': 'Service Unavailable',
+        'message': 'Compute capacity exhausted, retry later'
+    }), 503, {'Retry-After': str(error.retry_after)}
+
 @app.errorhandler(500)
 def internal_error(error):
     return jsonify({'error': 'Internal server error'}), 500
 
 if __name__ == '__main__':
+    # Development server; use gunicorn.conf.py for production
     port = int(os.environ.get('PORT', 8000))
     app.run(host='0.0.0.0', port=port, debug=False)
@@ -0,0 +1,53 @@
+"""
+ASGI Metrics Middleware
+Request metrics for the asyncio variants of the demo apps, recorded through
+the same RequestMetrics buffers as the Flask before_request/after_request hooks
+"""
+
+from time import perf_counter_ns
+
+
+class PrometheusMiddleware:
+    """
+    Pure ASGI middleware that counts and times HTTP requests.
+
+    Labels match the Flask apps: `endpoint` is the name of the view
+    function that handled the request ('unknown' when no route matched),
+    `status` is the response status code. Duration covers the whole
+    request including the response body, as seen by the event loop.
+
+    Args:
+        app: The wrapped ASGI application
+        metrics: RequestMetrics instance (see request_metrics.py)
+    """
+
+    def __init__(self, app, metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        active_requests = self.metrics.active_requests
+        start_ns = perf_counter_ns()
+        if active_requests is not None:
+            active_requests.inc()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # The router stores the matched view function in the scope
+            endpoint = getattr(scope.get('endpoint'), '__name__', 'unknown')
+            self.metrics.record(scope['method'], endpoint, status,
+                                perf_counter_ns() - start_ns)
+            if active_requests is not None:
+                active_requests.dec()
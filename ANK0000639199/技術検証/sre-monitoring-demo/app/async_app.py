@@ -0,0 +1,187 @@
+"""
+SRE Monitoring Demo - Asyncio Variant of app.py
+Same routes and Prometheus metrics, served by an ASGI event loop
+
+Simulated I/O waits use `await asyncio.sleep()`, so a slow request only
+suspends its own coroutine and the worker keeps serving other requests.
+CPU-bound work is awaited from the compute process pool.
+
+Usage:
+    uvicorn async_app:app --port 8000
+    gunicorn -c gunicorn.conf.py -k uvicorn.workers.UvicornWorker async_app:app
+"""
+
+import asyncio
+import os
+import random
+import time
+
+from prometheus_client import Counter, Gauge, Histogram
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from asgi_metrics import PrometheusMiddleware
+from compute_pool import BoundedProcessPool, PoolFull
+from metrics_registry import render_metrics
+from request_metrics import RequestMetrics
+from workloads import sum_of_squares
+
+# Prometheus Metrics (same names as app.py, so dashboards and alerts apply)
+REQUEST_COUNT = Counter(
+    'flask_http_request_total',
+    'Total HTTP requests',
+    ['method', 'endpoint', 'status']
+)
+
+REQUEST_DURATION = Histogram(
+    'flask_http_request_duration_seconds',
+    'HTTP request duration in seconds',
+    ['method', 'endpoint']
+)
+
+ACTIVE_REQUESTS = Gauge(
+    'flask_http_requests_active',
+    'Number of active requests',
+    multiprocess_mode='livesum'
+)
+
+BUSINESS_METRIC = Gauge(
+    'business_metric_value',
+    'Sample business metric',
+    ['metric_type'],
+    multiprocess_mode='mostrecent'
+)
+
+REQUEST_METRICS = RequestMetrics(REQUEST_COUNT, REQUEST_DURATION, ACTIVE_REQUESTS)
+
+COMPUTE_POOL = BoundedProcessPool()
+
+
+# Application Routes
+async def index(request):
+    return JSONResponse({
+        'service': 'SRE Monitoring Demo',
+        'status': 'running',
+        'version': '1.0.0',
+        'endpoints': {
+            '/': 'This page',
+            '/health': 'Health check endpoint',
+            '/metrics': 'Prometheus metrics',
+            '/api/data': 'Sample data endpoint',
+            '/api/slow': 'Simulated slow endpoint',
+            '/api/error': 'Simulated error endpoint'
+        }
+    })
+
+
+async def health(request):
+    """Health check endpoint"""
+    return JSONResponse({
+        'status': 'healthy',
+        'timestamp': time.time()
+    }, status_code=200)
+
+
+async def metrics(request):
+    """Prometheus metrics endpoint"""
+    # Update business metrics before returning
+    BUSINESS_METRIC.labels(metric_type='random').set(random.randint(1, 100))
+    BUSINESS_METRIC.labels(metric_type='timestamp').set(time.time())
+
+    REQUEST_METRICS.flush()
+    body, headers = render_metrics()
+    return Response(body, status_code=200, headers=headers)
+
+
+async def api_data(request):
+    """Sample API endpoint that returns data"""
+    # Simulate some I/O time without blocking the event loop
+    await asyncio.sleep(random.uniform(0.01, 0.1))
+
+    return JSONResponse({
+        'data': [
+            {'id': 1, 'name': 'Item 1', 'value': random.randint(1, 100)},
+            {'id': 2, 'name': 'Item 2', 'value': random.randint(1, 100)},
+            {'id': 3, 'name': 'Item 3', 'value': random.randint(1, 100)}
+        ],
+        'timestamp': time.time()
+    })
+
+
+async def api_slow(request):
+    """Simulated slow endpoint for testing latency alerts"""
+    # Simulate slow I/O (1-3 seconds); other requests keep being served
+    delay = random.uniform(1.0, 3.0)
+    await asyncio.sleep(delay)
+
+    return JSONResponse({
+        'message': 'This was a slow request',
+        'delay': delay,
+        'timestamp': time.time()
+    })
+
+
+async def api_error(request):
+    """Simulated error endpoint for testing error rate alerts"""
+    # Randomly return errors
+    if random.random() < 0.5:
+        return JSONResponse({
+            'error': 'Internal Server Error',
+            'message': 'This is a simulated error for testing'
+        }, status_code=500)
+
+    return JSONResponse({
+        'message': 'Success',
+        'timestamp': time.time()
+    })
+
+
+async def api_compute(request):
+    """CPU-intensive endpoint for testing CPU alerts"""
+    # CPU work runs in a pool process; 503 when the pool's queue is full
+    result = await COMPUTE_POOL.run_async(sum_of_squares, 100000)
+
+    return JSONResponse({
+        'result': result,
+        'timestamp': time.time()
+    })
+
+
+async def not_found(request, exc):
+    return JSONResponse({'error': 'Not found'}, status_code=404)
+
+
+async def compute_pool_full(request, exc):
+    return JSONResponse({
+        'error': 'Service Unavailable',
+        'message': 'Compute capacity exhausted, retry later'
+    }, status_code=503, headers={'Retry-After': str(exc.retry_after)})
+
+
+async def internal_error(request, exc):
+    return JSONResponse({'error': 'Internal server error'}, status_code=500)
+
+
+app = Starlette(
+    routes=[
+        Route('/', index),
+        Route('/health', health),
+        Route('/metrics', metrics),
+        Route('/api/data', api_data),
+        Route('/api/slow', api_slow),
+        Route('/api/error', api_error),
+        Route('/api/compute', api_compute),
+    ],
+    middleware=[
+        Middleware(PrometheusMiddleware, metrics=REQUEST_METRICS),
+    ],
+    exception_handlers={404: not_found, PoolFull: compute_pool_full, 500: internal_error},
+)
+
+if __name__ == '__main__':
+    import uvicorn
+
+    port = int(os.environ.get('PORT', 8000))
+    uvicorn.run(app, host='0.0.0.0', port=port)
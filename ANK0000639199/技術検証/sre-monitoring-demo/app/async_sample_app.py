@@ -0,0 +1,251 @@
+"""
+Asyncio Variant of sample-app.py
+Same routes, business and system metrics, served by an ASGI event loop
+
+Simulated order processing and slow requests await instead of sleeping,
+so they do not hold a worker while they wait.
+
+Usage:
+    uvicorn async_sample_app:app --port 5000
+"""
+
+import asyncio
+import contextlib
+import os
+import random
+import threading
+import time
+import urllib.request
+
+from prometheus_client import Counter, Histogram, Gauge, REGISTRY
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from asgi_metrics import PrometheusMiddleware
+from compute_pool import BoundedProcessPool, PoolFull
+from metrics_registry import render_metrics
+from request_metrics import RequestMetrics
+from system_metrics import SystemMetricsCollector
+from workloads import sum_of_squares
+
+# Custom Metrics (same names as sample-app.py)
+request_count = Counter(
+    'app_requests_total',
+    'Total number of requests',
+    ['method', 'endpoint', 'status']
+)
+
+request_duration = Histogram(
+    'app_request_duration_seconds',
+    'Request duration in seconds',
+    ['method', 'endpoint']
+)
+
+active_users = Gauge('app_active_users', 'Number of active users',
+                     multiprocess_mode='livesum')
+error_rate = Gauge('app_error_rate', 'Current error rate', multiprocess_mode='livemax')
+database_connections = Gauge('app_database_connections', 'Active database connections',
+                             multiprocess_mode='mostrecent')
+
+request_metrics = RequestMetrics(request_count, request_duration)
+
+# Business Metrics
+orders_total = Counter('app_orders_total', 'Total orders processed', ['status'])
+revenue_total = Counter('app_revenue_total', 'Total revenue in cents')
+
+# System Metrics
+system_metrics = SystemMetricsCollector(
+    period=float(os.environ.get('SYSTEM_METRICS_PERIOD', '5'))
+)
+REGISTRY.register(system_metrics)
+
+compute_pool = BoundedProcessPool()
+
+# Simulate some state (handlers run on one event loop, no locking needed)
+active_user_count = 0
+db_connections = 0
+
+
+async def index(request):
+    """Homepage with API documentation"""
+    return JSONResponse({
+        'service': 'SRE Monitoring Demo Application',
+        'version': '1.0.0',
+        'endpoints': {
+            '/': 'This documentation',
+            '/health': 'Health check endpoint',
+            '/metrics': 'Prometheus metrics endpoint',
+            '/api/users': 'Simulate user activity',
+            '/api/orders': 'Simulate order processing',
+            '/api/slow': 'Slow endpoint (>1s)',
+            '/api/error': 'Endpoint that fails randomly',
+            '/api/heavy': 'CPU intensive operation'
+        }
+    })
+
+
+async def health(request):
+    """Health check endpoint for monitoring"""
+    health_status = {
+        'status': 'healthy',
+        'timestamp': time.time(),
+        'checks': {
+            'database': 'ok',
+            'cache': 'ok',
+            'disk_space': 'ok'
+        }
+    }
+
+    # Simulate health check logic
+    if random.random() > 0.95:  # 5% chance of degraded
+        health_status['status'] = 'degraded'
+        health_status['checks']['database'] = 'slow'
+        return JSONResponse(health_status, status_code=503)
+
+    return JSONResponse(health_status, status_code=200)
+
+
+async def users(request):
+    """Simulate user activity"""
+    global active_user_count
+
+    if request.method == 'POST':
+        active_user_count += 1
+        active_users.set(active_user_count)
+        return JSONResponse({'message': 'User logged in', 'active_users': active_user_count})
+    else:
+        return JSONResponse({'active_users': active_user_count})
+
+
+async def create_order(request):
+    """Simulate order processing"""
+    # Random order processing (awaited I/O)
+    processing_time = random.uniform(0.1, 0.5)
+    await asyncio.sleep(processing_time)
+
+    # 90% success rate
+    if random.random() > 0.1:
+        order_value = random.randint(1000, 50000)  # in cents
+        orders_total.labels(status='success').inc()
+        revenue_total.inc(order_value)
+
+        return JSONResponse({
+            'status': 'success',
+            'order_id': random.randint(10000, 99999),
+            'amount': order_value / 100,
+            'processing_time': processing_time
+        })
+    else:
+        orders_total.labels(status='failed').inc()
+        return JSONResponse({'status': 'failed', 'error': 'Payment processing failed'},
+                            status_code=500)
+
+
+async def slow_endpoint(request):
+    """Simulate a slow endpoint (SLO violation)"""
+    delay = random.uniform(1.0, 3.0)
+    await asyncio.sleep(delay)
+    return JSONResponse({
+        'message': 'This was a slow request',
+        'delay': delay
+    })
+
+
+async def error_endpoint(request):
+    """Endpoint that fails randomly (40% failure rate)"""
+    if random.random() > 0.6:
+        return JSONResponse({'status': 'success'})
+    else:
+        error_rate.set(0.4)
+        return JSONResponse({'error': 'Random failure occurred'}, status_code=500)
+
+
+async def heavy_endpoint(request):
+    """Simulate CPU intensive operation, in a pool process"""
+    result = await compute_pool.run_async(sum_of_squares, 100000)
+
+    global db_connections
+    db_connections = random.randint(5, 50)
+    database_connections.set(db_connections)
+
+    return JSONResponse({
+        'message': 'Heavy computation completed',
+        'result': result,
+        'db_connections': db_connections
+    })
+
+
+async def compute_pool_full(request, exc):
+    """Shed load quickly when the compute pool is saturated"""
+    return JSONResponse({'error': 'Compute capacity exhausted, retry later'},
+                        status_code=503, headers={'Retry-After': str(exc.retry_after)})
+
+
+async def metrics(request):
+    """Prometheus metrics endpoint"""
+    request_metrics.flush()
+    body, headers = render_metrics(collectors=[system_metrics])
+    return Response(body, status_code=200, headers=headers)
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    """Sample system metrics in the background while the server runs"""
+    system_metrics.start()
+    yield
+    system_metrics.stop()
+    compute_pool.shutdown()
+
+
+async def simulate_traffic(request):
+    """Simulate various traffic patterns for demo purposes"""
+    base_url = f"http://localhost:{os.environ.get('PORT', '5000')}"
+
+    def generate_traffic():
+        for _ in range(50):
+            try:
+                # Mix of different endpoints
+                endpoints = ['/api/orders', '/api/users', '/api/heavy', '/api/error']
+                endpoint = random.choice(endpoints)
+                method = 'POST' if endpoint == '/api/orders' else 'GET'
+                urllib.request.urlopen(
+                    urllib.request.Request(f'{base_url}{endpoint}', method=method), timeout=10
+                ).close()
+            except OSError:
+                pass
+            time.sleep(random.uniform(0.1, 0.5))
+
+    thread = threading.Thread(target=generate_traffic)
+    thread.daemon = True
+    thread.start()
+
+    return JSONResponse({'message': 'Traffic simulation started'})
+
+
+app = Starlette(
+    routes=[
+        Route('/', index),
+        Route('/health', health),
+        Route('/api/users', users, methods=['POST', 'GET']),
+        Route('/api/orders', create_order, methods=['POST']),
+        Route('/api/slow', slow_endpoint),
+        Route('/api/error', error_endpoint),
+        Route('/api/heavy', heavy_endpoint),
+        Route('/metrics', metrics),
+        Route('/api/simulate-traffic', simulate_traffic, methods=['POST']),
+    ],
+    middleware=[
+        Middleware(PrometheusMiddleware, metrics=request_metrics),
+    ],
+    exception_handlers={PoolFull: compute_pool_full},
+    lifespan=lifespan,
+)
+
+if __name__ == '__main__':
+    import uvicorn
+
+    print("Starting SRE Monitoring Demo Application (asyncio)...")
+    print("Metrics available at http://localhost:5000/metrics")
+    uvicorn.run(app, host='0.0.0.0', port=int(os.environ.get('PORT', 5000)))
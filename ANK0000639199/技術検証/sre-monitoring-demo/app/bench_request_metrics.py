@@ -0,0 +1,135 @@
+"""
+Request Metrics Overhead Microbenchmark
+Per-request cost of the metrics hooks: the previous inline
+before_request/after_request code against RequestMetrics
+
+Both variants record into their own registry. "hooks" calls only the
+registered hook functions inside one request context; "flush" is the
+merge cost RequestMetrics moves to scrape time, per request; "request" is a
+full Flask test-client request including the hooks.
+
+Usage:
+    python bench_request_metrics.py --requests 200000
+"""
+
+import argparse
+import statistics
+import time
+
+from flask import Flask, request
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram
+
+from request_metrics import RequestMetrics
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Benchmark per-request metrics overhead')
+    parser.add_argument('--requests', type=int, default=200000,
+                        help='Hook invocations per timed run')
+    parser.add_argument('--client-requests', type=int, default=5000,
+                        help='Full test-client requests per timed run')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='Timed runs per variant (median is reported)')
+    return parser.parse_args()
+
+
+def make_metrics():
+    registry = CollectorRegistry()
+    return (
+        Counter('bench_http_request_total', 'Total HTTP requests',
+                ['method', 'endpoint', 'status'], registry=registry),
+        Histogram('bench_http_request_duration_seconds', 'HTTP request duration in seconds',
+                  ['method', 'endpoint'], registry=registry),
+        Gauge('bench_http_requests_active', 'Number of active requests', registry=registry),
+    )
+
+
+def add_inline_hooks(app, request_count, request_duration, active_requests):
+    """The hooks as app.py had them before RequestMetrics"""
+    @app.before_request
+    def before_request():
+        request.start_time = time.time()
+        active_requests.inc()
+
+    @app.after_request
+    def after_request(response):
+        request_duration_seconds = time.time() - request.start_time
+        request_duration.labels(
+            method=request.method,
+            endpoint=request.endpoint or 'unknown'
+        ).observe(request_duration_seconds)
+        request_count.labels(
+            method=request.method,
+            endpoint=request.endpoint or 'unknown',
+            status=response.status_code
+        ).inc()
+        active_requests.dec()
+        return response
+
+
+def make_app(variant, max_pending):
+    """Return (app, flush function) of one variant"""
+    app = Flask(__name__)
+
+    @app.route('/health')
+    def health():
+        return 'ok'
+
+    if variant == 'inline':
+        add_inline_hooks(app, *make_metrics())
+        return app, lambda: None
+    metrics = RequestMetrics(*make_metrics(), max_pending=max_pending)
+    metrics.init_app(app)
+    return app, metrics.flush
+
+
+def time_hooks(app, flush, n):
+    """Return (hook ns per request, flush ns per request)"""
+    before = app.before_request_funcs[None][0]
+    after = app.after_request_funcs[None][0]
+    response = app.response_class('ok')
+    with app.test_request_context('/health'):
+        start = time.perf_counter_ns()
+        for _ in range(n):
+            before()
+            after(response)
+        hooks = time.perf_counter_ns() - start
+    start = time.perf_counter_ns()
+    flush()
+    return hooks / n, (time.perf_counter_ns() - start) / n
+
+
+def time_client(app, n):
+    """Full request time in ns"""
+    client = app.test_client()
+    client.get('/health')
+    start = time.perf_counter_ns()
+    for _ in range(n):
+        client.get('/health')
+    return (time.perf_counter_ns() - start) / n
+
+
+def main():
+    args = parse_args()
+    results = {}
+    for variant in ('inline', 'RequestMetrics'):
+        # Buffer a whole run so that its merge is timed separately
+        app, flush = make_app(variant, max_pending=args.requests + 1)
+        runs = [time_hooks(app, flush, args.requests) for _ in range(args.repeat)]
+        results[variant] = {
+            'hooks': statistics.median(hooks for hooks, _ in runs),
+            'flush': statistics.median(flush_ns for _, flush_ns in runs),
+            'request': statistics.median(time_client(app, args.client_requests)
+                                         for _ in range(args.repeat)),
+        }
+
+    print(f"{'Variant':<16}{'hooks (ns)':>12}{'flush (ns)':>12}{'request (us)':>14}")
+    for variant, r in results.items():
+        print(f"{variant:<16}{r['hooks']:>12.0f}{r['flush']:>12.0f}{r['request'] / 1000:>14.1f}")
+    inline, buffered = results['inline'], results['RequestMetrics']
+    print(f"\nHook overhead per request: {inline['hooks'] / buffered['hooks']:.1f}x lower "
+          f"({inline['hooks'] - buffered['hooks']:.0f} ns saved on the request path)")
+
+
+if __name__ == '__main__':
+    main()
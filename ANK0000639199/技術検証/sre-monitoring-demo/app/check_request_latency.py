@@ -0,0 +1,96 @@
+"""
+Request Latency Regression Check
+Measures per-request overhead of the demo apps in-process (Flask test client)
+and fails when the median exceeds a budget
+
+Usage:
+    python check_request_latency.py                      # sample-app.py
+    python check_request_latency.py --app app.py --endpoint /health
+    python check_request_latency.py --baseline           # old blocking psutil hook
+"""
+
+import argparse
+import importlib.util
+import os
+import statistics
+import sys
+import time
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Check per-request latency of a demo app')
+    parser.add_argument('--app', default='sample-app.py',
+                        help='Application file in this directory')
+    parser.add_argument('--endpoint', action='append', default=None,
+                        help='Endpoint to request (repeatable, default: /health and /metrics)')
+    parser.add_argument('--requests', type=int, default=500,
+                        help='Timed requests per endpoint')
+    parser.add_argument('--max-median-us', type=float, default=5000.0,
+                        help='Fail if the median request time exceeds this (microseconds)')
+    parser.add_argument('--baseline', action='store_true',
+                        help='Add the previous per-request psutil.cpu_percent(interval=0.1) '
+                             'hook to show the latency it caused')
+    return parser.parse_args()
+
+
+def load_app(filename):
+    """Import an app file by path (sample-app.py is not a valid module name)"""
+    sys.path.insert(0, APP_DIR)
+    spec = importlib.util.spec_from_file_location(
+        os.path.splitext(filename)[0].replace('-', '_'), os.path.join(APP_DIR, filename)
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.app
+
+
+def add_blocking_hook(app):
+    """Reproduce the old after_request system metrics update"""
+    import psutil
+
+    @app.after_request
+    def update_system_metrics(response):
+        psutil.cpu_percent(interval=0.1)
+        psutil.Process(os.getpid()).memory_info().rss
+        return response
+
+
+def measure(client, endpoint, n):
+    """Wall time of n sequential requests, in microseconds"""
+    client.get(endpoint)  # warm up
+    times = []
+    for _ in range(n):
+        start = time.perf_counter_ns()
+        client.get(endpoint)
+        times.append((time.perf_counter_ns() - start) / 1000)
+    return times
+
+
+def main():
+    args = parse_args()
+    app = load_app(args.app)
+    if args.baseline:
+        add_blocking_hook(app)
+    n = min(args.requests, 20) if args.baseline else args.requests
+    client = app.test_client()
+
+    failed = False
+    print(f"{'Endpoint':<16}{'Median (us)':>14}{'p99 (us)':>12}{'Max (us)':>12}  Status")
+    for endpoint in args.endpoint or ['/health', '/metrics']:
+        times = sorted(measure(client, endpoint, n))
+        median = statistics.median(times)
+        p99 = times[min(int(len(times) * 0.99), len(times) - 1)]
+        ok = median <= args.max_median_us
+        failed |= not ok
+        print(f"{endpoint:<16}{median:>14.0f}{p99:>12.0f}{times[-1]:>12.0f}  "
+              f"{'ok' if ok else 'OVER BUDGET'}")
+
+    if failed:
+        print(f"Median request time exceeds {args.max_median_us:.0f} us")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
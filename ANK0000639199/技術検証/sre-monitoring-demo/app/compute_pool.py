@@ -0,0 +1,158 @@
+"""
+Bounded Process Pool for CPU-bound Handlers
+Runs CPU-heavy work outside the web worker with admission control
+
+CPU-bound Python code holds the GIL, so running it on a request thread
+stalls every other request of that worker. Handlers hand such work to a
+small process pool instead. Admission is bounded: at most `workers` tasks
+run and `max_queue` more wait; beyond that submit raises PoolFull right
+away, which the apps turn into a 503 with a Retry-After header instead of
+letting requests pile up.
+
+Pool processes are started with forkserver (forking a multi-threaded web
+worker is unsafe) and created lazily in each web worker process. Every web
+worker has its own pool, so by default the CPUs are split between the
+WEB_CONCURRENCY web workers (at least one pool process each) and the
+admission bound scales with the host, not with the number of web workers.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from prometheus_client import Counter, Gauge, Histogram
+
+from workloads import timed_call
+
+QUEUE_DEPTH = Gauge(
+    'compute_pool_queue_depth',
+    'CPU-bound tasks admitted to the compute pool and not finished',
+    multiprocess_mode='livesum'
+)
+
+WAIT_SECONDS = Histogram(
+    'compute_pool_wait_seconds',
+    'Time a CPU-bound task waited for a pool process (queueing and IPC)',
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+
+REJECTED = Counter(
+    'compute_pool_rejected_total',
+    'CPU-bound tasks rejected because the compute pool queue was full'
+)
+
+
+class PoolFull(Exception):
+    """Raised when the compute pool cannot admit another task"""
+
+    def __init__(self, retry_after):
+        super().__init__('Compute pool queue is full')
+        self.retry_after = retry_after
+
+
+def default_workers():
+    """This web worker's share of the CPUs: CPU count / WEB_CONCURRENCY, at least 1"""
+    web_workers = max(int(os.environ.get('WEB_CONCURRENCY', '1')), 1)
+    return max((os.cpu_count() or 1) // web_workers, 1)
+
+
+class BoundedProcessPool:
+    """
+    Process pool with a fixed number of task slots.
+
+    Args:
+        workers: Pool processes (default COMPUTE_POOL_WORKERS or
+            default_workers())
+        max_queue: Tasks allowed to wait for a process
+            (default COMPUTE_QUEUE_SIZE or 2 x workers)
+        retry_after: Seconds suggested to rejected clients
+    """
+
+    def __init__(self, workers=None, max_queue=None, retry_after=1):
+        self.workers = workers or int(os.environ.get('COMPUTE_POOL_WORKERS',
+                                                     default_workers()))
+        if max_queue is None:
+            max_queue = int(os.environ.get('COMPUTE_QUEUE_SIZE', 2 * self.workers))
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self._slots = threading.BoundedSemaphore(self.workers + self.max_queue)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+
+    def _get_executor(self):
+        """The executor of this process (a new one after a fork or a crash)"""
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('forkserver')
+                )
+            return self._executor
+
+    def _reset_executor(self, executor):
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+
+    def submit(self, func, *args):
+        """
+        Admit func(*args) to the pool.
+
+        Returns:
+            concurrent.futures.Future: Resolves to (seconds spent in func, result)
+
+        Raises:
+            PoolFull: If all task slots are taken
+        """
+        if not self._slots.acquire(blocking=False):
+            REJECTED.inc()
+            raise PoolFull(self.retry_after)
+
+        QUEUE_DEPTH.inc()
+        submitted = time.perf_counter()
+        try:
+            executor = self._get_executor()
+            try:
+                future = executor.submit(timed_call, func, *args)
+            except BrokenProcessPool:
+                # A pool process died; start a fresh pool once
+                self._reset_executor(executor)
+                executor = self._get_executor()
+                future = executor.submit(timed_call, func, *args)
+        except BaseException:
+            QUEUE_DEPTH.dec()
+            self._slots.release()
+            raise
+
+        def done(future):
+            QUEUE_DEPTH.dec()
+            self._slots.release()
+            if not future.cancelled() and future.exception() is None:
+                run_seconds = future.result()[0]
+                WAIT_SECONDS.observe(max(time.perf_counter() - submitted - run_seconds, 0.0))
+            elif isinstance(future.exception(), BrokenProcessPool):
+                self._reset_executor(executor)
+
+        future.add_done_callback(done)
+        return future
+
+    def run(self, func, *args, timeout=None):
+        """Run func(*args) in the pool and wait for its result"""
+        return self.submit(func, *args).result(timeout)[1]
+
+    async def run_async(self, func, *args):
+        """Run func(*args) in the pool without blocking the event loop"""
+        return (await asyncio.wrap_future(self.submit(func, *args)))[1]
+
+    def shutdown(self):
+        """Stop the pool processes of this process"""
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
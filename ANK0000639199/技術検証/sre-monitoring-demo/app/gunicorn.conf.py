@@ -0,0 +1,41 @@
+"""
+Gunicorn configuration for the demo apps (production serving)
+
+    gunicorn -c gunicorn.conf.py app:app
+    WEB_CONCURRENCY=8 GUNICORN_THREADS=2 PORT=5000 gunicorn -c gunicorn.conf.py sample-app:app
+
+Workers and threads are tunable through the environment. The worker count
+is exported as WEB_CONCURRENCY so each worker's compute pool takes only its
+share of the CPUs (see compute_pool.py). Prometheus
+multiprocess mode is enabled for the workers so /metrics aggregates the
+request metrics of all of them (see metrics_registry.py).
+"""
+
+import multiprocessing
+import os
+import shutil
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+# Read by compute_pool.py in the workers to split the CPUs between them
+os.environ['WEB_CONCURRENCY'] = str(workers)
+threads = int(os.environ.get('GUNICORN_THREADS', '4'))
+worker_class = 'gthread'
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '30'))
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG')
+
+# Must be set before the workers import prometheus_client
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/prometheus-multiproc')
+
+
+def on_starting(server):
+    """Start from an empty metrics directory; old files would be summed in"""
+    path = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+
+def child_exit(server, worker):
+    """Drop the live gauges of a worker that exited"""
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
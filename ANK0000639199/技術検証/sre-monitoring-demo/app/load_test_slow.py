@@ -0,0 +1,116 @@
+"""
+Slow Request Starvation Load Test
+Fires concurrent /api/slow requests at a running app and probes /health
+while they are in flight
+
+With blocking handlers each slow request holds a worker thread for 1-3 s,
+so once they are all busy /health queues behind them. The asyncio
+variants (async_app.py, async_sample_app.py) should keep answering /health
+in milliseconds.
+
+Usage:
+    uvicorn async_app:app --port 8000 &
+    python load_test_slow.py --url http://localhost:8000 --slow-requests 32
+
+    WEB_CONCURRENCY=1 GUNICORN_THREADS=4 gunicorn -c gunicorn.conf.py app:app &
+    python load_test_slow.py --url http://localhost:8000 --slow-requests 32
+
+    # CPU load instead of slow I/O
+    python load_test_slow.py --slow-endpoint /api/compute --slow-requests 16 --repeat 50
+"""
+
+import argparse
+import statistics
+import sys
+import threading
+import time
+from collections import Counter
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Check that slow requests do not starve /health')
+    parser.add_argument('--url', default='http://localhost:8000', help='Base URL of the app')
+    parser.add_argument('--slow-endpoint', default='/api/slow')
+    parser.add_argument('--probe-endpoint', default='/health')
+    parser.add_argument('--slow-requests', type=int, default=32,
+                        help='Concurrent slow requests')
+    parser.add_argument('--repeat', type=int, default=1,
+                        help='Slow requests each concurrent client sends in a row')
+    parser.add_argument('--probe-interval', type=float, default=0.05,
+                        help='Seconds between probes')
+    parser.add_argument('--timeout', type=float, default=30.0,
+                        help='Per-request timeout in seconds')
+    parser.add_argument('--max-p99-ms', type=float, default=250.0,
+                        help='Fail if the probe p99 latency exceeds this')
+    return parser.parse_args()
+
+
+def timed_get(url, timeout):
+    """Return (seconds, status) of one GET; status None on connection errors"""
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except OSError:
+        status = None
+    return time.perf_counter() - start, status
+
+
+def probe_until(url, done, interval, timeout):
+    """Probe url every interval seconds until done is set"""
+    results = []
+    while not done.is_set():
+        results.append(timed_get(url, timeout))
+        time.sleep(interval)
+    return results
+
+
+def repeat_get(url, n, timeout):
+    """Send n GETs in a row and return their (seconds, status)"""
+    return [timed_get(url, timeout) for _ in range(n)]
+
+
+def main():
+    args = parse_args()
+    slow_url = args.url.rstrip('/') + args.slow_endpoint
+    probe_url = args.url.rstrip('/') + args.probe_endpoint
+
+    done = threading.Event()
+    with ThreadPoolExecutor(args.slow_requests + 1) as pool:
+        probes = pool.submit(probe_until, probe_url, done, args.probe_interval, args.timeout)
+        start = time.perf_counter()
+        slow = [result
+                for results in pool.map(lambda _: repeat_get(slow_url, args.repeat, args.timeout),
+                                        range(args.slow_requests))
+                for result in results]
+        elapsed = time.perf_counter() - start
+        done.set()
+        probes = probes.result()
+
+    statuses = Counter('error' if status is None else status for _, status in slow)
+    print(f"{args.slow_requests} concurrent x {args.repeat} {args.slow_endpoint}: "
+          f"{dict(sorted(statuses.items(), key=str))}, all done after {elapsed:.1f} s")
+
+    latencies = sorted(seconds * 1000 for seconds, status in probes if status is not None)
+    failed = len(probes) - len(latencies)
+    if not latencies:
+        print(f"No {args.probe_endpoint} probe got a response")
+        sys.exit(1)
+    p99 = latencies[min(int(len(latencies) * 0.99), len(latencies) - 1)]
+    print(f"{args.probe_endpoint} while they ran: {len(probes)} probes, {failed} failed, "
+          f"median {statistics.median(latencies):.1f} ms, p99 {p99:.1f} ms, "
+          f"max {latencies[-1]:.1f} ms")
+
+    if failed or p99 > args.max_p99_ms:
+        print(f"{args.probe_endpoint} was starved (p99 budget {args.max_p99_ms:.0f} ms)")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
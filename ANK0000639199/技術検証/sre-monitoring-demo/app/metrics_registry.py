@@ -0,0 +1,44 @@
+"""
+Prometheus Metrics Exposition
+Serves /metrics correctly for a single process and for gunicorn workers
+
+With several worker processes each one has its own default REGISTRY, so a
+scrape would only see the worker that happened to answer it. When
+PROMETHEUS_MULTIPROC_DIR is set (see gunicorn.conf.py), prometheus_client
+keeps every metric value in mmap'd files in that directory and the scrape
+aggregates the files of all workers instead.
+"""
+
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, generate_latest, multiprocess
+)
+
+
+def multiprocess_enabled():
+    """True when metrics are shared between worker processes"""
+    return bool(os.environ.get('PROMETHEUS_MULTIPROC_DIR'))
+
+
+def render_metrics(collectors=()):
+    """
+    Render all metrics for a /metrics response.
+
+    Args:
+        collectors: Custom collectors evaluated at scrape time. They are
+            already in REGISTRY for a single process; in multiprocess mode
+            they are added to the per-scrape registry and report the
+            worker that serves the scrape.
+
+    Returns:
+        tuple: (body, headers)
+    """
+    if multiprocess_enabled():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        for collector in collectors:
+            registry.register(collector)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), {'Content-Type': CONTENT_TYPE_LATEST}
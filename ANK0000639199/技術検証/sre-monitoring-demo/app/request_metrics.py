@@ -0,0 +1,158 @@
+"""
+Request Metrics Middleware
+Low-overhead request count and duration recording shared by the demo apps
+
+The request path only appends the elapsed perf_counter_ns() to a buffer
+owned by the current thread, keyed by (method, endpoint, status). No
+label lookup, string conversion or metric lock is involved. Buffers are
+merged into the Prometheus metrics by flush(): at scrape time, when a
+buffer reaches `max_pending` observations, at exit, and under gunicorn
+(where a scrape only reaches one worker) every `flush_interval` seconds.
+Label children are resolved once per key and cached.
+"""
+
+import atexit
+import os
+import threading
+from time import perf_counter_ns, sleep
+
+from metrics_registry import multiprocess_enabled
+
+
+class _ThreadBuffer:
+    """Observations of one thread, waiting to be merged"""
+
+    __slots__ = ('thread', 'lock', 'pending', 'observations', 'start_ns')
+
+    def __init__(self):
+        self.thread = threading.current_thread()
+        # Only contended while flush() swaps the buffer out
+        self.lock = threading.Lock()
+        self.pending = {}  # (method, endpoint, status) -> [elapsed ns, ...]
+        self.observations = 0
+        self.start_ns = 0
+
+
+class RequestMetrics:
+    """
+    Buffered request metrics with before/after request hooks.
+
+    Args:
+        request_count: Counter labelled method, endpoint, status
+        request_duration: Histogram labelled method, endpoint
+        active_requests: Optional unlabelled Gauge of in-flight requests
+            (updated directly, it must be current at every scrape)
+        max_pending: Observations a thread buffers before merging itself
+        flush_interval: Seconds between background merges in multiprocess mode
+    """
+
+    def __init__(self, request_count, request_duration, active_requests=None,
+                 max_pending=10000, flush_interval=1.0):
+        self.request_count = request_count
+        self.request_duration = request_duration
+        self.active_requests = active_requests
+        self.max_pending = max_pending
+        self.flush_interval = flush_interval
+        self._local = threading.local()
+        self._buffers = []
+        self._buffers_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._children = {}
+        self._flusher_pid = None
+        atexit.register(self.flush)
+
+    def init_app(self, app):
+        """Register the before/after request hooks on a Flask app"""
+        from flask import request
+
+        active_requests = self.active_requests
+
+        @app.before_request
+        def start_request_timer():
+            self._buffer().start_ns = perf_counter_ns()
+            if active_requests is not None:
+                active_requests.inc()
+
+        @app.after_request
+        def record_request(response):
+            elapsed_ns = perf_counter_ns() - self._buffer().start_ns
+            # Resolve the context-local proxy once, each access costs a lookup
+            current = request._get_current_object()
+            self.record(current.method, current.endpoint or 'unknown',
+                        response.status_code, elapsed_ns)
+            if active_requests is not None:
+                active_requests.dec()
+            return response
+
+        return app
+
+    def _buffer(self):
+        """The buffer of the current thread"""
+        try:
+            return self._local.buffer
+        except AttributeError:
+            buffer = self._local.buffer = _ThreadBuffer()
+            with self._buffers_lock:
+                self._buffers.append(buffer)
+            self._start_flusher()
+            return buffer
+
+    def record(self, method, endpoint, status, elapsed_ns, buffer=None):
+        """Buffer one finished request"""
+        if buffer is None:
+            buffer = self._buffer()
+        key = (method, endpoint, status)
+        with buffer.lock:
+            durations = buffer.pending.get(key)
+            if durations is None:
+                durations = buffer.pending[key] = []
+            durations.append(elapsed_ns)
+            buffer.observations += 1
+            full = buffer.observations >= self.max_pending
+        if full:
+            self.flush()
+
+    def _resolve(self, key):
+        """Cached (count child, duration child) of a label key"""
+        children = self._children.get(key)
+        if children is None:
+            method, endpoint, status = key
+            children = self._children[key] = (
+                self.request_count.labels(method=method, endpoint=endpoint, status=status),
+                self.request_duration.labels(method=method, endpoint=endpoint),
+            )
+        return children
+
+    def flush(self):
+        """Merge all thread buffers into the Prometheus metrics"""
+        with self._flush_lock:
+            with self._buffers_lock:
+                buffers = list(self._buffers)
+            for buffer in buffers:
+                with buffer.lock:
+                    pending, buffer.pending, buffer.observations = buffer.pending, {}, 0
+                for key, durations in pending.items():
+                    count, duration = self._resolve(key)
+                    count.inc(len(durations))
+                    for elapsed_ns in durations:
+                        duration.observe(elapsed_ns / 1e9)
+            # Threads of e.g. the development server come and go
+            with self._buffers_lock:
+                self._buffers = [buffer for buffer in self._buffers
+                                 if buffer.thread.is_alive() or buffer.pending]
+
+    def _start_flusher(self):
+        """Merge periodically when other workers' scrapes read our metrics"""
+        if not multiprocess_enabled() or self._flusher_pid == os.getpid():
+            return
+        with self._buffers_lock:
+            if self._flusher_pid == os.getpid():
+                return
+            self._flusher_pid = os.getpid()
+        threading.Thread(target=self._flush_periodically, name='request-metrics-flush',
+                         daemon=True).start()
+
+    def _flush_periodically(self):
+        while True:
+            sleep(self.flush_interval)
+            self.flush()
@@ -4,12 +4,17 @@ Demonstrates SRE best practices for application monitoring
 """
 
 from flask import Flask, jsonify, request
-from prometheus_client import Counter, Histogram, Gauge, generate_latest, REGISTRY
+from prometheus_client import Counter, Histogram, Gauge, REGISTRY
 import time
 import random
-import psutil
 import os
 
+from compute_pool import BoundedProcessPool, PoolFull
+from metrics_registry import render_metrics
+from request_metrics import RequestMetrics
+from system_metrics import SystemMetricsCollector
+from workloads import sum_of_squares
+
 app = Flask(__name__)
 
 # Custom Metrics
@@ -28,55 +33,35 @@ request_duration = Histogram(
 )
 
 # Gauge: can go up or down
-active_users = Gauge('app_active_users', 'Number of active users')
-error_rate = Gauge('app_error_rate', 'Current error rate')
-database_connections = Gauge('app_database_connections', 'Active database connections')
+# (multiprocess_mode: how the values of gunicorn workers are combined)
+active_users = Gauge('app_active_users', 'Number of active users',
+                     multiprocess_mode='livesum')
+error_rate = Gauge('app_error_rate', 'Current error rate', multiprocess_mode='livemax')
+database_connections = Gauge('app_database_connections', 'Active database connections',
+                             multiprocess_mode='mostrecent')
 
 # Business Metrics
 orders_total = Counter('app_orders_total', 'Total orders processed', ['status'])
 revenue_total = Counter('app_revenue_total', 'Total revenue in cents')
 
 # System Metrics
-cpu_usage = Gauge('app_cpu_usage_percent', 'CPU usage percentage')
-memory_usage = Gauge('app_memory_usage_bytes', 'Memory usage in bytes')
+# Sampled by a background thread and read at scrape time, never per request
+system_metrics = SystemMetricsCollector(
+    period=float(os.environ.get('SYSTEM_METRICS_PERIOD', '5'))
+)
+REGISTRY.register(system_metrics)
+
+# CPU-bound handlers run in this pool instead of on the request thread
+compute_pool = BoundedProcessPool()
 
 # Simulate some state
 active_user_count = 0
 db_connections = 0
 
 
-def update_system_metrics():
-    """Update system-level metrics"""
-    cpu_usage.set(psutil.cpu_percent(interval=0.1))
-    memory_usage.set(psutil.Process(os.getpid()).memory_info().rss)
-
-
-@app.before_request
-def before_request():
-    """Track request start time"""
-    request.start_time = time.time()
-
-
-@app.after_request
-def after_request(response):
-    """Record metrics after each request"""
-    request_latency = time.time() - request.start_time
-
-    # Record metrics
-    request_count.labels(
-        method=request.method,
-        endpoint=request.endpoint or 'unknown',
-        status=response.status_code
-    ).inc()
-
-    request_duration.labels(
-        method=request.method,
-        endpoint=request.endpoint or 'unknown'
-    ).observe(request_latency)
-
-    update_system_metrics()
-
-    return response
+# Request count and duration, recorded by before/after request hooks
+request_metrics = RequestMetrics(request_count, request_duration)
+request_metrics.init_app(app)
 
 
 @app.route('/')
@@ -181,8 +166,8 @@ def error_endpoint():
 @app.route('/api/heavy')
 def heavy_endpoint():
     """Simulate CPU intensive operation"""
-    # CPU intensive calculation
-    result = sum([i ** 2 for i in range(100000)])
+    # CPU intensive calculation, in a pool process (503 when the queue is full)
+    result = compute_pool.run(sum_of_squares, 100000)
 
     global db_connections
     db_connections = random.randint(5, 50)
@@ -195,10 +180,19 @@ def heavy_endpoint():
     })
 
 
+@app.errorhandler(PoolFull)
+def compute_pool_full(error):
+    """Shed load quickly when the compute pool is saturated"""
+    return jsonify({'error': 'Compute capacity exhausted, retry later'}), 503, \
+        {'Retry-After': str(error.retry_after)}
+
+
 @app.route('/metrics')
 def metrics():
     """Prometheus metrics endpoint"""
-    return generate_latest(REGISTRY)
+    request_metrics.flush()
+    body, headers = render_metrics(collectors=[system_metrics])
+    return body, 200, headers
 
 
 # Background task simulator
@@ -236,4 +230,6 @@ def simulate_traffic():
 if __name__ == '__main__':
     print("Starting SRE Monitoring Demo Application...")
     print("Metrics available at http://localhost:5000/metrics")
+    system_metrics.start()
+    # Development server; use gunicorn.conf.py for production
     app.run(host='0.0.0.0', port=5000, debug=False)
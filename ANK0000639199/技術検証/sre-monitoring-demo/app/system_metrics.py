@@ -0,0 +1,119 @@
+"""
+Background System Metrics Collector
+Samples CPU and memory usage off the request path for Prometheus
+"""
+
+import os
+import threading
+import time
+
+import psutil
+from prometheus_client.core import GaugeMetricFamily
+
+
+def _busy_time(times):
+    """(busy, total) seconds of a psutil.cpu_times() result"""
+    total = sum(times)
+    # Linux counts guest time in user time as well
+    total -= getattr(times, 'guest', 0.0) + getattr(times, 'guest_nice', 0.0)
+    idle = times.idle + getattr(times, 'iowait', 0.0)
+    return total - idle, total
+
+
+class SystemMetricsCollector:
+    """
+    Custom Prometheus collector backed by a background sampling thread.
+
+    A daemon thread samples system CPU usage and this process's RSS every
+    `period` seconds and caches the values. Scrapes read the cached sample,
+    so neither requests nor /metrics ever wait on psutil.
+
+    CPU usage is measured between two consecutive samples, i.e. averaged
+    over the period, instead of blocking 100 ms to measure it. The previous
+    CPU times are kept on the collector, from its creation on, rather than
+    in psutil.cpu_percent(interval=None), whose baseline is per thread: the
+    first call of every thread returns 0.0, and under gunicorn the first
+    sample is taken by whichever request thread serves the first scrape.
+    """
+
+    def __init__(self, period=5.0, prefix='app'):
+        self.period = period
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sample = None
+        self._thread = None
+        self._pid = None
+        self._cpu_times = psutil.cpu_times()
+
+    def start(self):
+        """Start the sampling thread (again after a fork, e.g. in a worker)"""
+        with self._lock:
+            if self._pid == os.getpid() and self._thread is not None:
+                return self
+            self._pid = os.getpid()
+            self._process = psutil.Process(self._pid)
+            self._stop.clear()
+            self._sample_now()
+            self._thread = threading.Thread(target=self._run, name='system-metrics',
+                                            daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the sampling thread"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.period + 1)
+
+    def _cpu_percent(self):
+        """System CPU usage since the previous call (or since creation)"""
+        times = psutil.cpu_times()
+        (busy, total), (last_busy, last_total) = _busy_time(times), _busy_time(self._cpu_times)
+        self._cpu_times = times
+        if total <= last_total:
+            return 0.0
+        return round(min(max((busy - last_busy) / (total - last_total) * 100, 0.0), 100.0), 1)
+
+    def _sample_now(self):
+        """Take one sample (non-blocking)"""
+        self._sample = {
+            'cpu_percent': self._cpu_percent(),
+            'rss_bytes': self._process.memory_info().rss,
+            'timestamp': time.time(),
+        }
+
+    def _run(self):
+        while not self._stop.wait(self.period):
+            try:
+                self._sample_now()
+            except psutil.Error:
+                pass
+
+    def collect(self):
+        """Called by prometheus_client at scrape time"""
+        self.start()
+        sample = self._sample
+
+        cpu = GaugeMetricFamily(f'{self.prefix}_cpu_usage_percent', 'CPU usage percentage')
+        cpu.add_metric([], sample['cpu_percent'])
+        yield cpu
+
+        memory = GaugeMetricFamily(f'{self.prefix}_memory_usage_bytes',
+                                   'Memory usage in bytes')
+        memory.add_metric([], sample['rss_bytes'])
+        yield memory
+
+        age = GaugeMetricFamily(f'{self.prefix}_system_metrics_age_seconds',
+                                'Seconds since the system metrics were sampled')
+        age.add_metric([], max(time.time() - sample['timestamp'], 0.0))
+        yield age
+
+    def describe(self):
+        """Metric names, without taking a sample at registration time"""
+        return [
+            GaugeMetricFamily(f'{self.prefix}_cpu_usage_percent', 'CPU usage percentage'),
+            GaugeMetricFamily(f'{self.prefix}_memory_usage_bytes', 'Memory usage in bytes'),
+            GaugeMetricFamily(f'{self.prefix}_system_metrics_age_seconds',
+                              'Seconds since the system metrics were sampled'),
+        ]
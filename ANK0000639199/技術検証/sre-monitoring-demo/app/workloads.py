@@ -0,0 +1,28 @@
+"""
+CPU-bound Workloads
+Functions executed in the compute pool processes (see compute_pool.py)
+
+Kept free of Prometheus metrics and app state so that importing this module
+in a pool process has no side effects.
+"""
+
+import time
+
+
+def sum_of_squares(n):
+    """
+    Sum of i ** 2 for i in range(n), in closed form.
+
+    Equal to sum([i ** 2 for i in range(n)]) without building an n-element
+    list: the sum of the first m squares is m(m + 1)(2m + 1) / 6, with m = n - 1.
+    """
+    if n <= 0:
+        return 0
+    return n * (n - 1) * (2 * n - 1) // 6
+
+
+def timed_call(func, *args):
+    """Run func(*args) and return (seconds spent, result)"""
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result